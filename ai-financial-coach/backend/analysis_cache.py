@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import load_env
+from metrics import registry
+from rate_limit import SingleFlight
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# A cached analysis younger than this is served as is
+ANALYSIS_FRESH_SECONDS = float(os.getenv('ANALYSIS_FRESH_SECONDS', '60'))
+# Up to this age it is still served immediately, and one background refresh per account is started
+ANALYSIS_STALE_SECONDS = float(os.getenv('ANALYSIS_STALE_SECONDS', '900'))
+ANALYSIS_REFRESH_WORKERS = int(os.getenv('ANALYSIS_REFRESH_WORKERS', '2'))
+
+ANALYSIS_CACHE = registry.counter(
+    'analysis_cache_requests_total', 'Analysis lookups by outcome (fresh, stale, miss)', ('outcome',))
+ANALYSIS_REFRESHES = registry.counter(
+    'analysis_cache_refreshes_total', 'Background analysis refreshes by outcome', ('outcome',))
+
+
+class _Entry:
+    __slots__ = ('result', 'computed_at')
+
+    def __init__(self, result, computed_at):
+        self.result = result
+        self.computed_at = computed_at
+
+
+class StaleWhileRevalidate:
+    """
+    Per-account cache of the last good analysis, served stale-while-revalidate.
+
+    get() returns the cached result while it is younger than `stale_seconds`;
+    once it is older than `fresh_seconds` a background refresh is started,
+    at most one per account at a time, so an account costs at most one
+    analysis per freshness window however often it is read. Past the stale
+    window (or after invalidate()) the caller computes synchronously.
+    Results are only cached when `cacheable(result)` says so.
+    """
+
+    def __init__(self, fresh_seconds=ANALYSIS_FRESH_SECONDS, stale_seconds=ANALYSIS_STALE_SECONDS,
+                 workers=ANALYSIS_REFRESH_WORKERS, cacheable=None, on_refresh=None, clock=time.time):
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = max(stale_seconds, fresh_seconds)
+        self.cacheable = cacheable or (lambda result: isinstance(result, dict) and 'error' not in result)
+        self.on_refresh = on_refresh
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped by invalidate(); a refresh started under an older generation is discarded
+        self._generations = {}
+        self._refreshing = set()
+        self._flights = SingleFlight()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='analysis-refresh')
+
+    def _generation(self, key):
+        return self._generations.get(key, 0)
+
+    def put(self, key, result, generation=None):
+        """Store a result; ignored if not cacheable or the key was invalidated since `generation`."""
+        if not self.cacheable(result):
+            return False
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return False
+            self._entries[key] = _Entry(result, self._clock())
+        return True
+
+    def invalidate(self, key=None):
+        """Drop one key (or everything) and discard refreshes already in flight for it."""
+        with self._lock:
+            keys = [key] if key is not None else list(set(self._entries) | set(self._generations))
+            for k in keys:
+                self._entries.pop(k, None)
+                self._generations[k] = self._generation(k) + 1
+
+    def get(self, key, compute):
+        """(result, age_seconds) for the key, computing synchronously on a miss."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            age = now - entry.computed_at if entry is not None else None
+            generation = self._generation(key)
+            refresh = (entry is not None and self.fresh_seconds <= age < self.stale_seconds
+                       and key not in self._refreshing)
+            if refresh:
+                self._refreshing.add(key)
+        if entry is not None and age < self.stale_seconds:
+            ANALYSIS_CACHE.inc(outcome='fresh' if age < self.fresh_seconds else 'stale')
+            if refresh:
+                self._pool.submit(self._refresh, key, compute, generation)
+            return entry.result, age
+
+        ANALYSIS_CACHE.inc(outcome='miss')
+        # Concurrent misses for one account share a single analysis
+        result, _ = self._flights.do(key, compute)
+        self.put(key, result, generation)
+        return result, 0.0
+
+    def _refresh(self, key, compute, generation):
+        try:
+            result = compute()
+            stored = self.put(key, result, generation)
+            ANALYSIS_REFRESHES.inc(outcome='ok' if stored else 'discarded')
+            if stored and self.on_refresh:
+                self.on_refresh(key, result)
+        except Exception as e:
+            ANALYSIS_REFRESHES.inc(outcome='error')
+            logger.error(f"Background analysis refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
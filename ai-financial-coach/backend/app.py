@@ -1,23 +1,40 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from dotenv import load_dotenv
+from config import load_env
 import os
 import logging
-from nessie_client import NessieClient
-from gemini_client import GeminiClient
-from mediastack_client import MediastackClient
-from apscheduler.schedulers.background import BackgroundScheduler
+from lazy import LazyObject
+from http_cache import StateVersion, conditional_get, compress_response
+from deadline import with_deadline, current as current_deadline
+import metrics
+import profiling
+from rollups import SpendingRollups, GRANULARITIES
+from historical_savings import HistoricalSavingsStore
+from merchants import MerchantIndex, directory as merchant_directory
+from recurring import RecurringDetector
+from categorization import CategoryCache, CategorizationQueue, aligned_labels
+from analysis_cache import StaleWhileRevalidate
+from seen_window import SeenWindow
+from transaction_index import TransactionIndex
+from dashboard import Fanout
+from serialization import FastJSONProvider, projectable
+from datetime import datetime, timedelta
 import json
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# orjson-backed jsonify (standard library when orjson is missing); read routes also honour ?fields=
+app.json = FastJSONProvider(app)
 CORS(app)
+app.after_request(compress_response)
+metrics.init_app(app)
+profiling.init_app(app)
 
 # Global session state for prototype
 # In a production environment, this would be stored in a database per user
@@ -30,18 +47,324 @@ user_session_state = {
 }
 user_session_state.setdefault('removed_transactions', {})
 
-# Initialize clients
-nessie_client = NessieClient()
-gemini_client = GeminiClient()
-mediastack_client = MediastackClient()
+# Bumped on every mutation of user_session_state; read endpoints derive ETags from it
+state_version = StateVersion()
 
-def analyze_spending():
+def _make_nessie_client():
+    from nessie_client import NessieClient
+    return NessieClient()
+
+
+def _install_cassette(**clients):
+    # CASSETTE_MODE=record|replay routes Gemini and Mediastack calls through the on-disk cassette
+    from cassette import CASSETTE_MODE, default_cassette, install
+    if CASSETTE_MODE != 'off':
+        install(default_cassette(), **clients)
+
+
+def _make_gemini_client():
+    from gemini_client import GeminiClient
+    client = GeminiClient()
+    _install_cassette(gemini_client=client)
+    return client
+
+
+def _make_mediastack_client():
+    from mediastack_client import MediastackClient
+    client = MediastackClient()
+    _install_cassette(mediastack_client=client)
+    return client
+
+
+def _make_card_engine():
+    from card_scoring import CardScoringEngine
+    return CardScoringEngine()
+
+
+def _make_local_categorizer():
+    from local_categorizer import LOCAL_CATEGORIZER_PATH, LocalCategorizer
+    return LocalCategorizer(path=LOCAL_CATEGORIZER_PATH)
+
+
+# Clients (and the SDKs behind them) are constructed on first use to keep cold start fast
+nessie_client = LazyObject(_make_nessie_client)
+gemini_client = LazyObject(_make_gemini_client)
+mediastack_client = LazyObject(_make_mediastack_client)
+card_engine = LazyObject(_make_card_engine)
+# kNN Need/Want model trained on every label Gemini returns (NumPy, so also built lazily)
+local_categorizer = LazyObject(_make_local_categorizer)
+
+# Ask Gemini to reword the locally computed credit-card "why" text (also per request with ?phrase=1)
+CARD_REASONS_FROM_GEMINI = os.getenv('CARD_REASONS_FROM_GEMINI', 'false').lower() in ('1', 'true', 'yes')
+
+# Keyword rule used when Gemini categorization is unavailable
+FALLBACK_NEED_KEYWORDS = ('grocery', 'food', 'gas', 'rent', 'utility', 'insurance', 'medical')
+
+
+def _fallback_category(description):
+    """Keyword-based Need/Want guess for a single description"""
+    description = (description or '').lower()
+    return 'Need' if any(word in description for word in FALLBACK_NEED_KEYWORDS) else 'Want'
+
+
+# How many top wants / merchants are summarized for the recommendation prompt
+RECOMMENDATION_TOP_K = int(os.getenv('RECOMMENDATION_TOP_K', '5'))
+
+
+def _want_summary(frame, want_rows, k=RECOMMENDATION_TOP_K):
+    """Fixed-size summary of 'Want' spending for get_recommendation.
+
+    Top-k transactions and top-k merchant subtotals are selected locally, so the
+    prompt stays the same size however long the transaction history is.
+    """
+    top_rows = frame.top_rows(want_rows, k)
+    amounts = (frame.amount_cents[top_rows] / 100.0).tolist()
+    return {
+        "count": int(len(want_rows)),
+        "total": int(frame.amount_cents[want_rows].sum()) / 100.0,
+        "top_transactions": [
+            {"description": d[:60], "amount": a}
+            for d, a in zip(frame.descriptions(top_rows), amounts)
+        ],
+        "top_merchants": [
+            {"merchant": merchant_directory.name(m), "total": cents / 100.0, "count": count}
+            for m, cents, count in frame.top_merchants(want_rows, k)
+        ],
+    }
+
+
+# Need/Want label per canonical merchant, filled by analysis and by the import queue
+category_cache = CategoryCache()
+# Bulk imports hand new merchants to this queue instead of categorizing row by row
+categorization_queue = CategorizationQueue(lambda descriptions: gemini_client.categorize_transactions(descriptions), category_cache,
+                                           on_labelled=lambda descriptions, labels: local_categorizer.learn(descriptions, labels))
+
+CATEGORIZED_MERCHANTS = metrics.registry.counter(
+    'categorized_merchants_total', 'Merchants labelled Need/Want during analysis, by label source', ('source',))
+
+
+def _categorize_frame(frame):
+    """Label every row Need/Want: cached merchant labels, then the local model, Gemini for
+    what it is unsure of, and keywords as the last fallback"""
+    from local_categorizer import LOCAL_CATEGORIZER_MIN_CONFIDENCE
+    # One description per canonical merchant; the label is broadcast to all its transactions
+    merchant_ids, merchant_descriptions = frame.canonical_merchants()
+    labels = category_cache.get_many(merchant_ids)
+    missing = [(m, d) for m, d in zip(merchant_ids, merchant_descriptions) if m not in labels]
+    CATEGORIZED_MERCHANTS.inc(len(labels), source='cache')
+    if missing:
+        try:
+            predictions = local_categorizer.predict([d for _, d in missing])
+        except Exception as e:
+            logger.error(f"Error in local categorizer: {e}")
+            predictions = []
+        confident = [(m, label) for (m, _), (label, confidence) in zip(missing, predictions)
+                     if label and confidence >= LOCAL_CATEGORIZER_MIN_CONFIDENCE]
+        if confident:
+            category_cache.put_many(confident)
+            labels.update(confident)
+            missing = [(m, d) for m, d in missing if m not in labels]
+            CATEGORIZED_MERCHANTS.inc(len(confident), source='local')
+    if missing:
+        categorized_result = gemini_client.categorize_transactions([d for _, d in missing])
+        gemini_labels = aligned_labels(categorized_result, len(missing))
+        if gemini_labels is not None:
+            fresh = list(zip([m for m, _ in missing], gemini_labels))
+            category_cache.put_many(fresh)
+            labels.update(fresh)
+            CATEGORIZED_MERCHANTS.inc(len(fresh), source='gemini')
+            try:
+                local_categorizer.learn([d for _, d in missing], gemini_labels)
+            except Exception as e:
+                logger.error(f"Error training local categorizer: {e}")
+        elif categorized_result:
+            # Labels that do not line up with the merchants sent are not trusted, cached or learned
+            logger.warning(f"Gemini categorization did not match the {len(missing)} merchants sent; using keywords")
+
+    if not labels:
+        # Fallback categorization
+        frame.categorize_by_keywords(FALLBACK_NEED_KEYWORDS)
+        return
+    # Merchants the model did not label fall back to the keyword rule
+    for merchant_id, description in missing:
+        if merchant_id not in labels:
+            labels[merchant_id] = _fallback_category(description)
+            CATEGORIZED_MERCHANTS.inc(source='keyword')
+    frame.set_categories_by_merchant(list(labels), list(labels.values()), default='Want')
+
+
+def _analysis_cacheable(result):
+    # Errors and deadline-degraded partial results are never served as the last good analysis
+    return isinstance(result, dict) and 'error' not in result and not result.get('degraded')
+
+
+# Last good analysis per account, served stale-while-revalidate by /api/analysis.
+# A background refresh that lands bumps that account's analysis version (below), so clients
+# revalidate the analysis-derived routes and pick it up while the other routes keep their ETags.
+analysis_cache = StaleWhileRevalidate(cacheable=_analysis_cacheable,
+                                      on_refresh=lambda account_id, result: _analysis_version(account_id).bump())
+
+# Append-only history of analysis snapshots, served by /api/savings-history
+savings_history = HistoricalSavingsStore()
+
+# Per-account generation of the data an analysis derives (snapshots, rollups, merchant and
+# transaction indexes, recurring charges); bumped whenever an analysis changes any of it.
+# Routes serving that data add it to their ETag, so the rest keep their validators.
+analysis_versions = {}
+
+
+def _analysis_version(account_id):
+    version = analysis_versions.get(account_id)
+    if version is None:
+        version = analysis_versions.setdefault(account_id, StateVersion())
+    return version
+
+
+def _session_analysis_version():
+    return _analysis_version(user_session_state.get('account_id')).current
+
+# Per-account day/week/month spending rollups, kept up to date as transactions change
+spending_rollups = {}
+
+
+def _rollups_for(account_id):
+    rollups = spending_rollups.get(account_id)
+    if rollups is None:
+        rollups = spending_rollups.setdefault(account_id, SpendingRollups())
+    return rollups
+
+
+# Per-account canonical merchant -> transactions index
+merchant_indexes = {}
+
+
+def _merchants_for(account_id):
+    index = merchant_indexes.get(account_id)
+    if index is None:
+        index = merchant_indexes.setdefault(account_id, MerchantIndex())
+    return index
+
+
+# Per-account sorted index of categorized transactions, for paged listing
+transaction_indexes = {}
+
+
+def _transactions_for(account_id):
+    index = transaction_indexes.get(account_id)
+    if index is None:
+        index = transaction_indexes.setdefault(account_id, TransactionIndex())
+    return index
+
+
+# Per-account streaming recurring-charge detectors
+recurring_detectors = {}
+
+# Accounts whose rollups / merchant index / recurring detector have been fed by a full analysis;
+# add-transaction alone only touches them incrementally
+analyzed_accounts = set()
+
+
+def _recurring_for(account_id):
+    detector = recurring_detectors.get(account_id)
+    if detector is None:
+        detector = recurring_detectors.setdefault(account_id, RecurringDetector())
+    return detector
+
+
+def _load_transactions(account_id):
+    """
+    Current transactions for an account, without categorizing them.
+
+    Nessie (or synthesized mock data when Nessie is unreachable), plus the
+    transactions added through the UI, minus the ones the user removed.
+    """
+    # Get transactions (prefer Nessie; fall back to synthesized mock if Nessie unavailable
+    transactions = []
+    try:
+        if nessie_client._test_api_connection():
+            transactions = nessie_client.get_transactions(account_id)
+        else:
+            # Use synthesized mock transactions when Nessie is down/unreachable
+            mock_base = [nessie_client._normalize_tx(tx, source='mock') for tx in nessie_client._get_mock_transactions()]
+            transactions = mock_base
+    except Exception:
+        # Hard fallback to synthesized transactions if fetching failed
+        mock_base = [nessie_client._normalize_tx(tx, source='mock') for tx in nessie_client._get_mock_transactions()]
+        transactions = mock_base
+    # Merge any in-memory mock transactions the user added via UI
+    mock_tx = user_session_state.get('mock_transactions', {}).get(account_id, [])
+    if mock_tx:
+        # Ensure mock txs have id and source
+        merged = []
+        for m in mock_tx:
+            if not isinstance(m, dict):
+                continue
+            tx_id = m.get('id')
+            if not tx_id:
+                import uuid as _uuid
+                tx_id = str(_uuid.uuid4())
+            merged.append({
+                'id': tx_id,
+                'description': m.get('description', ''),
+                'amount': float(m.get('amount', 0)),
+                'date': m.get('date'),
+                'source': m.get('source', 'added')
+            })
+        transactions = transactions + merged
+
+    # Filter out any transactions the user removed/hidden
+    removed_tx = user_session_state.get('removed_transactions', {}).get(account_id, [])
+    if removed_tx:
+        removed_ids = set([r for r in removed_tx if isinstance(r, str)])
+        # Dict entries match by canonical merchant + amount in cents
+        removed_pairs = set()
+        for r in removed_tx:
+            if not isinstance(r, dict):
+                continue
+            try:
+                removed_pairs.add((merchant_directory.id_for(r.get('description') or ''), round(float(r.get('amount') or 0) * 100)))
+            except:
+                continue
+
+        def is_removed(tx):
+            # If tx has an id and id is in removed_ids
+            try:
+                if tx.get('id') and str(tx.get('id')) in removed_ids:
+                    return True
+            except:
+                pass
+            if not removed_pairs:
+                return False
+            # Fallback: match by merchant+amount for dict entries
+            try:
+                key = (merchant_directory.id_for(tx.get('description') or ''), round(float(tx.get('amount') or 0) * 100))
+            except:
+                return False
+            return key in removed_pairs
+
+        transactions = [tx for tx in transactions if not is_removed(tx)]
+    return transactions
+
+
+def _degrade_if_timed_out(part, *operations):
+    """Mark `part` of the response degraded if any of the upstream operations hit the request deadline"""
+    deadline = current_deadline()
+    if deadline is not None and deadline.timed_out.intersection(operations):
+        deadline.degrade(part)
+        return True
+    return False
+
+
+def analyze_spending(account_id=None, savings_goal=None, monthly_budget=None):
     """
     Analyze user spending patterns using AI categorization.
     
     Fetches transactions from Nessie API or uses mock data, categorizes them
     as 'Needs' vs 'Wants' using Gemini AI, and generates personalized
     financial recommendations.
+
+    Defaults to the session account and its goal/budget; the fleet run passes
+    other accounts explicitly (their goal and budget default to 0).
     
     Returns:
         dict: Analysis results containing:
@@ -51,142 +374,102 @@ def analyze_spending():
             - savingsGoal: User's savings goal
             - recommendation: AI-generated advice
             - categorizedTransactions: List of categorized transactions
+            - degraded: parts skipped or approximated to meet the request
+              deadline (only present when non-empty); recommendation is None
+              when it was skipped
     """
     try:
-        account_id = user_session_state.get("account_id")
-        savings_goal = user_session_state.get("savings_goal", 0)
+        if account_id is None:
+            account_id = user_session_state.get("account_id")
+        is_session_account = account_id == user_session_state.get("account_id")
+        if savings_goal is None:
+            savings_goal = user_session_state.get("savings_goal", 0) if is_session_account else 0
+        if monthly_budget is None:
+            monthly_budget = user_session_state.get("monthly_budget", 0) if is_session_account else 0
         
         if not account_id:
             return {"error": "No account found. Please complete onboarding first."}
         
-        # Get transactions (prefer Nessie; fall back to synthesized mock if Nessie unavailable
-        transactions = []
-        try:
-            if nessie_client._test_api_connection():
-                transactions = nessie_client.get_transactions(account_id)
-            else:
-                # Use synthesized mock transactions when Nessie is down/unreachable
-                mock_base = [nessie_client._normalize_tx(tx, source='mock') for tx in nessie_client._get_mock_transactions()]
-                transactions = mock_base
-        except Exception:
-            # Hard fallback to synthesized transactions if fetching failed
-            mock_base = [nessie_client._normalize_tx(tx, source='mock') for tx in nessie_client._get_mock_transactions()]
-            transactions = mock_base
-        # Merge any in-memory mock transactions the user added via UI
-        mock_tx = user_session_state.get('mock_transactions', {}).get(account_id, [])
-        if mock_tx:
-            # Ensure mock txs have id and source
-            merged = []
-            for m in mock_tx:
-                if not isinstance(m, dict):
-                    continue
-                tx_id = m.get('id')
-                if not tx_id:
-                    import uuid as _uuid
-                    tx_id = str(_uuid.uuid4())
-                merged.append({
-                    'id': tx_id,
-                    'description': m.get('description', ''),
-                    'amount': float(m.get('amount', 0)),
-                    'source': m.get('source', 'added')
-                })
-            transactions = transactions + merged
-
-        # Filter out any transactions the user removed/hidden
-        removed_tx = user_session_state.get('removed_transactions', {}).get(account_id, [])
-        if removed_tx:
-            removed_ids = set([r for r in removed_tx if isinstance(r, str)])
-            removed_pairs = [r for r in removed_tx if isinstance(r, dict)]
-
-            def is_removed(tx):
-                # If tx has an id and id is in removed_ids
-                try:
-                    if tx.get('id') and str(tx.get('id')) in removed_ids:
-                        return True
-                except:
-                    pass
-                # Fallback: match by description+amount for dict entries
-                try:
-                    tx_desc = (tx.get('description') or '').strip().lower()
-                    tx_amount = float(tx.get('amount') or 0)
-                except:
-                    return False
-                for r in removed_pairs:
-                    try:
-                        r_desc = (r.get('description') or '').strip().lower()
-                        r_amount = float(r.get('amount') or 0)
-                    except:
-                        continue
-                    if tx_desc == r_desc and tx_amount == r_amount:
-                        return True
-                return False
-
-            transactions = [tx for tx in transactions if not is_removed(tx)]
+        transactions = _load_transactions(account_id)
+        _degrade_if_timed_out('transactions', 'nessie.probe', 'nessie.list_purchases')
         if not transactions:
             return {"error": "No transactions found."}
         
-        # Format transaction descriptions for AI analysis
-        transaction_descriptions = [tx.get('description', '') for tx in transactions]
-        
-        # Categorize transactions using Gemini
-        categorized_result = gemini_client.categorize_transactions(transaction_descriptions)
-        
-        if not categorized_result or 'transactions' not in categorized_result:
-            # Fallback categorization
-            categorized_transactions = []
-            for i, tx in enumerate(transactions):
-                description = tx.get('description', '').lower()
-                if any(word in description for word in ['grocery', 'food', 'gas', 'rent', 'utility', 'insurance', 'medical']):
-                    category = 'Need'
-                else:
-                    category = 'Want'
-                categorized_transactions.append({
-                    'id': tx.get('id'),
-                    'description': tx.get('description', ''),
-                    'amount': tx.get('amount', 0),
-                    'category': category
-                })
-        else:
-            # Use AI categorization
-            categorized_transactions = []
-            for i, tx in enumerate(transactions):
-                if i < len(categorized_result['transactions']):
-                    category = categorized_result['transactions'][i]
-                else:
-                    category = 'Want'  # Default fallback
-                categorized_transactions.append({
-                    'id': tx.get('id'),
-                    'description': tx.get('description', ''),
-                    'amount': tx.get('amount', 0),
-                    'category': category
-                })
+        from transaction_frame import TransactionFrame
+        frame = TransactionFrame.from_records(transactions)
+
+        # Categorize merchants (cached labels, then Gemini, then keywords)
+        _categorize_frame(frame)
+        _degrade_if_timed_out('categorization', 'gemini.categorize_transactions')
         
         # Calculate totals
-        needs_total = sum(tx['amount'] for tx in categorized_transactions if tx['category'] == 'Need')
-        wants_total = sum(tx['amount'] for tx in categorized_transactions if tx['category'] == 'Want')
+        needs_total = frame.total('Need')
+        wants_total = frame.total('Want')
 
         # Get AI recommendation
-        # Provide detailed want transactions (description + amount) so AI can make
-        # transaction-specific suggestions.
-        want_transactions = [f"{tx.get('description','')} (${tx.get('amount',0):.2f})" for tx in categorized_transactions if tx['category'] == 'Want']
-        recommendation = gemini_client.get_recommendation(needs_total, wants_total, savings_goal, want_transactions)
+        # Largest wants and merchant subtotals are picked locally; the model only
+        # sees this fixed-size summary so it can still make specific suggestions.
+        want_rows = frame.indices('Want')
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            # Out of time: return the categorized transactions without a recommendation
+            deadline.degrade('recommendation')
+            recommendation = None
+        else:
+            recommendation = gemini_client.get_recommendation(needs_total, wants_total, savings_goal, _want_summary(frame, want_rows))
+            if _degrade_if_timed_out('recommendation', 'gemini.get_recommendation'):
+                recommendation = None
+        degraded = list(deadline.degraded) if deadline is not None else []
 
-        if not recommendation:
+        categorized_transactions = frame.to_records()
+        try:
+            if _rollups_for(account_id).sync(categorized_transactions):
+                _analysis_version(account_id).bump()
+        except Exception as e:
+            logger.error(f"Error updating spending rollups: {e}")
+        try:
+            if _merchants_for(account_id).sync(categorized_transactions):
+                _analysis_version(account_id).bump()
+        except Exception as e:
+            logger.error(f"Error updating merchant index: {e}")
+        try:
+            if _recurring_for(account_id).sync(categorized_transactions):
+                _analysis_version(account_id).bump()
+        except Exception as e:
+            logger.error(f"Error updating recurring detector: {e}")
+        try:
+            if _transactions_for(account_id).sync(categorized_transactions):
+                _analysis_version(account_id).bump()
+        except Exception as e:
+            logger.error(f"Error updating transaction index: {e}")
+        analyzed_accounts.add(account_id)
+
+        if not recommendation and 'recommendation' not in degraded:
             # Fallback recommendation
             if wants_total > savings_goal * 0.5:
                 recommendation = f"Consider reducing your 'Want' spending of ${wants_total:.2f} to better meet your ${savings_goal} savings goal!"
             else:
                 recommendation = f"Great job! You're on track with your ${savings_goal} savings goal. Keep it up!"
 
-        return {
+        result = {
             "needsTotal": needs_total,
             "wantsTotal": wants_total,
             "totalSpending": needs_total + wants_total,
-            "monthlyBudget": user_session_state.get("monthly_budget", 0),
+            "monthlyBudget": monthly_budget,
             "savingsGoal": savings_goal,
             "recommendation": recommendation,
             "categorizedTransactions": categorized_transactions
         }
+        if degraded:
+            # Partial results are served but not kept as history snapshots
+            result["degraded"] = degraded
+            return result
+        try:
+            if savings_history.append(account_id, result):
+                _analysis_version(account_id).bump()
+        except Exception as e:
+            logger.error(f"Error saving analysis snapshot: {e}")
+        return result
         
         
     except Exception as e:
@@ -218,11 +501,16 @@ def onboard():
                 customer_id, account_id = ("mock_customer", "mock_account")
             user_session_state["customer_id"] = customer_id
             user_session_state["account_id"] = account_id
+            state_version.bump()
+            # A new session account: every cached analysis belongs to one the session has left
+            analysis_cache.invalidate()
             # seed synthesized transactions into the in-memory store for this account
             try:
                 synth = [nessie_client._normalize_tx(tx, source='mock') for tx in nessie_client._get_mock_transactions()]
                 user_session_state.setdefault('mock_transactions', {})
                 user_session_state['mock_transactions'][account_id] = synth
+                state_version.bump()
+                _invalidate_analysis(account_id)
             except Exception as e:
                 logger.error(f"Error generating mock transactions: {e}")
             return jsonify({
@@ -237,8 +525,13 @@ def onboard():
         if customer_id and account_id:
             user_session_state["customer_id"] = customer_id
             user_session_state["account_id"] = account_id
+            state_version.bump()
+            # A new session account: every cached analysis belongs to one the session has left
+            analysis_cache.invalidate()
             try:
                 nessie_client.seed_transactions(account_id)
+                state_version.bump()
+                _invalidate_analysis(account_id)
             except Exception as e:
                 logger.error(f"Error during seeding: {e}")
                 # still return customer/account so user can proceed, but warn
@@ -275,6 +568,9 @@ def set_goal():
         
         user_session_state["savings_goal"] = goal
         user_session_state["monthly_budget"] = budget
+        state_version.bump()
+        # Only the session account's analysis uses the goal and budget
+        _invalidate_analysis(user_session_state.get("account_id"))
         return jsonify({
             "status": "success",
             "goalSet": goal,
@@ -285,25 +581,63 @@ def set_goal():
         print(f"Error in set_goal: {e}")
         return jsonify({"error": "Failed to set goal"}), 500
 
+def _invalidate_analysis(account_id):
+    """Drop the cached analysis of one account.
+
+    Without an account there is nothing to drop (that analysis is never
+    cached), and analysis_cache.invalidate(None) would clear every account.
+    """
+    if account_id:
+        analysis_cache.invalidate(account_id)
+
+
+def _cached_analysis():
+    """(analysis, age in seconds) for the session account, from analysis_cache when possible"""
+    account_id = user_session_state.get("account_id")
+    if not account_id:
+        return analyze_spending(), 0.0
+    return analysis_cache.get(account_id, lambda: analyze_spending(account_id))
+
+
 @app.route('/api/analysis', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@with_deadline()
+@projectable
 def analysis():
-    """Get spending analysis and recommendations"""
+    """Get spending analysis and recommendations.
+
+    The last good analysis is served immediately while it is younger than
+    ANALYSIS_STALE_SECONDS, and refreshed in the background once it is older
+    than ANALYSIS_FRESH_SECONDS. Its age is only reported in the Age header:
+    the ETag follows the state version, so a body field would go out of date
+    on every 304.
+    ?transactions=0 leaves out categorizedTransactions; page through them
+    with /api/transactions instead.
+    """
     try:
-        result = analyze_spending()
-        return jsonify(result)
+        result, age = _cached_analysis()
+        if "error" in result:
+            return jsonify(result)
+        if request.args.get('transactions') in ('0', 'false'):
+            result = {k: v for k, v in result.items() if k != "categorizedTransactions"}
+        response = jsonify(result)
+        response.headers['Age'] = str(int(age))
+        return response
         
     except Exception as e:
         print(f"Error in analysis: {e}")
         return jsonify({"error": "Analysis failed"}), 500
 
 @app.route('/api/investment-idea', methods=['GET'])
+@with_deadline()
+@projectable
 def investment_idea():
     """Get investment education if savings goal is met"""
     try:
         savings_goal = user_session_state.get("savings_goal", 0)
         
         # Get current analysis to check if goal is met
-        analysis_result = analyze_spending()
+        analysis_result, _age = _cached_analysis()
         if "error" in analysis_result:
             return jsonify(analysis_result), 400
         
@@ -312,6 +646,7 @@ def investment_idea():
         # Check if goal is met (simplified: if wants spending is less than half the goal)
         if wants_total <= savings_goal * 0.5:
             investment_concept = gemini_client.get_investment_concept(savings_goal)
+            _degrade_if_timed_out('investment_concept', 'gemini.get_investment_concept')
             return jsonify(investment_concept)
         else:
             return jsonify({
@@ -364,6 +699,8 @@ def seed_transactions():
                 synth = [nessie_client._normalize_tx(tx, source='mock') for tx in nessie_client._get_mock_transactions()]
                 user_session_state.setdefault('mock_transactions', {})
                 user_session_state['mock_transactions'][account_id] = synth
+            state_version.bump()
+            _invalidate_analysis(account_id)
             return jsonify({"status": "success", "message": "Transactions seeded"})
         except Exception as e:
             print(f"Error seeding transactions: {e}")
@@ -373,7 +710,144 @@ def seed_transactions():
         return jsonify({"error": "Failed to seed transactions"}), 500
 
 
+# Shown trending symbols are remembered for TRENDING_SEEN_TTL_SECONDS, at most TRENDING_SEEN_MAX of them;
+# prompts carry at most TRENDING_AVOID_MAX symbols to avoid
+TRENDING_SEEN_MAX = int(os.getenv('TRENDING_SEEN_MAX', '60'))
+TRENDING_SEEN_TTL_SECONDS = float(os.getenv('TRENDING_SEEN_TTL_SECONDS', str(24 * 3600)))
+TRENDING_AVOID_MAX = int(os.getenv('TRENDING_AVOID_MAX', '24'))
+
+
+def _trending_seen():
+    seen = user_session_state.get('trending_history')
+    if not isinstance(seen, SeenWindow):
+        seen = user_session_state['trending_history'] = SeenWindow(TRENDING_SEEN_MAX, TRENDING_SEEN_TTL_SECONDS)
+    return seen
+
+
+def _avoid_list(*groups, limit=TRENDING_AVOID_MAX):
+    """Upper-cased symbols from the groups in order, without duplicates, capped at `limit`"""
+    merged = dict.fromkeys(str(s).upper() for group in groups for s in (group or []) if s)
+    return list(merged)[:limit]
+
+
+def _trending_payload(avoid_symbols=None, seed=None, temperature=None, reset_history=False):
+    """Pick 3 buys and 3 sells not shown recently, and remember them as shown."""
+    # Bounded, decaying window of shown symbols to strongly avoid repeats
+    seen_set = _trending_seen()
+    if reset_history:
+        seen_set.clear()
+
+    # Also avoid the immediately previous set
+    last = user_session_state.get('last_trending', {"buys": [], "sells": []})
+    last_symbols = [s.get('symbol') for s in (last.get('buys') or [])] + [s.get('symbol') for s in (last.get('sells') or [])]
+    last_symbols = [str(s or '').upper() for s in last_symbols if s]
+
+    import time as _time
+
+    def to_upper_list(items):
+        return [str(x or '').upper() for x in items if x]
+
+    # Attempt multiple times to gather unseen candidates
+    buys_pool = []
+    sells_pool = []
+    max_attempts = 4
+    base_temp = temperature if temperature is not None else 0.95
+    # Avoid list in priority order (previous set, requested, most recently seen); only the
+    # first TRENDING_AVOID_MAX symbols go into the prompt
+    current_avoid = _avoid_list(last_symbols, avoid_symbols, seen_set.recent(TRENDING_AVOID_MAX))
+    for i in range(max_attempts):
+        if i and current_deadline() is not None and current_deadline().expired:
+            break
+        s = seed if i == 0 and seed is not None else f"{seed or 'seed'}-{_time.time_ns()}-{i}"
+        t = min(1.0, base_temp + i * 0.02)
+        data_try = gemini_client.get_trending_stocks(
+            avoid_symbols=current_avoid or None,
+            seed=s,
+            temperature=t
+        )
+        try:
+            new_buys = [it for it in (data_try.get('buys') or []) if str((it.get('symbol') or '')).upper() not in seen_set]
+            new_sells = [it for it in (data_try.get('sells') or []) if str((it.get('symbol') or '')).upper() not in seen_set]
+        except Exception:
+            new_buys, new_sells = [], []
+        # Append unseen first
+        buys_pool.extend(new_buys)
+        sells_pool.extend(new_sells)
+        # Put everything we just saw at the front of the avoid list to push variety
+        try:
+            just_seen = to_upper_list([x.get('symbol') for x in (data_try.get('buys') or [])] +
+                                      [x.get('symbol') for x in (data_try.get('sells') or [])])
+            current_avoid = _avoid_list(just_seen, current_avoid)
+        except Exception:
+            pass
+        # Early exit if we already have enough unseen
+        if len(buys_pool) >= 3 and len(sells_pool) >= 3:
+            break
+
+    # Deduplicate while preserving order
+    def dedupe(items):
+        seen_local = set()
+        out = []
+        for it in items:
+            key = str((it.get('symbol') or '')).upper()
+            if key and key not in seen_local:
+                out.append(it)
+                seen_local.add(key)
+        return out
+
+    buys_pool = dedupe(buys_pool)
+    sells_pool = dedupe(sells_pool)
+
+    # If still not enough unseen, try a final Gemini call and then fallback pool respecting avoid
+    out_of_time = current_deadline() is not None and current_deadline().expired
+    if (len(buys_pool) < 3 or len(sells_pool) < 3) and not out_of_time:
+        extra = gemini_client.get_trending_stocks(
+            avoid_symbols=current_avoid or None,
+            seed=f"final-{_time.time_ns()}",
+            temperature=1.0
+        )
+        try:
+            buys_pool.extend([it for it in (extra.get('buys') or []) if str((it.get('symbol') or '')).upper() not in seen_set])
+            sells_pool.extend([it for it in (extra.get('sells') or []) if str((it.get('symbol') or '')).upper() not in seen_set])
+        except Exception:
+            pass
+        buys_pool = dedupe(buys_pool)
+        sells_pool = dedupe(sells_pool)
+    if len(buys_pool) < 3 or len(sells_pool) < 3:
+        fb = gemini_client._fallback_trending_stocks(avoid_symbols=current_avoid or None)
+        try:
+            buys_pool.extend(fb.get('buys', []))
+            sells_pool.extend(fb.get('sells', []))
+        except Exception:
+            pass
+        buys_pool = dedupe(buys_pool)
+        sells_pool = dedupe(sells_pool)
+
+    _degrade_if_timed_out('trending', 'gemini.get_trending_stocks')
+
+    # Final selection: first 3 of each
+    buys_out = buys_pool[:3] if len(buys_pool) >= 3 else (buys_pool + (last.get('buys') or []))[:3]
+    sells_out = sells_pool[:3] if len(sells_pool) >= 3 else (sells_pool + (last.get('sells') or []))[:3]
+
+    data = {
+        'buys': buys_out,
+        'sells': sells_out,
+        'disclaimer': (last.get('disclaimer') if isinstance(last, dict) else None) or 'This content is for general informational purposes only and is not financial advice.'
+    }
+
+    # Persist current as last and update history
+    try:
+        user_session_state['last_trending'] = {'buys': buys_out[:], 'sells': sells_out[:]}
+        seen_set.add(str((it.get('symbol') or '')).upper() for it in buys_out + sells_out)
+    except Exception:
+        pass
+
+    return data
+
+
 @app.route('/api/stocks-trending', methods=['GET'])
+@with_deadline()
+@projectable
 def stocks_trending():
     """Get 3 trending buy and 3 sell stock ideas with descriptions via Gemini.
     Supports optional refresh parameters:
@@ -395,119 +869,7 @@ def stocks_trending():
         except Exception:
             temp_val = None
 
-        # Maintain a history of shown symbols to strongly avoid repeats
-        if reset_history:
-            user_session_state['trending_history'] = {'seen': []}
-        hist = user_session_state.get('trending_history', {'seen': []})
-        seen_list = hist.get('seen') or []
-        seen_set = set([str(s).upper() for s in seen_list])
-
-        # Also avoid the immediately previous set
-        last = user_session_state.get('last_trending', {"buys": [], "sells": []})
-        last_symbols = [s.get('symbol') for s in (last.get('buys') or [])] + [s.get('symbol') for s in (last.get('sells') or [])]
-        last_symbols = [str(s or '').upper() for s in last_symbols if s]
-
-        # Build merged avoidance list (provided avoid + last + seen history)
-        merged_avoid = sorted(set((avoid_symbols or []) + last_symbols + list(seen_set))) or None
-
-        import time as _time
-
-        def to_upper_list(items):
-            return [str(x or '').upper() for x in items if x]
-
-        # Attempt multiple times to gather unseen candidates
-        buys_pool = []
-        sells_pool = []
-        max_attempts = 4
-        base_temp = temp_val if temp_val is not None else 0.95
-        current_avoid = set(merged_avoid or [])
-        for i in range(max_attempts):
-            s = seed if i == 0 and seed is not None else f"{seed or 'seed'}-{_time.time_ns()}-{i}"
-            t = min(1.0, base_temp + i * 0.02)
-            data_try = gemini_client.get_trending_stocks(
-                avoid_symbols=sorted(current_avoid) if current_avoid else None,
-                seed=s,
-                temperature=t
-            )
-            try:
-                new_buys = [it for it in (data_try.get('buys') or []) if str((it.get('symbol') or '')).upper() not in seen_set]
-                new_sells = [it for it in (data_try.get('sells') or []) if str((it.get('symbol') or '')).upper() not in seen_set]
-            except Exception:
-                new_buys, new_sells = [], []
-            # Append unseen first
-            buys_pool.extend(new_buys)
-            sells_pool.extend(new_sells)
-            # Expand avoid with everything we just saw to push variety
-            try:
-                current_avoid.update(to_upper_list([x.get('symbol') for x in (data_try.get('buys') or [])]))
-                current_avoid.update(to_upper_list([x.get('symbol') for x in (data_try.get('sells') or [])]))
-            except Exception:
-                pass
-            # Early exit if we already have enough unseen
-            if len(buys_pool) >= 3 and len(sells_pool) >= 3:
-                break
-
-        # Deduplicate while preserving order
-        def dedupe(items):
-            seen_local = set()
-            out = []
-            for it in items:
-                key = str((it.get('symbol') or '')).upper()
-                if key and key not in seen_local:
-                    out.append(it)
-                    seen_local.add(key)
-            return out
-
-        buys_pool = dedupe(buys_pool)
-        sells_pool = dedupe(sells_pool)
-
-        # If still not enough unseen, try a final Gemini call and then fallback pool respecting avoid
-        if len(buys_pool) < 3 or len(sells_pool) < 3:
-            extra = gemini_client.get_trending_stocks(
-                avoid_symbols=sorted(current_avoid) if current_avoid else None,
-                seed=f"final-{_time.time_ns()}",
-                temperature=1.0
-            )
-            try:
-                buys_pool.extend([it for it in (extra.get('buys') or []) if str((it.get('symbol') or '')).upper() not in seen_set])
-                sells_pool.extend([it for it in (extra.get('sells') or []) if str((it.get('symbol') or '')).upper() not in seen_set])
-            except Exception:
-                pass
-            buys_pool = dedupe(buys_pool)
-            sells_pool = dedupe(sells_pool)
-        if len(buys_pool) < 3 or len(sells_pool) < 3:
-            fb = gemini_client._fallback_trending_stocks(avoid_symbols=sorted(current_avoid) if current_avoid else None)
-            try:
-                buys_pool.extend(fb.get('buys', []))
-                sells_pool.extend(fb.get('sells', []))
-            except Exception:
-                pass
-            buys_pool = dedupe(buys_pool)
-            sells_pool = dedupe(sells_pool)
-
-        # Final selection: first 3 of each
-        buys_out = buys_pool[:3] if len(buys_pool) >= 3 else (buys_pool + (last.get('buys') or []))[:3]
-        sells_out = sells_pool[:3] if len(sells_pool) >= 3 else (sells_pool + (last.get('sells') or []))[:3]
-
-        data = {
-            'buys': buys_out,
-            'sells': sells_out,
-            'disclaimer': (last.get('disclaimer') if isinstance(last, dict) else None) or 'This content is for general informational purposes only and is not financial advice.'
-        }
-
-        # Persist current as last and update history
-        try:
-            user_session_state['last_trending'] = {'buys': buys_out[:], 'sells': sells_out[:]}
-            new_seen = list(seen_set)
-            for it in buys_out + sells_out:
-                sym = str((it.get('symbol') or '')).upper()
-                if sym and sym not in new_seen:
-                    new_seen.append(sym)
-            user_session_state['trending_history'] = {'seen': new_seen}
-        except Exception:
-            pass
-
-        return jsonify(data)
+        return jsonify(_trending_payload(avoid_symbols, seed, temp_val, reset_history))
     except Exception as e:
         print(f"Error in stocks_trending: {e}")
         return jsonify({
@@ -533,64 +895,106 @@ def save_stocks():
             if sym and sym not in existing:
                 user_session_state['saved_stocks'].append({'symbol': sym, 'name': name})
                 existing.add(sym)
+        state_version.bump()
         return jsonify({"status": "saved", "count": len(user_session_state['saved_stocks'])})
     except Exception as e:
         print(f"Error in save_stocks: {e}")
         return jsonify({"error": "Failed to save stocks"}), 500
 
 
+def _saved_stocks_payload():
+    """Saved stocks with Gemini's buy/hold/sell ratings, reasons enriched with Mediastack headlines."""
+    saved = user_session_state.get('saved_stocks', [])
+    ratings = gemini_client.rate_stocks(saved)
+    _degrade_if_timed_out('ratings', 'gemini.rate_stocks')
+    ratings_list = ratings.get('ratings', [])
+    saved_by_sym = {(s.get('symbol') or '').upper(): s for s in saved}
+    # Enrich reasons using Mediastack headlines where possible
+    enriched = []
+    deadline = current_deadline()
+    try:
+        for i, r in enumerate(ratings_list):
+            if deadline is not None and deadline.expired:
+                # Out of time: the remaining ratings keep Gemini's reason without a headline
+                deadline.degrade('headlines')
+                enriched.extend(ratings_list[i:])
+                break
+            sym = (r.get('symbol') or '').upper()
+            name = (saved_by_sym.get(sym, {}).get('name')) or r.get('name') or sym
+            reason = r.get('reason') or ''
+            news_reason = mediastack_client.get_reason_for_stock(sym, name)
+            if news_reason:
+                # Attach the news headline as an addendum for transparency
+                if reason:
+                    reason = f"{reason} — {news_reason}"
+                else:
+                    reason = news_reason
+            enriched.append({**r, 'reason': reason})
+    except Exception:
+        # If anything fails, fall back to original ratings
+        enriched = ratings_list
+    _degrade_if_timed_out('headlines', 'mediastack.news')
+
+    return {'saved': saved, 'ratings': enriched}
+
+
 @app.route('/api/stocks/saved', methods=['GET'])
+@conditional_get(state_version)
+@with_deadline()
+@projectable
 def get_saved_stocks():
-    """Return saved stocks along with a buy/hold/sell verdict from Gemini."""
-    try:
-        saved = user_session_state.get('saved_stocks', [])
-        ratings = gemini_client.rate_stocks(saved)
-        ratings_list = ratings.get('ratings', [])
-        saved_by_sym = {(s.get('symbol') or '').upper(): s for s in saved}
-        # Enrich reasons using Mediastack headlines where possible
-        enriched = []
-        try:
-            for r in ratings_list:
-                sym = (r.get('symbol') or '').upper()
-                name = (saved_by_sym.get(sym, {}).get('name')) or r.get('name') or sym
-                reason = r.get('reason') or ''
-                news_reason = mediastack_client.get_reason_for_stock(sym, name)
-                if news_reason:
-                    # Attach the news headline as an addendum for transparency
-                    if reason:
-                        reason = f"{reason} — {news_reason}"
-                    else:
-                        reason = news_reason
-                enriched.append({**r, 'reason': reason})
-        except Exception:
-            # If anything fails, fall back to original ratings
-            enriched = ratings_list
+    """Return saved stocks along with a buy/hold/sell verdict from Gemini.
 
-        return jsonify({'saved': saved, 'ratings': enriched})
+    Runs under the request deadline; ratings or headlines cut short by it are
+    listed in X-Degraded (and the response gets no ETag).
+    """
+    try:
+        return jsonify(_saved_stocks_payload())
     except Exception as e:
         print(f"Error in get_saved_stocks: {e}")
         return jsonify({'saved': [], 'ratings': []}), 500
 
 
+def _credit_cards_payload(transactions=None, phrase=None):
+    """
+    Ranked cards for the session account's spending profile.
+
+    `transactions` are the account's records when the caller already has
+    them (the dashboard passes the analysis's); otherwise they are loaded.
+    """
+    from card_scoring import DISCLAIMER, REWARD_CATEGORIES, profile_dict, spend_vector
+    account_id = user_session_state.get('account_id')
+    spend = [0] * len(REWARD_CATEGORIES)
+    if transactions is None and account_id:
+        transactions = _load_transactions(account_id)
+    if transactions:
+        from transaction_frame import TransactionFrame
+        spend = spend_vector(TransactionFrame.from_records(transactions))
+
+    cards = card_engine.recommend(spend)
+    profile = profile_dict(spend)
+    if (phrase in ('1', 'true') or (CARD_REASONS_FROM_GEMINI and phrase is None)) and profile:
+        reasons = gemini_client.phrase_card_reasons(cards, profile)
+        _degrade_if_timed_out('card_reasons', 'gemini.phrase_card_reasons')
+        if reasons:
+            for card, why in zip(cards, reasons):
+                if why:
+                    card['why'] = why
+    return {"cards": cards, "profile": profile, "disclaimer": DISCLAIMER}
+
+
 @app.route('/api/credit-cards', methods=['GET'])
+@conditional_get(state_version)
+@with_deadline()
+@projectable
 def recommend_credit_cards():
-    """Recommend top credit cards based on user's spending (uses Gemini with safe fallback)."""
+    """Rank credit cards against the user's spending profile with the local scoring engine.
+
+    Gemini is not needed for the ranking; it is only asked to reword the "why"
+    text when CARD_REASONS_FROM_GEMINI is set or the request passes ?phrase=1.
+    """
     try:
-        # Reuse current analysis to derive categories and recent transaction descriptions
-        analysis_result = analyze_spending()
-        if 'error' in analysis_result:
-            # proceed with minimal info if possible
-            tx_desc = []
-            cats = []
-        else:
-            txs = analysis_result.get('categorizedTransactions', [])
-            # favor wants/needs categories to infer rewards usefulness
-            tx_desc = [t.get('description', '') for t in txs[-40:]]  # last 40 for relevance
-            # approximate categories present
-            cats = list({(t.get('category') or '').lower() for t in txs if t.get('category')})
-
-        data = gemini_client.recommend_credit_cards(tx_desc, approx_categories=cats)
-        return jsonify(data)
+        return jsonify(_credit_cards_payload(phrase=request.args.get('phrase')))
     except Exception as e:
         print(f"Error in recommend_credit_cards: {e}")
         return jsonify({
@@ -599,6 +1003,51 @@ def recommend_credit_cards():
         }), 500
 
 
+@app.route('/api/dashboard', methods=['GET'])
+@with_deadline()
+@projectable
+def dashboard():
+    """Everything the dashboard shows, in one response.
+
+    The analysis is computed (or served from analysis_cache) once; trending
+    ideas and saved-stock ratings run alongside it, and card ranking starts
+    from the analysis's transactions as soon as it is ready. Each section
+    has its own timeout (DASHBOARD_SECTION_TIMEOUTS); one that fails or runs
+    out of time is null and listed in "degraded", the rest are still returned.
+    The Age header is the age of the analysis, as on /api/analysis.
+    """
+    try:
+        fanout = Fanout()
+        fanout.start('analysis', _cached_analysis)
+        fanout.start('trending', _trending_payload)
+        fanout.start('saved', _saved_stocks_payload)
+
+        cached = fanout.result('analysis')
+        analysis_result, age = cached if cached is not None else (None, None)
+        transactions = None
+        if analysis_result is not None and "error" not in analysis_result:
+            transactions = analysis_result.get("categorizedTransactions")
+        # Without an analysis (error or timeout) the section loads the transactions itself
+        fanout.start('cards', _credit_cards_payload, transactions, request.args.get('phrase'))
+
+        payload = {
+            "analysis": analysis_result,
+            "cards": fanout.result('cards'),
+            "trending": fanout.result('trending'),
+            "saved": fanout.result('saved'),
+            "timings": fanout.timings,
+        }
+        if fanout.degraded:
+            payload["degraded"] = fanout.degraded
+        response = jsonify(payload)
+        if age is not None:
+            response.headers['Age'] = str(int(age))
+        return response
+    except Exception as e:
+        print(f"Error in dashboard: {e}")
+        return jsonify({"error": "Failed to load dashboard"}), 500
+
+
 @app.route('/api/add-transaction', methods=['POST'])
 def add_transaction():
     """Add a single mock transaction to the in-memory store for the account"""
@@ -610,6 +1059,13 @@ def add_transaction():
         if not description or amount is None:
             return jsonify({"error": "description and amount are required"}), 400
 
+        # Optional ISO date; defaults to today so the transaction lands in the right rollup bucket
+        tx_date = (data.get('date') or datetime.utcnow().strftime('%Y-%m-%d'))[:10]
+        try:
+            datetime.strptime(tx_date, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
         account_id = user_session_state.get('account_id')
 
         # ensure amount is numeric
@@ -626,16 +1082,18 @@ def add_transaction():
                 'id': str(_uuid.uuid4()),
                 'description': description,
                 'amount': amount,
+                'date': tx_date,
                 'source': 'local'
             }
             user_session_state.setdefault('mock_transactions', {})
             user_session_state['mock_transactions'].setdefault('local', [])
             user_session_state['mock_transactions']['local'].append(mock_tx)
+            state_version.bump()
             return jsonify({"status": "success", "transaction": mock_tx})
 
         # Attempt to create transaction in Nessie for persistence
         try:
-            created = nessie_client.create_transaction(account_id, {"description": description, "amount": amount})
+            created = nessie_client.create_transaction(account_id, {"description": description, "amount": amount, "date": tx_date})
         except Exception as e:
             created = None
 
@@ -646,19 +1104,170 @@ def add_transaction():
                 'id': str(_uuid.uuid4()),
                 'description': description,
                 'amount': amount,
+                'date': tx_date,
                 'source': 'local'
             }
             user_session_state.setdefault('mock_transactions', {})
             user_session_state['mock_transactions'].setdefault(account_id, [])
             user_session_state['mock_transactions'][account_id].append(mock_tx)
+            _rollups_for(account_id).upsert(mock_tx['id'], tx_date, round(amount * 100), _fallback_category(description))
+            _merchants_for(account_id).upsert(mock_tx['id'], description, round(amount * 100), _fallback_category(description))
+            _recurring_for(account_id).ingest(mock_tx)
+            _transactions_for(account_id).upsert(mock_tx['id'], description, tx_date, round(amount * 100), _fallback_category(description))
+            state_version.bump()
+            _invalidate_analysis(account_id)
             return jsonify({"status": "success", "transaction": mock_tx})
 
+        _rollups_for(account_id).upsert(created.get('id'), created.get('date') or tx_date, round(amount * 100), _fallback_category(description))
+        _merchants_for(account_id).upsert(created.get('id'), description, round(amount * 100), _fallback_category(description))
+        _recurring_for(account_id).ingest({'id': created.get('id'), 'description': description, 'amount': amount,
+                                           'date': created.get('date') or tx_date})
+        _transactions_for(account_id).upsert(created.get('id'), description, created.get('date') or tx_date,
+                                             round(amount * 100), _fallback_category(description))
+        state_version.bump()
+        _invalidate_analysis(account_id)
         return jsonify({"status": "success", "transaction": created})
     except Exception as e:
         print(f"Error in add_transaction: {e}")
         return jsonify({"error": "Failed to add transaction"}), 500
 
 
+@app.route('/api/transactions/import', methods=['POST'])
+def import_transactions():
+    """Bulk-import transactions from a CSV or NDJSON upload, streaming NDJSON progress.
+
+    The body is either a multipart upload (field "file") or the raw file. The
+    format comes from ?format=csv|ndjson, else the file name / content type.
+    Rows need description and amount; date (YYYY-MM-DD) defaults to today.
+
+    Response lines (application/x-ndjson):
+      {"type": "error", "row": n, "error": "..."}          one per rejected row (capped)
+      {"type": "progress", "rows": n, "imported": n, "errors": n}   after each chunk
+      {"type": "done", ...}                                  final totals
+    """
+    from importer import IMPORT_MAX_ERROR_LINES, detect_format, iter_chunks
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    try:
+        fmt = detect_format(request.args.get('format'),
+                            upload.filename if upload else None,
+                            upload.mimetype if upload else request.mimetype)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    account_id = user_session_state.get('account_id')
+    store_key = account_id or 'local'
+    default_date = datetime.utcnow().strftime('%Y-%m-%d')
+
+    def generate():
+        import uuid as _uuid
+        rows = imported = errors = queued = 0
+        try:
+            for valid, row_errors in iter_chunks(stream, fmt, default_date):
+                rows += len(valid) + len(row_errors)
+                for number, message in row_errors:
+                    errors += 1
+                    if errors <= IMPORT_MAX_ERROR_LINES:
+                        yield json.dumps({"type": "error", "row": number, "error": message}) + '\n'
+                if valid:
+                    chunk = [{'id': str(_uuid.uuid4()), 'description': tx['description'], 'amount': tx['amount'],
+                              'date': tx['date'], 'source': 'import'} for tx in valid]
+                    # One list extend per chunk instead of a Nessie round trip per row
+                    user_session_state.setdefault('mock_transactions', {}).setdefault(store_key, []).extend(chunk)
+                    if account_id:
+                        rollups, index, detector = _rollups_for(account_id), _merchants_for(account_id), _recurring_for(account_id)
+                        listing = _transactions_for(account_id)
+                        for tx in chunk:
+                            cents, category = round(tx['amount'] * 100), _fallback_category(tx['description'])
+                            rollups.upsert(tx['id'], tx['date'], cents, category)
+                            index.upsert(tx['id'], tx['description'], cents, category)
+                            detector.ingest(tx)
+                            listing.upsert(tx['id'], tx['description'], tx['date'], cents, category)
+                    queued += categorization_queue.submit(tx['description'] for tx in chunk)
+                    imported += len(chunk)
+                    state_version.bump()
+                    _invalidate_analysis(account_id)
+                yield json.dumps({"type": "progress", "rows": rows, "imported": imported, "errors": errors}) + '\n'
+        except Exception as e:
+            print(f"Error in import_transactions: {e}")
+            yield json.dumps({"type": "error", "row": None, "error": "Import aborted"}) + '\n'
+        yield json.dumps({"type": "done", "rows": rows, "imported": imported, "errors": errors,
+                          "queuedForCategorization": queued}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+# Upper bound on ids per /api/remove-transactions call, and on concurrent upstream deletes
+REMOVE_BATCH_MAX = int(os.getenv('REMOVE_BATCH_MAX', '500'))
+REMOVE_CONCURRENCY = int(os.getenv('REMOVE_CONCURRENCY', '8'))
+
+
+def _remove_transactions(tx_ids):
+    """
+    Remove or hide transactions; returns {tx_id: status}.
+
+    Status is 'deleted' (removed in Nessie), 'removed' (dropped from the
+    in-memory store) or 'hidden' (remembered so analysis filters it out).
+    Nessie is probed once for the whole batch, deletes run concurrently and
+    the local store is rewritten in a single pass.
+    """
+    tx_ids = list(dict.fromkeys(str(t) for t in tx_ids))
+    account_id = user_session_state.get('account_id')
+    store_key = account_id or 'local'
+    results = {}
+
+    if account_id:
+        rollups, index, detector = _rollups_for(account_id), _merchants_for(account_id), _recurring_for(account_id)
+        listing = _transactions_for(account_id)
+        for tx_id in tx_ids:
+            rollups.remove(tx_id)
+            index.remove(tx_id)
+            detector.remove(tx_id)
+            listing.remove(tx_id)
+
+        try:
+            upstream_ok = nessie_client._test_api_connection()
+        except Exception:
+            upstream_ok = False
+        if upstream_ok:
+            def delete(tx_id):
+                try:
+                    return nessie_client.delete_transaction(account_id, tx_id, check_connection=False)
+                except Exception:
+                    return False
+
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=max(1, min(REMOVE_CONCURRENCY, len(tx_ids)))) as pool:
+                for tx_id, ok in zip(tx_ids, pool.map(delete, tx_ids)):
+                    if ok:
+                        results[tx_id] = 'deleted'
+
+    remaining = set(tx_id for tx_id in tx_ids if tx_id not in results)
+    if remaining:
+        store = user_session_state.setdefault('mock_transactions', {})
+        kept = []
+        for t in store.get(store_key, []):
+            tx_id = str(t.get('id'))
+            if tx_id in remaining:
+                results[tx_id] = 'removed'
+            else:
+                kept.append(t)
+        store[store_key] = kept
+
+        # Anything left is not ours to delete (e.g. synthesized or upstream-only); hide it
+        hidden = [tx_id for tx_id in tx_ids if tx_id not in results]
+        if hidden:
+            removed = user_session_state.setdefault('removed_transactions', {}).setdefault(store_key, [])
+            already = set(r for r in removed if isinstance(r, str))
+            removed.extend(tx_id for tx_id in hidden if tx_id not in already)
+            for tx_id in hidden:
+                results[tx_id] = 'hidden'
+
+    state_version.bump()
+    _invalidate_analysis(account_id)
+    return results
+
+
 @app.route('/api/remove-transaction', methods=['POST'])
 def remove_transaction():
     """Mark a transaction as removed/hidden in the in-memory store for the account"""
@@ -668,73 +1277,334 @@ def remove_transaction():
         if not tx_id:
             return jsonify({"error": "id is required for removal"}), 400
 
+        _remove_transactions([tx_id])
+        return jsonify({"status": "success", "removed": {"id": tx_id}})
+    except Exception as e:
+        print(f"Error in remove_transaction: {e}")
+        return jsonify({"error": "Failed to remove transaction"}), 500
+
+
+@app.route('/api/remove-transactions', methods=['POST'])
+def remove_transactions():
+    """Remove/hide many transactions in one call: {"ids": [...]} -> per-id results"""
+    try:
+        data = request.get_json() or {}
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"error": "ids must be a non-empty list"}), 400
+        if len(ids) > REMOVE_BATCH_MAX:
+            return jsonify({"error": f"at most {REMOVE_BATCH_MAX} ids per request"}), 400
+
+        valid = [i for i in ids if isinstance(i, (str, int)) and str(i).strip()]
+        statuses = _remove_transactions(valid)
+        results = []
+        for i in ids:
+            status = statuses.get(str(i)) if i in valid else None
+            results.append({"id": i, "status": status or "error", **({} if status else {"error": "invalid id"})})
+        return jsonify({
+            "status": "success",
+            "removed": sum(1 for r in results if r['status'] != 'error'),
+            "results": results
+        })
+    except Exception as e:
+        print(f"Error in remove_transactions: {e}")
+        return jsonify({"error": "Failed to remove transactions"}), 500
+
+@app.route('/api/spending/rollups', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@projectable
+def spending_rollups_view():
+    """Spending totals per day/week/month bucket and category over a date range.
+
+    Query parameters:
+      - granularity: day | week | month (default month)
+      - start, end: YYYY-MM-DD (default: the last 6 months)
+      - category: optional, e.g. Need or Want
+    """
+    try:
         account_id = user_session_state.get('account_id')
-        # If no account exists, try to remove from the local mock store
         if not account_id:
-            local_list = user_session_state.get('mock_transactions', {}).get('local', [])
-            before = len(local_list)
-            local_list = [t for t in local_list if str(t.get('id')) != str(tx_id)]
-            user_session_state.setdefault('mock_transactions', {})['local'] = local_list
-            if len(local_list) < before:
-                return jsonify({"status": "success", "removed": {"id": tx_id}})
-            else:
-                # mark as removed for safety
-                user_session_state.setdefault('removed_transactions', {}).setdefault('local', []).append(str(tx_id))
-                return jsonify({"status": "success", "removed": {"id": tx_id}})
+            return jsonify({"error": "No account found. Please complete onboarding first."}), 400
 
-        # Try to delete from Nessie; if it fails, fall back to marking removed in memory
+        rollups = _rollups_for(account_id)
+        if account_id not in analyzed_accounts:
+            # First query for this account: a single analysis populates the rollups
+            analyze_spending()
+
+        granularity = request.args.get('granularity', 'month')
+        if granularity not in GRANULARITIES:
+            return jsonify({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+        today = datetime.utcnow().date()
+        start = request.args.get('start') or (today - timedelta(days=183)).isoformat()
+        end = request.args.get('end') or today.isoformat()
         try:
-            try:
-                success = nessie_client.delete_transaction(account_id, tx_id)
-            except Exception:
-                success = False
-
-            if success:
-                return jsonify({"status": "success", "removed": {"id": tx_id}})
-
-            # Fallback: remove from mock_transactions for this account if present
-            acct_list = user_session_state.get('mock_transactions', {}).get(account_id, [])
-            before = len(acct_list)
-            acct_list = [t for t in acct_list if str(t.get('id')) != str(tx_id)]
-            user_session_state.setdefault('mock_transactions', {})[account_id] = acct_list
-            if len(acct_list) < before:
-                return jsonify({"status": "success", "removed": {"id": tx_id}})
-
-            # Otherwise mark id as removed so analysis will filter it
-            user_session_state.setdefault('removed_transactions', {}).setdefault(account_id, []).append(str(tx_id))
-            return jsonify({"status": "success", "removed": {"id": tx_id}})
-        except Exception as e:
-            print(f"Error deleting transaction: {e}")
-            return jsonify({"error": "Failed to delete transaction"}), 500
+            buckets = rollups.query(granularity, start, end, category=request.args.get('category'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "buckets": buckets,
+            "undatedTransactions": rollups.undated
+        })
     except Exception as e:
-        print(f"Error in remove_transaction: {e}")
-        return jsonify({"error": "Failed to remove transaction"}), 500
+        print(f"Error in spending_rollups: {e}")
+        return jsonify({"error": "Failed to compute spending rollups"}), 500
 
-def run_scheduled_analysis():
-    """Scheduled function to run analysis and send notifications"""
+
+@app.route('/api/spending/merchants', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@projectable
+def spending_by_merchant():
+    """Spend per canonical merchant, largest first.
+
+    Query parameters:
+      - category: optional, e.g. Need or Want
+      - limit: optional number of merchants to return
+      - transactions=1: include the transaction ids behind each merchant
+    """
     try:
-        result = analyze_spending()
-        if "error" not in result:
-            print(f"📊 Weekly Analysis Complete:")
-            print(f"   Needs: ${result.get('needsTotal', 0):.2f}")
-            print(f"   Wants: ${result.get('wantsTotal', 0):.2f}")
-            print(f"   Recommendation: {result.get('recommendation', 'N/A')}")
+        account_id = user_session_state.get('account_id')
+        if not account_id:
+            return jsonify({"error": "No account found. Please complete onboarding first."}), 400
+
+        index = _merchants_for(account_id)
+        if account_id not in analyzed_accounts:
+            # First query for this account: a single analysis populates the index
+            analyze_spending()
+
+        try:
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        merchants = index.spend(category=request.args.get('category'), limit=limit)
+        if request.args.get('transactions') in ('1', 'true'):
+            for row in merchants:
+                row['transactionIds'] = index.transactions(row['merchantId'])
+        return jsonify({"merchants": merchants})
+    except Exception as e:
+        print(f"Error in spending_by_merchant: {e}")
+        return jsonify({"error": "Failed to compute spending by merchant"}), 500
+
+
+def _amount_cents_param(name):
+    """Optional dollar amount query parameter in cents"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return round(float(value) * 100)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+@app.route('/api/transactions', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@projectable
+def list_transactions():
+    """One page of categorized transactions, served from the per-account index.
+
+    Query parameters:
+      - sort: date | amount (default date); order: asc | desc (default desc)
+      - category: optional, e.g. Need or Want
+      - start, end: optional YYYY-MM-DD dates, inclusive
+      - minAmount, maxAmount: optional dollar amounts, inclusive
+      - limit: page size (default 50, at most TRANSACTIONS_PAGE_MAX)
+      - cursor: nextCursor of the previous page
+    """
+    try:
+        account_id = user_session_state.get('account_id')
+        if not account_id:
+            return jsonify({"error": "No account found. Please complete onboarding first."}), 400
+
+        index = _transactions_for(account_id)
+        if account_id not in analyzed_accounts:
+            # First query for this account: a single analysis populates the index
+            analyze_spending()
+
+        try:
+            transactions, next_cursor = index.page(
+                sort=request.args.get('sort', 'date'),
+                order=request.args.get('order', 'desc'),
+                category=request.args.get('category') or None,
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                min_amount_cents=_amount_cents_param('minAmount'),
+                max_amount_cents=_amount_cents_param('maxAmount'),
+                limit=int(request.args.get('limit') or 50),
+                cursor=request.args.get('cursor'),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"transactions": transactions, "nextCursor": next_cursor})
+    except Exception as e:
+        print(f"Error in list_transactions: {e}")
+        return jsonify({"error": "Failed to list transactions"}), 500
+
+
+@app.route('/api/transactions/summary', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@projectable
+def transactions_summary():
+    """Spending totals and counts per category, without the transactions themselves.
+
+    Query parameters:
+      - start, end: optional YYYY-MM-DD dates, inclusive (e.g. the current month)
+    """
+    try:
+        account_id = user_session_state.get('account_id')
+        if not account_id:
+            return jsonify({"error": "No account found. Please complete onboarding first."}), 400
+
+        index = _transactions_for(account_id)
+        if account_id not in analyzed_accounts:
+            analyze_spending()
+
+        try:
+            summary = index.summary(start=request.args.get('start'), end=request.args.get('end'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        categories = summary["categories"]
+        summary.update({
+            "needsTotal": categories.get('Need', {}).get('total', 0.0),
+            "wantsTotal": categories.get('Want', {}).get('total', 0.0),
+            "savingsGoal": user_session_state.get('savings_goal', 0),
+            "monthlyBudget": user_session_state.get('monthly_budget', 0),
+        })
+        return jsonify(summary)
+    except Exception as e:
+        print(f"Error in transactions_summary: {e}")
+        return jsonify({"error": "Failed to summarize transactions"}), 500
+
+
+@app.route('/api/recurring', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@projectable
+def recurring_charges():
+    """Recurring charges and subscriptions detected so far, most expensive per year first"""
+    try:
+        account_id = user_session_state.get('account_id')
+        if not account_id:
+            return jsonify({"error": "No account found. Please complete onboarding first."}), 400
+
+        detector = _recurring_for(account_id)
+        if account_id not in analyzed_accounts:
+            # First query for this account: a single analysis feeds the detector
+            analyze_spending()
+
+        charges = detector.recurring()
+        return jsonify({
+            "recurring": charges,
+            "estimatedAnnualTotal": round(sum(c['estimatedAnnualCost'] or 0 for c in charges), 2),
+            "transactionsSeen": len(detector),
+        })
+    except Exception as e:
+        print(f"Error in recurring_charges: {e}")
+        return jsonify({"error": "Failed to detect recurring charges"}), 500
+
+
+def _parse_time_param(value):
+    """Accept epoch seconds or an ISO date/datetime; returns epoch seconds or None"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(value).timestamp()
+
+
+@app.route('/api/savings-history', methods=['GET'])
+@conditional_get(state_version, version=_session_analysis_version)
+@projectable
+def savings_history_view():
+    """Stored analysis snapshots, without re-running any analysis.
+
+    Query parameters:
+      - start, end: epoch seconds or ISO date/datetime (default: everything)
+      - points: downsample to at most this many evenly spaced buckets for charts
+      - limit: return only the most recent N raw snapshots
+    """
+    try:
+        account_id = user_session_state.get('account_id')
+        if not account_id:
+            return jsonify({"error": "No account found. Please complete onboarding first."}), 400
+        try:
+            start = _parse_time_param(request.args.get('start'))
+            end = _parse_time_param(request.args.get('end'))
+            points = int(request.args.get('points', 0))
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        except ValueError:
+            return jsonify({"error": "Invalid start, end, points or limit"}), 400
+
+        if points > 0:
+            snapshots = savings_history.downsample(account_id, start, end, points)
         else:
-            print(f"❌ Analysis failed: {result.get('error')}")
+            snapshots = savings_history.range(account_id, start, end, limit=limit)
+        return jsonify({"snapshots": snapshots, "downsampled": points > 0})
+    except Exception as e:
+        print(f"Error in savings_history: {e}")
+        return jsonify({"error": "Failed to load savings history"}), 500
+
+
+def _fleet_accounts():
+    """Every account to analyze: all Nessie accounts, plus the session account"""
+    accounts = []
+    try:
+        accounts = nessie_client.list_accounts()
+    except Exception as e:
+        logger.error(f"Error listing accounts for fleet run: {e}")
+    if user_session_state.get('account_id'):
+        accounts.append(user_session_state['account_id'])
+    return accounts
+
+
+def _report_scheduled_result(account_id, result):
+    if account_id != user_session_state.get('account_id'):
+        return
+    if "error" not in result:
+        print(f"📊 Weekly Analysis Complete:")
+        print(f"   Needs: ${result.get('needsTotal', 0):.2f}")
+        print(f"   Wants: ${result.get('wantsTotal', 0):.2f}")
+        print(f"   Recommendation: {result.get('recommendation', 'N/A')}")
+    else:
+        print(f"❌ Analysis failed: {result.get('error')}")
+
+
+def run_scheduled_analysis():
+    """Scheduled weekly analysis of every account (analyze_spending persists each snapshot)"""
+    try:
+        from fleet import FleetRunner
+        summary = FleetRunner(lambda account_id: analyze_spending(account_id), _fleet_accounts,
+                              on_result=_report_scheduled_result).run()
+        print(f"📊 Weekly fleet analysis: {len(summary['completed'])} accounts analyzed, "
+              f"{len(summary['failed'])} failed, in {summary['duration_seconds']:.1f}s")
+        return summary
     except Exception as e:
         print(f"❌ Scheduled analysis error: {e}")
 
-# Configure scheduler (start only once; avoid double-start with Flask reloader)
-scheduler = BackgroundScheduler(daemon=True)
-scheduler.add_job(run_scheduled_analysis, 'interval', days=7)
+# Scheduler is created by start_scheduler() so importing this module does not pull in APScheduler
+scheduler = None
+
+
+def start_scheduler():
+    """Create and start the weekly analysis scheduler (start only once; avoid double-start with Flask reloader)"""
+    global scheduler
+    if scheduler is None:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        scheduler = BackgroundScheduler(daemon=True)
+        scheduler.add_job(run_scheduled_analysis, 'interval', days=7)
+    if not scheduler.running:
+        scheduler.start()
+    return scheduler
 
 if __name__ == '__main__':
     print("🚀 Starting AI Financial Coach Backend...")
     print("📊 Scheduler configured for weekly analysis")
     print("🔑 Make sure to set NESSIE_API_KEY and GEMINI_API_KEY in .env file")
     try:
-        if not scheduler.running:
-            scheduler.start()
+        start_scheduler()
     except Exception as e:
         print(f"⚠️  Scheduler start skipped: {e}")
     # Disable the debug reloader to avoid double imports that can re-start the scheduler
@@ -0,0 +1,115 @@
+"""
+Latency of the local n-gram kNN categorizer and its agreement with the
+model's Need/Want labels, as the labelled corpus grows.
+
+Descriptions are synthetic variants (store numbers, cities, payment
+prefixes, casing) of a merchant list; the reference labels come from the
+stub model's rule, standing in for Gemini. Each round trains on a corpus of
+the given size and classifies a held-out set that also contains merchants
+never seen in training. Reported per corpus size:
+
+    rows       distinct normalized descriptions the corpus collapses to
+    coverage   share of held-out descriptions confident enough to skip the LLM
+    agreement  share of those confident predictions matching the reference label
+    predict    latency to classify a 100-description analysis batch
+
+Usage (from backend/):
+    python -m benchmarks.bench_categorizer
+    python -m benchmarks.bench_categorizer --sizes 100,1000,10000 --min-confidence 0.7
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import MERCHANTS, NEED_WORDS  # noqa: E402
+from local_categorizer import LOCAL_CATEGORIZER_MIN_CONFIDENCE, LocalCategorizer  # noqa: E402
+
+EXTRA_MERCHANTS = [
+    "Kroger", "Safeway", "Aldi", "Publix", "Exxon", "Valero", "Mobil", "Duke Energy", "City Water Utility",
+    "State Farm Insurance", "Geico Insurance", "Rent Payment", "Walgreens Pharmacy", "Verizon Wireless",
+    "Comcast Internet", "Metro Transit", "Dunkin", "Panera Bread", "Taco Bell", "Hulu", "Disney Plus",
+    "Best Buy", "Nike", "Sephora", "Steam Games", "Ticketmaster", "Lyft", "DoorDash", "Etsy", "Apple Store",
+]
+CITIES = ["AUSTIN TX", "DALLAS TX", "Houston", "SAN ANTONIO", "Round Rock", ""]
+PREFIXES = ["", "", "POS ", "SQ *", "DEBIT PURCHASE ", "TST* "]
+
+
+def reference_label(name):
+    """The stub model's rule, standing in for the label Gemini would return."""
+    return 'Need' if any(w in name.lower() for w in NEED_WORDS) else 'Want'
+
+
+def variant(name, rng):
+    text = f"{rng.choice(PREFIXES)}{name}"
+    if rng.random() < 0.5:
+        text += f" #{rng.randint(100, 9999)}"
+    city = rng.choice(CITIES)
+    if city:
+        text += f" {city}"
+    return text.upper() if rng.random() < 0.4 else text
+
+
+def make_corpus(count, names, rng):
+    out = []
+    for _ in range(count):
+        name = rng.choice(names)
+        out.append((variant(name, rng), reference_label(name)))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='25,100,500,2000,10000', help='comma-separated training corpus sizes')
+    parser.add_argument('--holdout', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=100, help='descriptions per timed predict call')
+    parser.add_argument('--min-confidence', type=float, default=LOCAL_CATEGORIZER_MIN_CONFIDENCE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    names = [m[0] for m in MERCHANTS] + EXTRA_MERCHANTS
+    rng.shuffle(names)
+    # A fifth of the merchants never appear in training, as new merchants would in production
+    unseen = set(names[:len(names) // 5])
+    seen = names[len(names) // 5:]
+    holdout = make_corpus(args.holdout, names, rng)
+
+    print(f"{len(names)} merchants ({len(unseen)} only in the held-out set), {args.holdout} held-out descriptions, "
+          f"min confidence {args.min_confidence}")
+    print(f"{'corpus':>8}{'rows':>7}{'learn (ms)':>12}{'coverage':>10}{'agreement':>11}{'unseen cov.':>13}"
+          f"{'predict p50 (ms)':>18}{'p95 (ms)':>10}")
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        model = LocalCategorizer(min_examples=1)
+        corpus = make_corpus(size, seen, rng)
+        start = time.perf_counter()
+        model.learn([d for d, _ in corpus], [label for _, label in corpus])
+        learn_ms = (time.perf_counter() - start) * 1000
+
+        predictions = model.predict([d for d, _ in holdout])
+        confident = [(p, truth, d) for (p, c), (d, truth) in zip(predictions, holdout) if p and c >= args.min_confidence]
+        coverage = len(confident) / len(holdout)
+        agreement = sum(p == truth for p, truth, _ in confident) / len(confident) if confident else 0.0
+        unseen_total = sum(1 for d, _ in holdout if any(n.lower() in d.lower() for n in unseen))
+        unseen_confident = sum(1 for _, _, d in confident if any(n.lower() in d.lower() for n in unseen))
+        unseen_cov = unseen_confident / unseen_total if unseen_total else 0.0
+
+        timings = []
+        for i in range(0, min(len(holdout), args.batch * 20), args.batch):
+            batch = [d for d, _ in holdout[i:i + args.batch]]
+            t = time.perf_counter()
+            model.predict(batch)
+            timings.append((time.perf_counter() - t) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{size:>8}{len(model):>7}{learn_ms:>12.1f}{coverage:>10.1%}{agreement:>11.1%}{unseen_cov:>13.1%}"
+              f"{statistics.median(timings):>18.2f}{p95:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Throughput / latency benchmark for every /api/* route in app.py.
+
+Upstream clients are replaced by the deterministic stand-ins in
+benchmarks/stubs.py, the app is served by a threaded werkzeug server on a
+random local port, and each route is driven at the requested concurrency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --concurrency 16 --requests 400 --gemini-latency-ms 300
+    python -m benchmarks.bench_endpoints --save-baseline       # refresh benchmarks/baseline.json
+    python -m benchmarks.bench_endpoints --cassette data/cassette.jsonl.gz --cassette-latency sampled
+
+--cassette replays Gemini and Mediastack answers recorded from the live APIs
+(CASSETTE_MODE=record, see cassette.py) instead of the stub answers; calls
+missing from the cassette take the app's fallback path.
+
+Exits with status 1 when a route regresses past --tolerance versus the baseline.
+Scenarios the baseline has no numbers for are listed as a warning.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+from benchmarks.stubs import MERCHANTS, Latency, StubGeminiClient, StubMediastackClient, StubNessieClient  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _import_body(i, rows=200):
+    """An NDJSON upload of `rows` transactions for the bulk import scenario."""
+    lines = (json.dumps({"description": f"{MERCHANTS[(i + r) % len(MERCHANTS)][0]} Store", "amount": 5 + r % 40,
+                         "date": f"2025-09-{1 + r % 28:02d}"}) for r in range(rows))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+# name -> (method, path, body factory taking the request index: a JSON-able value, or bytes sent raw)
+SCENARIOS = {
+    'onboard': ('POST', '/api/onboard', None),
+    'set-goal': ('POST', '/api/set-goal', lambda i: {"goal": 500, "budget": 3000}),
+    'analysis': ('GET', '/api/analysis', None),
+    'investment-idea': ('GET', '/api/investment-idea', None),
+    'health': ('GET', '/api/health', None),
+    'nessie-health': ('GET', '/api/nessie-health', None),
+    'seed-transactions': ('POST', '/api/seed-transactions', None),
+    'stocks-trending': ('GET', '/api/stocks-trending', None),
+    'stocks-save': ('POST', '/api/stocks/save', lambda i: {"stocks": [{"symbol": f"S{i % 50}", "name": f"Stock {i % 50}"}]}),
+    'stocks-saved': ('GET', '/api/stocks/saved', None),
+    'credit-cards': ('GET', '/api/credit-cards', None),
+    'dashboard': ('GET', '/api/dashboard', None),
+    'add-transaction': ('POST', '/api/add-transaction', lambda i: {"description": f"Coffee Shop {i % 7}", "amount": 4.5 + i % 5}),
+    'remove-transaction': ('POST', '/api/remove-transaction', lambda i: {"id": f"purchase_0_{i % 60}"}),
+    'remove-transactions': ('POST', '/api/remove-transactions', lambda i: {"ids": [f"purchase_0_{(i * 10 + k) % 60}" for k in range(10)]}),
+    'spending-rollups': ('GET', '/api/spending/rollups', None),
+    'savings-history': ('GET', '/api/savings-history', None),
+    'spending-merchants': ('GET', '/api/spending/merchants', None),
+    'recurring': ('GET', '/api/recurring', None),
+    'transactions': ('GET', '/api/transactions?limit=50', None),
+    'transactions-summary': ('GET', '/api/transactions/summary', None),
+    'transactions-import': ('POST', '/api/transactions/import?format=ndjson', _import_body),
+}
+
+
+def install_stubs(app_module, args):
+    app_module.nessie_client = StubNessieClient(
+        latency=Latency(args.nessie_latency_ms, args.jitter_ms, seed=1),
+        transactions_per_account=args.transactions)
+    app_module.gemini_client = StubGeminiClient(latency=Latency(args.gemini_latency_ms, args.jitter_ms, seed=2))
+    app_module.mediastack_client = StubMediastackClient(latency=Latency(args.mediastack_latency_ms, args.jitter_ms, seed=3))
+    # In-memory categorizer corpus, so runs do not depend on (or write) backend/data
+    from local_categorizer import LocalCategorizer
+    app_module.local_categorizer = LocalCategorizer()
+    # Analysis snapshots go to a throwaway store, not backend/data/history; main() deletes it
+    from historical_savings import HistoricalSavingsStore
+    app_module.savings_history = HistoricalSavingsStore(tempfile.mkdtemp(prefix='bench-history-'))
+    if args.cassette:
+        from cassette import Cassette, install
+        cassette = Cassette(args.cassette, mode='replay', latency=args.cassette_latency)
+        install(cassette, gemini_client=app_module.gemini_client, mediastack_client=app_module.mediastack_client)
+
+
+def reset_state(app_module, base_url):
+    """Start each route from the same state: a fresh onboarded account with a goal and saved stocks."""
+    state = app_module.user_session_state
+    state.clear()
+    state.update({"customer_id": None, "account_id": None, "savings_goal": 0, "monthly_budget": 0,
+                  "saved_stocks": [], "removed_transactions": {}})
+    app_module.state_version.bump()
+    requests.post(f"{base_url}/api/onboard", timeout=30)
+    requests.post(f"{base_url}/api/set-goal", json={"goal": 500, "budget": 3000}, timeout=30)
+    requests.post(f"{base_url}/api/stocks/save", timeout=30,
+                  json={"stocks": [{"symbol": s, "name": s} for s in ("AAPL", "MSFT", "NVDA", "AMZN")]})
+
+
+def run_scenario(base_url, method, path, body_factory, total, concurrency):
+    local = threading.local()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = body_factory(i) if body_factory else None
+        start = time.perf_counter()
+        try:
+            if isinstance(body, bytes):
+                resp = session.request(method, base_url + path, data=body, timeout=120,
+                                       headers={'Content-Type': 'application/x-ndjson'})
+            else:
+                resp = session.request(method, base_url + path, json=body, timeout=120)
+            ok = resp.status_code < 500
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2)
+    return {
+        "requests": total,
+        "errors": errors[0],
+        "throughput_rps": round(total / wall, 2) if wall > 0 else 0.0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+
+def unbaselined(results, baseline):
+    """Scenarios in this run that the baseline has no numbers for (and so cannot regress)."""
+    routes = baseline.get('routes') or {}
+    return [name for name in results if not routes.get(name)]
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against the baseline."""
+    regressions = []
+    for name, current in results.items():
+        base = (baseline.get('routes') or {}).get(name)
+        if not base:
+            continue
+        if base.get('p95_ms') and current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms > baseline {base['p95_ms']}ms")
+        if base.get('throughput_rps') and current['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['throughput_rps']}rps < baseline {base['throughput_rps']}rps")
+        if current['errors'] > base.get('errors', 0):
+            regressions.append(f"{name}: {current['errors']} errors (baseline {base.get('errors', 0)})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--routes', default='', help='comma-separated scenario names (default: all)')
+    parser.add_argument('--transactions', type=int, default=60, help='stub transactions per account')
+    parser.add_argument('--nessie-latency-ms', type=float, default=10.0)
+    parser.add_argument('--gemini-latency-ms', type=float, default=50.0)
+    parser.add_argument('--mediastack-latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.20, help='allowed relative regression')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--cassette', default='', help='replay recorded Gemini/Mediastack calls from this cassette')
+    parser.add_argument('--cassette-latency', default='recorded', choices=('off', 'recorded', 'sampled'))
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.ERROR)
+    import app as app_module
+    install_stubs(app_module, args)
+
+    api_rules = sorted({r.rule for r in app_module.app.url_map.iter_rules() if r.rule.startswith('/api/')})
+    covered = {path.split('?', 1)[0] for _m, path, _b in SCENARIOS.values()}
+    uncovered = [r for r in api_rules if r not in covered]
+    if uncovered:
+        print(f"warning: routes without a benchmark scenario: {', '.join(uncovered)}", file=sys.stderr)
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    selected = [s.strip() for s in args.routes.split(',') if s.strip()] or list(SCENARIOS)
+    results = {}
+    try:
+        for name in selected:
+            method, path, body_factory = SCENARIOS[name]
+            reset_state(app_module, base_url)
+            results[name] = run_scenario(base_url, method, path, body_factory, args.requests, args.concurrency)
+            if not args.json:
+                r = results[name]
+                print(f"{name:<20} {r['throughput_rps']:>9.1f} rps  p50 {r['p50_ms']:>8.1f}ms  "
+                      f"p95 {r['p95_ms']:>8.1f}ms  p99 {r['p99_ms']:>8.1f}ms  errors {r['errors']}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(app_module.savings_history.directory, ignore_errors=True)
+
+    params = {k: getattr(args, k) for k in ('concurrency', 'requests', 'transactions', 'nessie_latency_ms',
+                                             'gemini_latency_ms', 'mediastack_latency_ms', 'jitter_ms')}
+    if args.cassette:
+        params.update(cassette=args.cassette, cassette_latency=args.cassette_latency)
+    report = {"params": params, "python": platform.python_version(), "routes": results}
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions, missing = [], []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print("warning: baseline was recorded with different parameters; comparison is approximate", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        missing = unbaselined(results, baseline)
+        if missing:
+            print(f"warning: no baseline for {', '.join(missing)}; rerun with --save-baseline to record them",
+                  file=sys.stderr)
+
+    if args.json:
+        report['regressions'] = regressions
+        report['unbaselined'] = missing
+        print(json.dumps(report, indent=2))
+    elif regressions:
+        print("\nRegressions vs baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Completion time of the weekly fleet analysis run for a synthetic account
+population, at several worker-pool sizes, to size the run window.
+
+Nessie and Gemini are the stubs from benchmarks/stubs.py; --gemini-rpm turns
+on the per-model Gemini limiter, which then bounds the run regardless of workers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fleet
+    python -m benchmarks.bench_fleet --accounts 500 --workers 1,8,32 --gemini-latency-ms 400
+    python -m benchmarks.bench_fleet --gemini-rpm 600
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import Latency, StubGeminiClient, StubNessieClient  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--workers', default='1,4,16', help='comma-separated pool sizes to compare')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--jitter-seconds', type=float, default=0.0)
+    parser.add_argument('--transactions', type=int, default=60, help='transactions per account')
+    parser.add_argument('--nessie-latency-ms', type=float, default=10.0)
+    parser.add_argument('--gemini-latency-ms', type=float, default=50.0)
+    parser.add_argument('--gemini-rpm', type=float, default=0.0, help='per-model Gemini limit (0 = unlimited)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['HISTORY_DIR'] = os.path.join(tmp, 'history')
+        logging.disable(logging.ERROR)
+        import app as app_module
+        import gemini_client
+        from fleet import FleetRunner
+
+        nessie = StubNessieClient(latency=Latency(args.nessie_latency_ms, seed=1), transactions_per_account=args.transactions)
+        accounts = nessie.add_accounts(args.accounts)
+        app_module.nessie_client = nessie
+        app_module.gemini_client = StubGeminiClient(latency=Latency(args.gemini_latency_ms, seed=2))
+        from local_categorizer import LocalCategorizer
+        app_module.local_categorizer = LocalCategorizer()
+
+        print(f"{args.accounts} accounts, batch {args.batch_size}, jitter {args.jitter_seconds}s, "
+              f"nessie {args.nessie_latency_ms}ms, gemini {args.gemini_latency_ms}ms, "
+              f"gemini limit {args.gemini_rpm or 'none'}/min")
+        print(f"{'workers':>8}{'run (s)':>10}{'accounts/s':>12}{'failed':>8}{'est. 100k accounts':>22}")
+        for workers in [int(w) for w in args.workers.split(',') if w.strip()]:
+            gemini_client.limiters.set_rate(gemini_client.GEMINI_MODEL_NAME, args.gemini_rpm)
+            runner = FleetRunner(lambda a: app_module.analyze_spending(a), lambda: list(accounts),
+                                 workers=workers, batch_size=args.batch_size, jitter_seconds=args.jitter_seconds,
+                                 checkpoint_path=os.path.join(tmp, f"checkpoint_{workers}.json"))
+            summary = runner.run()
+            seconds = summary['duration_seconds']
+            rate = args.accounts / seconds if seconds else 0.0
+            projected = f"{100000 / rate / 3600:.1f} h" if rate else '-'
+            print(f"{workers:>8}{seconds:>10.2f}{rate:>12.1f}{len(summary['failed']):>8}{projected:>22}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
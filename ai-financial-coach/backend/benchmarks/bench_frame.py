@@ -0,0 +1,115 @@
+"""
+Speed and memory of the columnar TransactionFrame versus the previous
+dict-per-transaction analysis loop, at large row counts.
+
+Usage (from backend/):
+    python -m benchmarks.bench_frame                 # 10^6 rows
+    python -m benchmarks.bench_frame --rows 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from benchmarks.stubs import MERCHANTS, NEED_WORDS  # noqa: E402
+from transaction_frame import TransactionFrame  # noqa: E402
+
+
+def make_inputs(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [m[0] for m in MERCHANTS]
+    codes = rng.integers(0, len(names), rows)
+    cents = rng.integers(300, 25000, rows)
+    days = rng.integers(0, 365, rows)
+    base = np.datetime64('2025-01-01')
+    transactions = [
+        {'id': f"tx_{i}", 'description': names[c], 'amount': a / 100.0, 'date': str(base + int(d)), 'source': 'mock'}
+        for i, (c, a, d) in enumerate(zip(codes.tolist(), cents.tolist(), days.tolist()))
+    ]
+    need = [any(w in n.lower() for w in NEED_WORDS) for n in names]
+    labels = ['Need' if need[c] else 'Want' for c in codes.tolist()]
+    return transactions, labels
+
+
+def legacy_analysis(transactions, labels):
+    """The per-transaction dict loop analyze_spending used before the frame."""
+    categorized_transactions = []
+    for i, tx in enumerate(transactions):
+        category = labels[i] if i < len(labels) else 'Want'
+        categorized_transactions.append({
+            'id': tx.get('id'),
+            'description': tx.get('description', ''),
+            'amount': tx.get('amount', 0),
+            'category': category
+        })
+    needs_total = sum(tx['amount'] for tx in categorized_transactions if tx['category'] == 'Need')
+    wants_total = sum(tx['amount'] for tx in categorized_transactions if tx['category'] == 'Want')
+    wants = [tx for tx in categorized_transactions if tx['category'] == 'Want']
+    return needs_total, wants_total, len(wants), categorized_transactions
+
+
+def frame_analysis(transactions, labels):
+    frame = TransactionFrame.from_records(transactions)
+    frame.set_categories(labels)
+    needs_total = frame.total('Need')
+    wants_total = frame.total('Want')
+    wants = frame.indices('Want')
+    by_merchant = frame.spend_by_merchant_cents(wants)
+    return needs_total, wants_total, len(wants), by_merchant, frame
+
+
+def frame_aggregates_only(frame, labels):
+    """Aggregation cost once the data is already columnar (e.g. a cached frame)."""
+    frame.set_categories(labels)
+    return frame.total('Need'), frame.total('Want'), len(frame.indices('Want'))
+
+
+def measure(fn, *args):
+    """Time fn untraced, then run it again under tracemalloc for retained/peak memory."""
+    gc.collect()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = fn(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.rows:,} transactions...")
+    transactions, labels = make_inputs(args.rows)
+
+    legacy, legacy_s, legacy_kept, legacy_peak = measure(legacy_analysis, transactions, labels)
+    framed, frame_s, frame_kept, frame_peak = measure(frame_analysis, transactions, labels)
+    _agg, agg_s, _kept, agg_peak = measure(frame_aggregates_only, framed[4], labels)
+    _records, records_s, _kept, records_peak = measure(framed[4].to_records)
+
+    assert round(legacy[0], 2) == round(framed[0], 2) and round(legacy[1], 2) == round(framed[1], 2), 'totals differ'
+    assert legacy[2] == framed[2], 'want counts differ'
+
+    mb = lambda b: b / (1024 * 1024)
+    print(f"\n{'path':<34}{'time (s)':>10}{'peak MB':>10}{'retained MB':>13}")
+    print(f"{'legacy dict loop':<34}{legacy_s:>10.3f}{mb(legacy_peak):>10.1f}{mb(legacy_kept):>13.1f}")
+    print(f"{'frame: build + aggregate':<34}{frame_s:>10.3f}{mb(frame_peak):>10.1f}{mb(frame_kept):>13.1f}")
+    print(f"{'frame: aggregate only':<34}{agg_s:>10.3f}{mb(agg_peak):>10.1f}{'-':>13}")
+    print(f"{'frame: to_records (JSON boundary)':<34}{records_s:>10.3f}{mb(records_peak):>10.1f}{'-':>13}")
+    print(f"\nAggregation speed-up once columnar: {legacy_s / agg_s:.1f}x; "
+          f"retained memory {mb(legacy_kept):.1f} MB -> {mb(frame_kept):.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
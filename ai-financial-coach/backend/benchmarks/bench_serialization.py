@@ -0,0 +1,101 @@
+"""
+CPU time and bytes of serializing the largest API responses, per JSON
+provider and with or without a ?fields= projection.
+
+Payloads are the real /api/analysis and /api/stocks/saved bodies, built by
+the app against the stub clients for the requested history / watchlist
+sizes. Each combination is encoded through the provider's response(), as
+jsonify does in a request. Reported per payload:
+
+    serializer  json (the standard library, as Flask's default provider) or orjson
+    fields      the projection applied, or "all"
+    p50 / p95   time to build the response body
+    bytes       body size before gzip
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --transactions 100,1000,10000 --saved 50
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g  # noqa: E402
+
+from benchmarks.stubs import Latency, StubGeminiClient, StubMediastackClient, StubNessieClient  # noqa: E402
+from serialization import FastJSONProvider, orjson, parse_fields  # noqa: E402
+
+PROJECTIONS = {
+    'analysis': ('needsTotal,wantsTotal,totalSpending,recommendation',
+                 'needsTotal,wantsTotal,categorizedTransactions.id,categorizedTransactions.amount,'
+                 'categorizedTransactions.category'),
+    'stocks-saved': ('ratings.symbol,ratings.verdict',),
+}
+
+
+def build_payloads(app_module, transactions, saved):
+    app_module.nessie_client = StubNessieClient(latency=Latency(0, 0, seed=1), transactions_per_account=transactions)
+    app_module.gemini_client = StubGeminiClient(latency=Latency(0, 0, seed=2))
+    app_module.mediastack_client = StubMediastackClient(latency=Latency(0, 0, seed=3))
+    from local_categorizer import LocalCategorizer
+    app_module.local_categorizer = LocalCategorizer()
+    state = app_module.user_session_state
+    state.update(account_id=f"bench-{transactions}", savings_goal=500, monthly_budget=3000,
+                 saved_stocks=[{'symbol': f"S{i}", 'name': f"Stock {i}"} for i in range(saved)])
+    return {
+        'analysis': app_module.analyze_spending(),
+        'stocks-saved': app_module._saved_stocks_payload(),
+    }
+
+
+def time_response(app, provider, payload, fields, rounds):
+    timings = []
+    with app.test_request_context():
+        g.json_fields = parse_fields(fields) if fields else None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            body = provider.response(payload).get_data()
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))], len(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', default='100,1000,10000', help='comma-separated history sizes')
+    parser.add_argument('--saved', type=int, default=50, help='saved stocks on the watchlist')
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.ERROR)
+    import app as app_module
+    app = app_module.app
+    providers = [('json', FastJSONProvider(app, use_orjson=False))]
+    if orjson is not None:
+        providers.append(('orjson', FastJSONProvider(app, use_orjson=True)))
+    else:
+        print("orjson is not installed; only the standard library provider is measured", file=sys.stderr)
+
+    print(f"{'payload':<14}{'rows':>7}  {'serializer':<11}{'fields':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'bytes':>11}")
+    for size in [int(s) for s in args.transactions.split(',') if s.strip()]:
+        payloads = build_payloads(app_module, size, args.saved)
+        for name, payload in payloads.items():
+            rows = len(payload.get('categorizedTransactions') or payload.get('ratings') or [])
+            for label, provider in providers:
+                for i, fields in enumerate((None,) + PROJECTIONS[name]):
+                    p50, p95, size_bytes = time_response(app, provider, payload, fields, args.rounds)
+                    print(f"{name:<14}{rows:>7}  {label:<11}{'all' if fields is None else f'set {i}':<10}"
+                          f"{p50:>10.3f}{p95:>10.3f}{size_bytes:>11}")
+    for name, sets in PROJECTIONS.items():
+        for i, fields in enumerate(sets, 1):
+            print(f"{name} set {i}: ?fields={fields}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
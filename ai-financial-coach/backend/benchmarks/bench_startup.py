@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark: time to import app.py and serve the first request.
+
+Each run is a fresh interpreter. "lazy" is the normal startup path; "eager"
+additionally constructs all three clients and imports google.generativeai and
+APScheduler up front, reproducing what importing app.py used to cost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time, warnings
+warnings.simplefilter('ignore')
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+if sys.argv[1] == 'eager':
+    import google.generativeai
+    import apscheduler.schedulers.background
+    app.nessie_client.api_key, app.gemini_client.api_key, app.mediastack_client.api_key
+t2 = time.perf_counter()
+status = app.app.test_client().get('/api/health').status_code
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_request_s": t3 - t0, "status": status}))
+"""
+
+
+def run_child(mode):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD, mode], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    data = json.loads(out.stdout.strip().splitlines()[-1])
+    data['process_s'] = wall
+    return data
+
+
+def import_breakdown(top):
+    """Parse `python -X importtime` output into the slowest direct imports of app.py."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', 'import app'],
+                         cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_part, cumulative_us, name = line.split('|', 2)
+        self_us = self_part.split(':', 1)[1]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    # importtime prints children before their parent, so app's direct imports are the
+    # depth-1 rows between the previous top-level module and app itself
+    app_index = max(i for i, r in enumerate(rows) if r[0] == 0 and r[1] == 'app')
+    direct = []
+    for depth, name, self_us, cumulative_us in reversed(rows[:app_index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((depth, name, self_us, cumulative_us))
+    total = rows[app_index][3]
+    direct.sort(key=lambda r: r[3], reverse=True)
+    return total, direct[:top]
+
+
+def summarize(samples, key):
+    values = sorted(s[key] for s in samples)
+    return statistics.median(values) * 1000, values[0] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12, help='rows in the import-time breakdown')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mode in ('lazy', 'eager'):
+        samples = [run_child(mode) for _ in range(args.runs)]
+        results[mode] = {key: summarize(samples, key) for key in ('import_s', 'first_request_s', 'process_s')}
+
+    print(f"{'mode':<8}{'import app (ms)':>18}{'first request (ms)':>22}{'process wall (ms)':>21}   median / best of {args.runs}")
+    for mode, r in results.items():
+        cells = [f"{r[k][0]:>8.1f} / {r[k][1]:<7.1f}" for k in ('import_s', 'first_request_s', 'process_s')]
+        print(f"{mode:<8}{cells[0]:>18}{cells[1]:>22}{cells[2]:>21}")
+    saved = results['eager']['first_request_s'][0] - results['lazy']['first_request_s'][0]
+    print(f"\nLazy startup saves {saved:.1f} ms before the first request is served.\n")
+
+    total, direct = import_breakdown(args.top)
+    print(f"Import-time breakdown of app.py (total {total / 1000:.1f} ms, direct imports by cumulative time):")
+    for _depth, name, self_us, cumulative_us in direct:
+        print(f"  {name:<32}{cumulative_us / 1000:>9.1f} ms  (self {self_us / 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Deterministic in-process stand-ins for the Nessie, Gemini and Mediastack
+clients, with tunable latency.
+
+The stubs subclass the real clients and only replace the network boundary
+(NessieClient._request, GeminiClient.model, MediastackClient.get_top_headline),
+so request building, response parsing and fallbacks still run the real code.
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from gemini_client import GeminiClient
+from mediastack_client import MediastackClient
+from metrics import upstream_span
+from nessie_client import NessieClient
+
+
+class Latency:
+    """Gaussian latency model: mean_ms +/- jitter_ms, never negative."""
+
+    def __init__(self, mean_ms=0.0, jitter_ms=0.0, seed=0):
+        self.mean_ms = float(mean_ms)
+        self.jitter_ms = float(jitter_ms)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        if self.jitter_ms <= 0:
+            return self.mean_ms / 1000.0
+        with self._lock:
+            value = self._rng.gauss(self.mean_ms, self.jitter_ms)
+        return max(0.0, value) / 1000.0
+
+    def wait(self):
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+
+MERCHANTS = [
+    ("HEB Grocery", 30, 250), ("Starbucks", 3, 25), ("Shell Gas", 25, 120), ("Austin Energy", 80, 300),
+    ("Target", 10, 160), ("Netflix", 8, 20), ("Whole Foods", 30, 250), ("Chipotle", 10, 40),
+    ("AT&T", 60, 200), ("AMC Theaters", 10, 60), ("CVS Pharmacy", 5, 90), ("Uber", 8, 60),
+    ("Walmart", 10, 160), ("Spotify", 8, 20), ("Costco", 30, 250), ("McDonald's", 3, 25),
+    ("Amazon", 8, 120), ("Trader Joe's", 30, 200), ("Chevron", 25, 120), ("Zara", 20, 160),
+]
+
+
+def make_transactions(count, seed=0):
+    """Build a deterministic list of raw purchase dicts."""
+    rng = random.Random(seed)
+    base = datetime(2025, 10, 1)
+    out = []
+    for i in range(count):
+        name, low, high = MERCHANTS[rng.randrange(len(MERCHANTS))]
+        out.append({
+            "_id": f"purchase_{seed}_{i}",
+            "description": name + (" Store" if rng.random() < 0.3 else ""),
+            "amount": round(rng.uniform(low, high), 2),
+            "purchase_date": (base - timedelta(days=rng.randint(0, 90))).strftime('%Y-%m-%d'),
+        })
+    return out
+
+
+class StubResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.content = json.dumps(payload).encode('utf-8') if payload is not None else b''
+
+    def json(self):
+        return self._payload
+
+
+class StubNessieClient(NessieClient):
+    """NessieClient whose HTTP layer is an in-memory fake of the Nessie API."""
+
+    def __init__(self, latency=None, transactions_per_account=60, seed=0):
+        super().__init__()
+        self.api_key = 'stub'
+        self.latency = latency or Latency()
+        self.transactions_per_account = transactions_per_account
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._purchases = {}
+        self._accounts = []
+        self._counter = 0
+
+    def _next_id(self, prefix):
+        with self._lock:
+            self._counter += 1
+            return f"{prefix}_{self._counter}"
+
+    def add_accounts(self, count):
+        """Register `count` more accounts (for fleet benchmarks); returns their ids."""
+        ids = [self._next_id('account') for _ in range(count)]
+        with self._lock:
+            self._accounts.extend(ids)
+        return ids
+
+    def _account_purchases(self, account_id):
+        with self._lock:
+            if account_id not in self._purchases:
+                self._purchases[account_id] = make_transactions(self.transactions_per_account, seed=self.seed)
+            return self._purchases[account_id]
+
+    def _request(self, method, path, operation, **kwargs):
+        with upstream_span('nessie', operation):
+            self.latency.wait()
+            return self._handle(method, path.split('?', 1)[0], kwargs.get('json'))
+
+    def _handle(self, method, path, body):
+        if path == '/customers':
+            if method == 'GET':
+                return StubResponse(200, [])
+            return StubResponse(201, {"objectCreated": {"_id": self._next_id('customer')}})
+        if path == '/merchants':
+            return StubResponse(200, [{"_id": f"merchant_{i}"} for i in range(10)])
+        if path == '/accounts' and method == 'GET':
+            with self._lock:
+                return StubResponse(200, [{"_id": a, "type": "Checking"} for a in self._accounts])
+        match = re.match(r'^/customers/[^/]+/accounts$', path)
+        if match and method == 'POST':
+            account_id = self._next_id('account')
+            with self._lock:
+                self._accounts.append(account_id)
+            return StubResponse(201, {"objectCreated": {"_id": account_id}})
+        match = re.match(r'^/accounts/([^/]+)/purchases(?:/([^/]+))?$', path)
+        if match:
+            account_id, purchase_id = match.groups()
+            purchases = self._account_purchases(account_id)
+            if method == 'GET':
+                return StubResponse(200, list(purchases))
+            if method == 'POST':
+                created = dict(body or {})
+                created['_id'] = self._next_id('purchase')
+                with self._lock:
+                    purchases.append(created)
+                return StubResponse(201, {"objectCreated": created})
+            if method == 'DELETE':
+                with self._lock:
+                    before = len(purchases)
+                    purchases[:] = [p for p in purchases if p.get('_id') != purchase_id]
+                return StubResponse(204 if len(purchases) < before else 404)
+        return StubResponse(404)
+
+
+class StubGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+NEED_WORDS = ('grocery', 'heb', 'whole foods', 'costco', 'trader', 'gas', 'shell', 'chevron',
+              'energy', 'at&t', 'pharmacy', 'rent', 'insurance', 'walmart')
+
+TRENDING_POOL = ["AAPL", "MSFT", "NVDA", "GOOGL", "AMZN", "META", "TSLA", "AMD", "NFLX", "CRM", "ORCL", "INTC"]
+
+
+class StubModel:
+    """Stand-in for genai.GenerativeModel that answers each known prompt deterministically."""
+
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+        self._lock = threading.Lock()
+        self._trending_calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.latency.wait()
+        return StubGeminiResponse(self._answer(prompt))
+
+    @staticmethod
+    def _json_after(prompt, marker):
+        idx = prompt.find(marker)
+        if idx < 0:
+            return []
+        try:
+            return json.JSONDecoder().raw_decode(prompt[idx + len(marker):].lstrip())[0]
+        except ValueError:
+            return []
+
+    def _answer(self, prompt):
+        if 'categorize a list of bank transaction' in prompt:
+            items = self._json_after(prompt, 'Here is the list of transactions to categorize:')
+            labels = ['Need' if any(w in str(d).lower() for w in NEED_WORDS) else 'Want' for d in items]
+            return json.dumps({"transactions": labels})
+        if 'financial coach' in prompt:
+            return json.dumps({
+                "top_categories": ["coffee", "dining"],
+                "suggestion": "Make coffee at home three days this week.",
+                "reason": "Small daily purchases add up quickly.",
+            })
+        if 'financial educator' in prompt:
+            return json.dumps({"title": "Index funds", "explanation": "An index fund bundles many stocks."})
+        if 'market news summarizer' in prompt:
+            with self._lock:
+                offset = self._trending_calls
+                self._trending_calls += 1
+            pick = [TRENDING_POOL[(offset * 6 + i) % len(TRENDING_POOL)] for i in range(6)]
+            item = lambda s: {"symbol": s, "name": f"{s} Inc.", "reason": "Stub rationale."}
+            return json.dumps({"buys": [item(s) for s in pick[:3]], "sells": [item(s) for s in pick[3:]],
+                               "disclaimer": "Stub data."})
+        if 'objective market summarizer' in prompt:
+            stocks = self._json_after(prompt, 'Stocks:')
+            return json.dumps({"ratings": [{"symbol": s.get('symbol'), "name": s.get('name'), "verdict": "hold",
+                                            "reason": "Stub rating."} for s in stocks]})
+        if 'neutral, factual copywriter' in prompt:
+            cards = self._json_after(prompt, 'Cards:')
+            return json.dumps({"reasons": [f"Stub reason for {c.get('name')}." for c in cards]})
+        return '{}'
+
+
+class StubGeminiClient(GeminiClient):
+    """GeminiClient backed by StubModel instead of the Gemini API."""
+
+    def __init__(self, latency=None):
+        super().__init__()
+        self.api_key = 'stub'
+        self.model = StubModel(latency)
+
+
+class StubMediastackClient(MediastackClient):
+    """MediastackClient that returns a canned headline per query."""
+
+    def __init__(self, latency=None):
+        super().__init__()
+        self.api_key = 'stub'
+        self.latency = latency or Latency()
+
+    def get_top_headline(self, query: str):
+        with upstream_span('mediastack', 'news'):
+            self.latency.wait()
+            return f"{query} shares move on sector news"
@@ -0,0 +1,218 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+
+# Reward categories a spending profile is bucketed into; 'other' earns the base rate
+REWARD_CATEGORIES = ('grocery', 'dining', 'gas', 'travel', 'streaming', 'entertainment', 'online', 'utilities', 'other')
+_CATEGORY_INDEX = {c: i for i, c in enumerate(REWARD_CATEGORIES)}
+
+# Keyword rules mapping a transaction description to a reward category (first match wins)
+CATEGORY_KEYWORDS = (
+    ('streaming', ('netflix', 'spotify', 'hulu', 'disney', 'hbo', 'youtube', 'apple music', 'paramount', 'peacock')),
+    ('grocery', ('grocery', 'heb', 'whole foods', 'trader joe', 'costco', 'kroger', 'safeway', 'aldi', 'publix', 'supermarket', 'market')),
+    ('dining', ('starbucks', 'chipotle', 'mcdonald', 'restaurant', 'cafe', 'coffee', 'pizza', 'burger', 'taco', 'doordash', 'grubhub', 'dining')),
+    ('gas', ('shell', 'chevron', 'exxon', 'mobil', 'valero', 'bp ', 'fuel', 'gas')),
+    ('travel', ('uber', 'lyft', 'airline', 'delta', 'united', 'southwest', 'hotel', 'airbnb', 'marriott', 'hilton', 'travel')),
+    ('entertainment', ('amc', 'theater', 'theatre', 'cinema', 'ticketmaster', 'concert', 'bowling')),
+    ('online', ('amazon', 'ebay', 'etsy', 'online', '.com')),
+    ('utilities', ('energy', 'electric', 'water', 'utility', 'at&t', 'verizon', 't-mobile', 'comcast', 'internet')),
+)
+
+# Card catalog; rates are cash-back fractions per reward category, anything unlisted earns 'base'.
+# 'adaptive' cards earn an extra bonus on the user's single largest eligible category, up to a
+# monthly cap; Discover's rotating quarters are approximated the same way.
+DEFAULT_CARDS = (
+    {
+        "name": "Blue Cash Everyday",
+        "issuer": "American Express",
+        "rewards": ["3% back at U.S. supermarkets", "3% back on U.S. gas", "1% back other"],
+        "why": "Strong everyday categories for groceries and gas.",
+        "suitability": 82,
+        "base": 0.01,
+        "rates": {"grocery": 0.03, "gas": 0.03, "online": 0.03},
+    },
+    {
+        "name": "SavorOne",
+        "issuer": "Capital One",
+        "rewards": ["3% back dining", "3% back entertainment", "3% back popular streaming", "3% at grocery stores"],
+        "why": "Well-rounded dining, entertainment, streaming, and grocery rewards.",
+        "suitability": 80,
+        "base": 0.01,
+        "rates": {"dining": 0.03, "entertainment": 0.03, "streaming": 0.03, "grocery": 0.03},
+    },
+    {
+        "name": "Citi Custom Cash",
+        "issuer": "Citi",
+        "rewards": ["5% back on top eligible category (up to cap)", "1% back other"],
+        "why": "Automatically adapts to your highest monthly category.",
+        "suitability": 79,
+        "base": 0.01,
+        "rates": {},
+        "adaptive": {"bonus": 0.04, "cap": 500, "eligible": ["dining", "gas", "grocery", "travel", "streaming", "entertainment"]},
+    },
+    {
+        "name": "Discover it Cash Back",
+        "issuer": "Discover",
+        "rewards": ["5% rotating categories (activation)", "1% back other"],
+        "why": "Quarterly rotating 5% categories can align with your spend.",
+        "suitability": 75,
+        "base": 0.01,
+        "rates": {},
+        "adaptive": {"bonus": 0.04, "cap": 500, "eligible": ["grocery", "gas", "online", "dining"]},
+    },
+)
+
+DISCLAIMER = "General information only. Rewards vary by issuer and terms; always verify current offers. Not financial advice."
+
+# Best effective rate any card could reach; suitability is the card's effective rate against it
+MAX_EFFECTIVE_RATE = 0.05
+
+
+@lru_cache(maxsize=8192)
+def reward_category(description):
+    """Reward category index for a raw description."""
+    text = (description or '').lower() + ' '
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(k in text for k in keywords):
+            return _CATEGORY_INDEX[category]
+    return _CATEGORY_INDEX['other']
+
+
+def spend_vector(frame, rows=None):
+    """Spending per reward category in cents for a TransactionFrame (optionally some rows)."""
+    if not len(frame):
+        return np.zeros(len(REWARD_CATEGORIES), dtype=np.int64)
+    # Classify each distinct description once, then broadcast through the merchant codes
+    per_entry = np.fromiter((reward_category(m) for m in frame.merchants), dtype=np.int64, count=len(frame.merchants))
+    codes = frame.merchant_codes if rows is None else frame.merchant_codes[rows]
+    cents = frame.amount_cents if rows is None else frame.amount_cents[rows]
+    sums = np.bincount(per_entry[codes], weights=cents, minlength=len(REWARD_CATEGORIES))
+    return np.rint(sums).astype(np.int64)
+
+
+class CardScoringEngine:
+    """
+    Deterministic local credit-card ranking.
+
+    Cards are rows of a (cards x reward categories) rate matrix, so scoring a
+    spending profile is one matrix-vector product plus the capped bonus for
+    adaptive cards. Rankings are cached under a fingerprint of the profile.
+    """
+
+    def __init__(self, cards=DEFAULT_CARDS, cache_size=256):
+        self._lock = threading.Lock()
+        self._cards = []
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        for card in cards:
+            self._cards.append(dict(card))
+        self._build()
+
+    def add_card(self, card):
+        """Register another card; rates keys must be names from REWARD_CATEGORIES."""
+        unknown = set(card.get('rates', {})) - set(REWARD_CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown reward categories: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._cards.append(dict(card))
+            self._build()
+
+    @property
+    def cards(self):
+        return list(self._cards)
+
+    def _build(self):
+        n, c = len(self._cards), len(REWARD_CATEGORIES)
+        rates = np.zeros((n, c))
+        bonus = np.zeros(n)
+        caps = np.zeros(n)
+        eligible = np.zeros((n, c), dtype=bool)
+        for i, card in enumerate(self._cards):
+            rates[i, :] = card.get('base', 0.01)
+            for category, rate in card.get('rates', {}).items():
+                rates[i, _CATEGORY_INDEX[category]] = rate
+            adaptive = card.get('adaptive')
+            if adaptive:
+                bonus[i] = adaptive.get('bonus', 0)
+                caps[i] = adaptive.get('cap', 0) * 100
+                eligible[i, [_CATEGORY_INDEX[e] for e in adaptive.get('eligible', [])]] = True
+        self._rates, self._bonus, self._caps, self._eligible = rates, bonus, caps, eligible
+        self._version = hashlib.sha1(repr(self._cards).encode('utf-8')).hexdigest()[:12]
+        self._cache.clear()
+
+    def fingerprint(self, spend_cents):
+        # Whole dollars: cent-level noise should not defeat the cache
+        dollars = np.rint(np.asarray(spend_cents) / 100.0).astype(np.int64)
+        return self._version + ':' + hashlib.sha1(dollars.tobytes()).hexdigest()[:16]
+
+    def score(self, spend_cents):
+        """Estimated rewards in cents for every card, in catalog order."""
+        spend = np.asarray(spend_cents, dtype=float)
+        rewards = self._rates @ spend
+        if self._bonus.any():
+            best_eligible = np.where(self._eligible, spend, 0.0).max(axis=1)
+            rewards += self._bonus * np.minimum(best_eligible, self._caps)
+        return rewards
+
+    def recommend(self, spend_cents, top_n=4):
+        """Ranked card dicts (name, issuer, rewards, why, suitability, categoriesMatched, estimatedRewards)."""
+        key = (self.fingerprint(spend_cents), top_n)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return [dict(card) for card in cached]
+
+        spend = np.asarray(spend_cents, dtype=float)
+        total = spend.sum()
+        rewards = self.score(spend)
+        if total > 0:
+            order = np.argsort(-rewards, kind='stable')[:top_n]
+        else:
+            # Nothing to score yet: keep the catalog's own ordering
+            order = np.argsort([-card.get('suitability', 0) for card in self._cards], kind='stable')[:top_n]
+
+        ranked = []
+        for i in order.tolist():
+            card = self._cards[i]
+            if total > 0:
+                effective = rewards[i] / total
+                suitability = int(min(100, round(effective / MAX_EFFECTIVE_RATE * 100)))
+                boosted = (self._rates[i] > card.get('base', 0.01)) | self._eligible[i]
+                matched = [REWARD_CATEGORIES[c] for c in np.argsort(-spend).tolist() if boosted[c] and spend[c] > 0]
+                why = self._why(rewards[i], total, effective, matched)
+            else:
+                suitability = card.get('suitability', 0)
+                matched = list(card.get('rates', {})) or list(card.get('adaptive', {}).get('eligible', []))
+                why = card.get('why', '')
+            ranked.append({
+                "name": card['name'],
+                "issuer": card['issuer'],
+                "rewards": list(card.get('rewards', [])),
+                "why": why,
+                "suitability": suitability,
+                "categoriesMatched": matched,
+                "estimatedRewards": round(float(rewards[i]) / 100.0, 2),
+            })
+
+        with self._lock:
+            self._cache[key] = ranked
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return [dict(card) for card in ranked]
+
+    @staticmethod
+    def _why(reward_cents, total_cents, effective, matched):
+        where = f", mostly from {', '.join(matched[:2])}" if matched else ''
+        return (f"Would earn about ${reward_cents / 100.0:.2f} on your ${total_cents / 100.0:.2f} "
+                f"of tracked spending ({effective:.1%} back){where}.")
+
+
+def profile_dict(spend_cents):
+    """{category: dollars} for the non-zero categories of a spend vector."""
+    return {REWARD_CATEGORIES[i]: int(c) / 100.0 for i, c in enumerate(np.asarray(spend_cents).tolist()) if c}
@@ -0,0 +1,247 @@
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+from config import load_env
+from metrics import registry, upstream_span
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# off | record | replay
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off').strip().lower()
+CASSETTE_PATH = os.getenv(
+    'CASSETTE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cassette.jsonl.gz'),
+)
+# Replay latency: off (return immediately) | recorded (sleep each entry's own latency)
+# | sampled (sleep a random latency drawn from everything recorded for that service)
+CASSETTE_LATENCY = os.getenv('CASSETTE_LATENCY', 'off').strip().lower()
+# Entries buffered in memory before a record-mode flush to disk
+CASSETTE_FLUSH_EVERY = int(os.getenv('CASSETTE_FLUSH_EVERY', '32'))
+
+# Prompt lines that only exist to vary the model's answer (trending stocks put a time-based
+# "Seed: ..." in every prompt); they are masked in the request key so a replay matches the
+# recording whatever values it was made with
+VOLATILE_PROMPT_LINES = re.compile(r'^Seed: .*$', re.MULTILINE)
+
+MODES = ('off', 'record', 'replay')
+LATENCY_MODES = ('off', 'recorded', 'sampled')
+
+CASSETTE_CALLS = registry.counter(
+    'cassette_calls_total', 'Upstream calls recorded to or replayed from the cassette', ('service', 'outcome'))
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a request."""
+
+
+def request_key(service, request):
+    """Stable key of one upstream request (any JSON-serializable description of it)."""
+    if isinstance(request, dict) and isinstance(request.get('prompt'), str):
+        request = dict(request, prompt=VOLATILE_PROMPT_LINES.sub('Seed: *', request['prompt']))
+    raw = json.dumps([service, request], sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded upstream interactions, stored as gzip-compressed JSON lines.
+
+    Each entry is {service, key, request, response, ms}. In record mode new
+    entries are buffered and appended to the file as an extra gzip member, so
+    an interrupted recording keeps everything flushed so far. In replay mode
+    a request returns its recorded responses in order (cycling when a key
+    was recorded fewer times than it is replayed), so a replay is
+    deterministic for the same sequence of requests.
+    """
+
+    def __init__(self, path=CASSETTE_PATH, mode=CASSETTE_MODE, latency=CASSETTE_LATENCY,
+                 flush_every=CASSETTE_FLUSH_EVERY, seed=0, sleep=time.sleep):
+        if mode not in MODES:
+            raise ValueError(f"CASSETTE_MODE must be one of {', '.join(MODES)}")
+        if latency not in LATENCY_MODES:
+            raise ValueError(f"CASSETTE_LATENCY must be one of {', '.join(LATENCY_MODES)}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.flush_every = max(1, flush_every)
+        self._sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pending = []
+        # key -> [entry, ...] in recorded order, and the replay position per key
+        self._entries = {}
+        self._cursor = {}
+        # service -> every recorded latency in seconds, for sampled replay
+        self._latencies = {}
+        if mode == 'replay':
+            self._load()
+        elif mode == 'record':
+            atexit.register(self.flush)
+
+    @property
+    def recording(self):
+        return self.mode == 'record'
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _load(self):
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self._index(json.loads(line))
+        except FileNotFoundError:
+            logger.warning(f"Cassette {self.path} not found; every replayed call will miss")
+        except (OSError, EOFError, ValueError) as e:
+            # A truncated final member (recording killed mid-flush) still leaves the earlier entries
+            logger.warning(f"Cassette {self.path} partially read: {e}")
+        logger.info(f"Loaded {len(self)} cassette entries from {self.path}")
+
+    def _index(self, entry):
+        # Keyed afresh rather than by the stored key, so cassettes recorded before a change to
+        # request_key (such as masking seeds) still replay
+        key = request_key(entry['service'], entry['request']) if 'request' in entry else entry['key']
+        self._entries.setdefault(key, []).append(entry)
+        if entry.get('ms') is not None:
+            self._latencies.setdefault(entry['service'], []).append(entry['ms'] / 1000.0)
+
+    def record(self, service, request, response, seconds):
+        entry = {
+            "service": service,
+            "key": request_key(service, request),
+            "request": request,
+            "response": response,
+            "ms": round(seconds * 1000.0, 1),
+        }
+        with self._lock:
+            self._index(entry)
+            self._pending.append(entry)
+            full = len(self._pending) >= self.flush_every
+        CASSETTE_CALLS.inc(service=service, outcome='recorded')
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                for entry in pending:
+                    f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def replay(self, service, request):
+        """The next recorded response for the request; raises CassetteMiss if it was never recorded."""
+        key = request_key(service, request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                CASSETTE_CALLS.inc(service=service, outcome='miss')
+                raise CassetteMiss(f"No recorded {service} response for this request")
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+            entry = entries[position % len(entries)]
+            delay = self._replay_delay(service, entry)
+        CASSETTE_CALLS.inc(service=service, outcome='replayed')
+        if delay:
+            self._sleep(delay)
+        return entry['response']
+
+    def _replay_delay(self, service, entry):
+        if self.latency == 'recorded':
+            return (entry.get('ms') or 0) / 1000.0
+        if self.latency == 'sampled':
+            observed = self._latencies.get(service)
+            return self._rng.choice(observed) if observed else 0.0
+        return 0.0
+
+
+class CassetteResponse:
+    """Replayed generate_content result; exposes .text like the SDK response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CassetteModel:
+    """
+    genai.GenerativeModel stand-in that records or replays generate_content.
+
+    Recording passes the call through to the wrapped model and stores the
+    prompt, the response text and the call latency.
+    """
+
+    def __init__(self, cassette, model=None):
+        self.cassette = cassette
+        self.model = model
+
+    def generate_content(self, prompt, **kwargs):
+        request = {"prompt": prompt, "kwargs": kwargs} if kwargs else {"prompt": prompt}
+        if self.cassette.replaying:
+            return CassetteResponse(self.cassette.replay('gemini', request))
+        start = time.perf_counter()
+        response = self.model.generate_content(prompt, **kwargs)
+        self.cassette.record('gemini', request, response.text, time.perf_counter() - start)
+        return response
+
+
+def install(cassette, gemini_client=None, mediastack_client=None):
+    """Route the clients' upstream calls through the cassette (no-op when it is off)."""
+    if cassette.mode == 'off':
+        return
+    if gemini_client is not None:
+        # Replay must not touch the SDK, so the real model is only built when recording
+        model = None if cassette.replaying else gemini_client.model
+        gemini_client.model = CassetteModel(cassette, model)
+        if cassette.replaying and not gemini_client.api_key:
+            gemini_client.api_key = 'cassette'
+    if mediastack_client is not None:
+        live = mediastack_client.get_top_headline
+
+        def get_top_headline(query):
+            request = {"query": query}
+            if cassette.replaying:
+                with upstream_span('mediastack', 'news'):
+                    try:
+                        return cassette.replay('mediastack', request)
+                    except CassetteMiss:
+                        return None
+            start = time.perf_counter()
+            headline = live(query)
+            cassette.record('mediastack', request, headline, time.perf_counter() - start)
+            return headline
+
+        mediastack_client.get_top_headline = get_top_headline
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cassette():
+    """The process-wide cassette configured by CASSETTE_MODE / CASSETTE_PATH."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Cassette()
+    return _default
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+import time
+
+from config import load_env
+from merchants import directory as merchant_directory
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+CATEGORIZE_BATCH_SIZE = int(os.getenv('CATEGORIZE_BATCH_SIZE', '100'))
+# How long the queue waits for a batch to fill before categorizing what it has
+CATEGORIZE_FLUSH_SECONDS = float(os.getenv('CATEGORIZE_FLUSH_SECONDS', '2'))
+
+LABELS = ('Need', 'Want')
+
+
+def aligned_labels(result, count):
+    """
+    The labels of a categorize() result, or None unless there is exactly one
+    Need/Want label per description sent.
+
+    A short, long or otherwise malformed answer cannot be matched back to its
+    descriptions, so none of it is used (or learned from).
+    """
+    labels = (result or {}).get('transactions') if isinstance(result, dict) else None
+    if not isinstance(labels, list) or len(labels) != count or any(label not in LABELS for label in labels):
+        return None
+    return labels
+
+
+class CategoryCache:
+    """Need/Want label per canonical merchant ID, shared by analysis and imports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, merchant_id):
+        return merchant_id in self._labels
+
+    def get_many(self, merchant_ids):
+        labels = self._labels
+        return {m: labels[m] for m in merchant_ids if m in labels}
+
+    def put_many(self, pairs):
+        """Store (merchant_id, label) pairs; anything but Need/Want is ignored."""
+        stored = 0
+        with self._lock:
+            for merchant_id, label in pairs:
+                if label in LABELS:
+                    self._labels[merchant_id] = label
+                    stored += 1
+        return stored
+
+
+class CategorizationQueue:
+    """
+    Background, batched categorization of merchant descriptions.
+
+    submit() only records merchants that are neither cached nor already
+    pending; a worker thread sends them to `categorize` (a callable taking a
+    list of descriptions and returning {"transactions": [labels]}) in batches
+    of up to batch_size, so one bulk import costs a handful of model calls.
+    on_labelled(descriptions, labels), if given, sees every batch the model labelled.
+    """
+
+    def __init__(self, categorize, cache, batch_size=CATEGORIZE_BATCH_SIZE, flush_seconds=CATEGORIZE_FLUSH_SECONDS,
+                 on_labelled=None):
+        self._categorize = categorize
+        self._cache = cache
+        self._on_labelled = on_labelled
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._cond = threading.Condition()
+        # merchant_id -> representative description, in submission order
+        self._pending = {}
+        self._in_flight = 0
+        self._worker = None
+
+    @property
+    def pending(self):
+        return len(self._pending) + self._in_flight
+
+    def submit(self, descriptions):
+        """Queue descriptions for categorization; returns how many new merchants were queued."""
+        queued = 0
+        with self._cond:
+            for description in descriptions:
+                merchant_id = merchant_directory.id_for(description)
+                if merchant_id in self._pending or merchant_id in self._cache:
+                    continue
+                self._pending[merchant_id] = description
+                queued += 1
+            if queued:
+                self._ensure_worker()
+                self._cond.notify_all()
+        return queued
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='categorization-queue', daemon=True)
+            self._worker.start()
+
+    def _take_batch(self):
+        with self._cond:
+            deadline = time.monotonic() + self.flush_seconds
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            ids = list(self._pending)[:self.batch_size]
+            batch = [(m, self._pending.pop(m)) for m in ids]
+            self._in_flight = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            batch = self._take_batch()
+            try:
+                result = self._categorize([description for _, description in batch])
+                labels = aligned_labels(result, len(batch))
+                if labels is None:
+                    logger.warning(f"Categorization batch of {len(batch)} merchants got an unusable answer; skipped")
+                    continue
+                self._cache.put_many((m, label) for (m, _), label in zip(batch, labels))
+                if self._on_labelled:
+                    self._on_labelled([description for _, description in batch], labels)
+            except Exception as e:
+                logger.error(f"Error in categorization batch: {e}")
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def drain(self, timeout=None):
+        """Block until everything submitted so far has been attempted; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
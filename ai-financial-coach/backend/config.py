@@ -0,0 +1,22 @@
+import threading
+
+from dotenv import load_dotenv
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env():
+    """
+    Load backend/.env into the process environment once.
+
+    Every module calls this before reading os.getenv; only the first call
+    searches for and parses the .env file.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
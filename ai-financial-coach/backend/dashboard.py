@@ -0,0 +1,121 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from config import load_env
+from deadline import current as current_deadline, scope as deadline_scope
+from metrics import registry
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# Time each /api/dashboard section may take, e.g. "analysis=12,cards=4,trending=10,saved=8";
+# sections not listed get DASHBOARD_SECTION_TIMEOUT_SECONDS
+DASHBOARD_SECTION_TIMEOUT_SECONDS = float(os.getenv('DASHBOARD_SECTION_TIMEOUT_SECONDS', '10'))
+DASHBOARD_SECTION_TIMEOUTS = os.getenv('DASHBOARD_SECTION_TIMEOUTS', 'analysis=12,cards=4,trending=10,saved=8')
+# Sections of concurrent dashboard requests share this pool (separate from the deadline pool the
+# sections' own upstream calls run on)
+DASHBOARD_WORKERS = int(os.getenv('DASHBOARD_WORKERS', '16'))
+
+SECTION_SECONDS = registry.histogram(
+    'dashboard_section_seconds', 'Time until each dashboard section finished or was given up on', ('section',))
+SECTION_FAILURES = registry.counter(
+    'dashboard_section_failures_total', 'Dashboard sections left empty, by reason (timeout, error)',
+    ('section', 'reason'))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def parse_timeouts(spec):
+    """{section: seconds} from "name=seconds,..."."""
+    timeouts = {}
+    for item in (spec or '').split(','):
+        name, _, seconds = item.partition('=')
+        if name.strip() and seconds.strip():
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix='dashboard')
+    return _pool
+
+
+class Fanout:
+    """
+    Sections of one composite response, computed concurrently.
+
+    start() runs a section on a shared pool under its own deadline, nested in
+    the request's, so upstream calls inside it are cut off at the section's
+    timeout while the other sections carry on. result() waits no longer than
+    that timeout; a section that failed or ran out of time comes back as None
+    and is listed in `degraded` (and in the request's X-Degraded header),
+    together with any parts the section itself had to skip.
+    """
+
+    def __init__(self, timeouts=None, default_timeout=DASHBOARD_SECTION_TIMEOUT_SECONDS):
+        self.timeouts = parse_timeouts(DASHBOARD_SECTION_TIMEOUTS) if timeouts is None else timeouts
+        self.default_timeout = default_timeout
+        self.degraded = []
+        self.timings = {}
+        self._sections = {}
+
+    def start(self, name, fn, *args, **kwargs):
+        seconds = self.timeouts.get(name, self.default_timeout)
+        # Copied here so the section sees the request's deadline (and profiling spans)
+        context = contextvars.copy_context()
+        started = time.monotonic()
+        future = _executor().submit(context.run, self._run, started, seconds, fn, args, kwargs)
+        self._sections[name] = (future, started, seconds)
+
+    @staticmethod
+    def _run(started, seconds, fn, args, kwargs):
+        with deadline_scope(seconds) as deadline:
+            value = fn(*args, **kwargs)
+        return value, list(deadline.degraded), time.monotonic() - started
+
+    def result(self, name):
+        """The section's value, or None if it failed or missed its timeout."""
+        future, started, seconds = self._sections[name]
+        wait = seconds - (time.monotonic() - started)
+        outer = current_deadline()
+        if outer is not None:
+            wait = min(wait, outer.remaining())
+        try:
+            value, parts, elapsed = future.result(timeout=max(0.0, wait))
+        except FutureTimeout:
+            # Left to finish in the background; its upstream calls stop at the section deadline
+            return self._fail(name, min(time.monotonic() - started, seconds), 'timeout')
+        except Exception as e:
+            logger.error(f"Dashboard section {name} failed: {e}")
+            return self._fail(name, time.monotonic() - started, 'error')
+        self._finish(name, elapsed)
+        for part in parts:
+            self._degrade(part)
+        return value
+
+    def _finish(self, name, elapsed):
+        self.timings[name] = round(elapsed * 1000, 1)
+        SECTION_SECONDS.observe(elapsed, section=name)
+
+    def _fail(self, name, elapsed, reason):
+        self._finish(name, elapsed)
+        SECTION_FAILURES.inc(section=name, reason=reason)
+        self._degrade(name)
+        return None
+
+    def _degrade(self, part):
+        if part not in self.degraded:
+            self.degraded.append(part)
+        outer = current_deadline()
+        if outer is not None:
+            outer.degrade(part)
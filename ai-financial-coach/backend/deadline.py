@@ -0,0 +1,162 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import make_response, request
+
+from config import load_env
+from metrics import registry
+
+load_env()
+
+# Default time budget of a request to a route decorated with with_deadline
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '15'))
+# Upstream calls that cannot take a timeout themselves (the Gemini SDK) run on this pool
+DEADLINE_POOL_WORKERS = int(os.getenv('DEADLINE_POOL_WORKERS', '32'))
+# Clients may ask for a tighter (never looser) budget with this header, in milliseconds
+DEADLINE_HEADER = 'X-Request-Timeout-Ms'
+DEGRADED_HEADER = 'X-Degraded'
+
+DEADLINE_EXCEEDED = registry.counter(
+    'deadline_exceeded_total', 'Upstream calls abandoned because the request deadline ran out', ('operation',))
+DEGRADED_RESPONSES = registry.counter(
+    'degraded_responses_total', 'Responses returned with parts missing because the deadline ran out', ('route',))
+
+_current = contextvars.ContextVar('deadline', default=None)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline ran out before an upstream call finished."""
+
+
+class Deadline:
+    """Absolute expiry of one request plus the parts that had to be skipped to meet it."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + max(0.0, seconds)
+        self.degraded = []
+        self.timed_out = set()
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def degrade(self, part):
+        """Record that a part of the response is missing or approximate."""
+        with self._lock:
+            if part not in self.degraded:
+                self.degraded.append(part)
+
+    def exceeded(self, operation):
+        """Record that an upstream operation was cut off; returns the exception to raise."""
+        with self._lock:
+            self.timed_out.add(operation)
+        DEADLINE_EXCEEDED.inc(operation=operation)
+        return DeadlineExceeded(f"Deadline exceeded before {operation} finished")
+
+    def timeout(self, default, operation):
+        """A per-call timeout that also fits the remaining budget; raises if nothing is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self.exceeded(operation)
+        return min(default, remaining) if default else remaining
+
+    def call(self, fn, operation):
+        """
+        Run fn() but stop waiting for it when the deadline expires.
+
+        For calls that accept no timeout of their own: fn runs on a shared pool
+        and is abandoned (left to finish in the background) on expiry.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self.exceeded(operation)
+        future = _executor().submit(contextvars.copy_context().run, fn)
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeout:
+            raise self.exceeded(operation) from None
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=DEADLINE_POOL_WORKERS, thread_name_prefix='deadline')
+    return _pool
+
+
+def current():
+    """The deadline of the request being served, or None outside a deadline scope."""
+    return _current.get()
+
+
+def timeout_for(default, operation):
+    """HTTP timeout for an upstream call: `default`, shortened to the remaining request budget."""
+    deadline = _current.get()
+    return deadline.timeout(default, operation) if deadline is not None else default
+
+
+def bounded(fn, operation):
+    """Run fn() within the current deadline (directly when there is none)."""
+    deadline = _current.get()
+    return deadline.call(fn, operation) if deadline is not None else fn()
+
+
+@contextmanager
+def scope(seconds):
+    """Bind a deadline for the enclosed work; a nested scope can only shorten the outer one."""
+    outer = _current.get()
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline.expires_at = outer.expires_at
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def _requested_seconds(default):
+    raw = request.headers.get(DEADLINE_HEADER)
+    if not raw:
+        return default
+    try:
+        return max(0.0, min(default, float(raw) / 1000.0))
+    except ValueError:
+        return default
+
+
+def with_deadline(seconds=None):
+    """
+    Route decorator: serve the request under a deadline of `seconds`
+    (REQUEST_DEADLINE_SECONDS by default, or less if the client asks).
+
+    Clients called inside read it to bound their upstream calls. If parts of
+    the response were skipped to meet it, the response carries an
+    X-Degraded header naming them (and no ETag, so it is not revalidated).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            budget = _requested_seconds(seconds if seconds is not None else REQUEST_DEADLINE_SECONDS)
+            with scope(budget) as deadline:
+                response = make_response(view(*args, **kwargs))
+            if deadline.degraded:
+                response.headers[DEGRADED_HEADER] = ','.join(deadline.degraded)
+                DEGRADED_RESPONSES.inc(route=view.__name__)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import load_env
+from metrics import registry
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+FLEET_WORKERS = int(os.getenv('FLEET_WORKERS', '4'))
+FLEET_BATCH_SIZE = int(os.getenv('FLEET_BATCH_SIZE', '50'))
+# Each account's analysis starts after a random delay of up to this many seconds
+FLEET_JITTER_SECONDS = float(os.getenv('FLEET_JITTER_SECONDS', '2'))
+FLEET_CHECKPOINT_PATH = os.getenv(
+    'FLEET_CHECKPOINT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fleet_checkpoint.json'),
+)
+# An unfinished run older than this is started over instead of resumed
+FLEET_RESUME_MAX_AGE_SECONDS = float(os.getenv('FLEET_RESUME_MAX_AGE_SECONDS', str(6 * 24 * 3600)))
+
+FLEET_RUN_SECONDS = registry.gauge(
+    'fleet_run_duration_seconds', 'Wall time of the last completed fleet analysis run')
+FLEET_RUN_COMPLETED = registry.gauge(
+    'fleet_run_last_completed_timestamp_seconds', 'Unix time the last fleet analysis run completed')
+FLEET_ACCOUNTS = registry.counter(
+    'fleet_accounts_total', 'Accounts processed by fleet analysis runs', ('outcome',))
+FLEET_ACCOUNT_SECONDS = registry.histogram(
+    'fleet_account_duration_seconds', 'Analysis time per account in fleet runs (excluding jitter)')
+
+
+class Checkpoint:
+    """JSON progress file of one fleet run, rewritten atomically after every batch."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fleet checkpoint {self.path}: {e}")
+            return None
+
+    def save(self, state):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+
+class FleetRunner:
+    """
+    Run the weekly analysis for every account.
+
+    Accounts are processed in batches of batch_size on a thread pool of
+    `workers`; each analysis starts after a random jitter so upstream calls
+    do not arrive in lockstep (Gemini is additionally throttled per model by
+    the limiters in gemini_client). Completed account ids are checkpointed
+    after each batch, so a run interrupted by a restart resumes where it
+    stopped instead of starting over.
+    """
+
+    def __init__(self, analyze, list_accounts, workers=FLEET_WORKERS, batch_size=FLEET_BATCH_SIZE,
+                 jitter_seconds=FLEET_JITTER_SECONDS, checkpoint_path=FLEET_CHECKPOINT_PATH,
+                 resume_max_age=FLEET_RESUME_MAX_AGE_SECONDS, on_result=None, sleep=time.sleep):
+        self.analyze = analyze
+        self.list_accounts = list_accounts
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        self.resume_max_age = resume_max_age
+        self.on_result = on_result
+        self._sleep = sleep
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def _start_state(self, accounts):
+        previous = self.checkpoint.load() if self.checkpoint else None
+        if (previous and previous.get('status') == 'running'
+                and time.time() - previous.get('started_at', 0) < self.resume_max_age):
+            logger.info(f"Resuming fleet run {previous['run_id']}: "
+                        f"{len(previous.get('completed', []))} of {previous.get('total')} accounts already done")
+            previous['total'] = len(accounts)
+            previous.setdefault('failed', [])
+            return previous
+        return {
+            "run_id": uuid.uuid4().hex[:12],
+            "status": "running",
+            "started_at": time.time(),
+            "total": len(accounts),
+            "completed": [],
+            "failed": [],
+        }
+
+    def _analyze_one(self, account_id):
+        if self.jitter_seconds:
+            with self._lock:
+                delay = self._rng.uniform(0, self.jitter_seconds)
+            self._sleep(delay)
+        start = time.perf_counter()
+        try:
+            result = self.analyze(account_id)
+            ok = isinstance(result, dict) and 'error' not in result
+        except Exception as e:
+            logger.error(f"Fleet analysis failed for {account_id}: {e}")
+            result, ok = {"error": str(e)}, False
+        FLEET_ACCOUNT_SECONDS.observe(time.perf_counter() - start)
+        FLEET_ACCOUNTS.inc(outcome='ok' if ok else 'error')
+        if self.on_result:
+            try:
+                self.on_result(account_id, result)
+            except Exception as e:
+                logger.error(f"Fleet result handler failed for {account_id}: {e}")
+        return ok
+
+    def run(self):
+        """Process every account once; returns the run summary (also stored in the checkpoint)."""
+        wall_start = time.perf_counter()
+        accounts = [str(a) for a in dict.fromkeys(self.list_accounts() or [])]
+        state = self._start_state(accounts)
+        done = set(state['completed']) | set(state['failed'])
+        todo = [a for a in accounts if a not in done]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fleet') as pool:
+            for i in range(0, len(todo), self.batch_size):
+                batch = todo[i:i + self.batch_size]
+                for account_id, ok in zip(batch, pool.map(self._analyze_one, batch)):
+                    state['completed' if ok else 'failed'].append(account_id)
+                state['updated_at'] = time.time()
+                if self.checkpoint:
+                    self.checkpoint.save(state)
+
+        finished = time.time()
+        state.update({
+            "status": "complete",
+            "finished_at": finished,
+            # Includes time spent in earlier, interrupted attempts of a resumed run
+            "duration_seconds": round(finished - state['started_at'], 3),
+            "this_attempt_seconds": round(time.perf_counter() - wall_start, 3),
+        })
+        if self.checkpoint:
+            self.checkpoint.save(state)
+        FLEET_RUN_SECONDS.set(state['duration_seconds'])
+        FLEET_RUN_COMPLETED.set(finished)
+        logger.info(f"Fleet run {state['run_id']} complete: {len(state['completed'])} ok, "
+                    f"{len(state['failed'])} failed of {state['total']} accounts in {state['duration_seconds']:.1f}s "
+                    f"(workers={self.workers}, batch={self.batch_size})")
+        return state
@@ -1,23 +1,170 @@
-import google.generativeai as genai
 import os
 import json
+import hashlib
 import logging
-from dotenv import load_dotenv
+import threading
+from config import load_env
+from deadline import bounded, current as current_deadline
+from hedging import Hedger
+from metrics import registry, upstream_span
+from rate_limit import SingleFlight, TokenBucket
 
-load_dotenv()
+load_env()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+# Process-wide cap on Gemini calls per model (0 = unlimited), shared by request handlers and the
+# fleet run. The default is the gemini-1.5-flash free-tier quota, so a fleet run cannot burst past
+# it. GEMINI_MODEL_RATES overrides it per model, e.g. "gemini-1.5-flash=1000,gemini-1.5-pro=2"
+GEMINI_RATE_PER_MINUTE = float(os.getenv('GEMINI_RATE_PER_MINUTE', '15'))
+GEMINI_MODEL_RATES = os.getenv('GEMINI_MODEL_RATES', '')
+# A call that would wait longer than this for the limiter fails fast and takes the caller's fallback
+GEMINI_LIMIT_MAX_WAIT_SECONDS = float(os.getenv('GEMINI_LIMIT_MAX_WAIT_SECONDS', '30'))
+
+GEMINI_QUEUE_DEPTH = registry.gauge(
+    'gemini_limiter_queue_depth', 'Gemini calls currently waiting for the rate limiter', ('model',))
+GEMINI_LIMITER_WAIT = registry.histogram(
+    'gemini_limiter_wait_seconds', 'Time Gemini calls spent waiting for the rate limiter', ('model',))
+GEMINI_LIMITER_REJECTED = registry.counter(
+    'gemini_limiter_rejected_total', 'Gemini calls that gave up waiting for the rate limiter', ('model',))
+GEMINI_COALESCED = registry.counter(
+    'gemini_coalesced_requests_total', 'Gemini calls answered by an identical in-flight call', ('operation',))
+
+
+class GeminiRateLimitExceeded(RuntimeError):
+    """The per-model limiter could not admit the call within GEMINI_LIMIT_MAX_WAIT_SECONDS."""
+
+
+class ModelLimiters:
+    """One TokenBucket per model name, created on first use from the configured rates."""
+
+    def __init__(self, default_per_minute=GEMINI_RATE_PER_MINUTE, overrides=GEMINI_MODEL_RATES):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._rates = {}
+        self.default_per_minute = default_per_minute
+        for item in (overrides or '').split(','):
+            name, _, rate = item.partition('=')
+            if name.strip() and rate.strip():
+                self._rates[name.strip()] = float(rate)
+
+    def set_rate(self, model_name, per_minute):
+        with self._lock:
+            self._rates[model_name] = per_minute
+            self._buckets.pop(model_name, None)
+
+    def get(self, model_name):
+        """The model's bucket, or None when it is unlimited."""
+        bucket = self._buckets.get(model_name)
+        if bucket is None:
+            with self._lock:
+                per_minute = self._rates.get(model_name, self.default_per_minute)
+                if per_minute <= 0:
+                    return None
+                bucket = self._buckets.get(model_name)
+                if bucket is None:
+                    # Quotas are per minute, so a full minute's calls may go out at once
+                    bucket = self._buckets[model_name] = TokenBucket.per_minute(per_minute, burst=per_minute)
+        return bucket
+
+
+# Hedging: a call still running after the operation's recent GEMINI_HEDGE_PERCENTILE latency gets
+# one duplicate, at most GEMINI_HEDGE_MAX_RATE of all calls; off unless GEMINI_HEDGE is set
+GEMINI_HEDGE = os.getenv('GEMINI_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+GEMINI_HEDGE_PERCENTILE = float(os.getenv('GEMINI_HEDGE_PERCENTILE', '95'))
+GEMINI_HEDGE_MIN_SECONDS = float(os.getenv('GEMINI_HEDGE_MIN_SECONDS', '0.5'))
+GEMINI_HEDGE_MAX_RATE = float(os.getenv('GEMINI_HEDGE_MAX_RATE', '0.05'))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv('GEMINI_HEDGE_MIN_SAMPLES', '20'))
+
+limiters = ModelLimiters()
+hedger = Hedger(GEMINI_HEDGE_PERCENTILE, GEMINI_HEDGE_MIN_SECONDS, GEMINI_HEDGE_MAX_RATE,
+                GEMINI_HEDGE_MIN_SAMPLES) if GEMINI_HEDGE else None
+# Identical concurrent prompts (e.g. several tabs loading the dashboard) share one upstream call
+flights = SingleFlight()
+
 class GeminiClient:
     def __init__(self):
         self.api_key = os.getenv('GEMINI_API_KEY')
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.model = None
+        self.model_name = GEMINI_MODEL_NAME
+        self._model = None
+        self._model_ready = False
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The Gemini model, or None without an API key.
+
+        google.generativeai is slow to import, so the SDK is only imported and
+        configured the first time a Gemini call is actually made.
+        """
+        if not self._model_ready:
+            with self._model_lock:
+                if not self._model_ready:
+                    if self.api_key:
+                        import google.generativeai as genai
+                        genai.configure(api_key=self.api_key)
+                        self._model = genai.GenerativeModel(self.model_name)
+                    self._model_ready = True
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self._model_ready = True
+
+    def _generate(self, prompt, operation, **kwargs):
+        """Call generate_content on the model: coalesced with identical in-flight calls, then rate limited"""
+        digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()
+        key = (self.model_name, id(self.model), digest, repr(sorted(kwargs.items())))
+        # The SDK call takes no timeout, so the request deadline bounds how long we wait for it
+        response, shared = bounded(lambda: flights.do(key, lambda: self._call_model(prompt, operation, **kwargs)),
+                                   f"gemini.{operation}")
+        if shared:
+            GEMINI_COALESCED.inc(operation=operation)
+        return response
+
+    def _call_model(self, prompt, operation, **kwargs):
+        """Rate-limited generate_content call, hedged when hedging is enabled"""
+        bucket = limiters.get(self.model_name)
+        deadline = current_deadline()
+        if bucket is not None:
+            # Never queue past the request deadline: the caller has stopped waiting by then
+            max_wait = GEMINI_LIMIT_MAX_WAIT_SECONDS
+            if deadline is not None:
+                max_wait = min(max_wait, deadline.remaining())
+            GEMINI_QUEUE_DEPTH.inc(model=self.model_name)
+            try:
+                waited = bucket.acquire(timeout=max_wait)
+            finally:
+                GEMINI_QUEUE_DEPTH.dec(model=self.model_name)
+            if waited is None:
+                GEMINI_LIMITER_REJECTED.inc(model=self.model_name)
+                if max_wait < GEMINI_LIMIT_MAX_WAIT_SECONDS:
+                    # The token would only come after the request's deadline
+                    raise deadline.exceeded(f"gemini.{operation}")
+                raise GeminiRateLimitExceeded(f"{self.model_name} rate limit queue is full")
+            GEMINI_LIMITER_WAIT.observe(waited, model=self.model_name)
+        if deadline is not None and deadline.expired:
+            # Out of time while queued: hand the token back instead of paying for an unread answer
+            if bucket is not None:
+                bucket.release()
+            raise deadline.exceeded(f"gemini.{operation}")
+        send = lambda: self._send(prompt, operation, **kwargs)
+        if hedger is None:
+            return send()
+        # A hedge must not queue behind the limiter: it is only sent if a token is free right now
+        may_hedge = (lambda: bucket.try_acquire()) if bucket is not None else None
+        cost = lambda response: (len(prompt) + len(getattr(response, 'text', '') or '')) // 4
+        return hedger.call(operation, send, may_hedge=may_hedge, cost=cost)
+
+    def _send(self, prompt, operation, **kwargs):
+        """One upstream generate_content call, recorded as an upstream span"""
+        with upstream_span('gemini', operation):
+            return self.model.generate_content(prompt, **kwargs)
     
     def categorize_transactions(self, transaction_list):
         """Categorize transactions as 'Need' or 'Want' using Gemini AI"""
@@ -50,7 +197,7 @@ Analyze the following list of transactions. Return your response as a single, va
 Here is the list of transactions to categorize:
 {json.dumps(transaction_list)}"""
 
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'categorize_transactions')
             
             # Parse the JSON response
             response_text = response.text.strip()
@@ -68,22 +215,24 @@ Here is the list of transactions to categorize:
             logger.error(f"Error categorizing transactions: {e}")
             return None
     
-    def get_recommendation(self, needs_total, wants_total, goal, want_transactions_list):
-        """Generate personalized financial recommendation"""
+    def get_recommendation(self, needs_total, wants_total, goal, want_summary):
+        """Generate personalized financial recommendation
+
+        want_summary is the fixed-size dict built by app._want_summary: count,
+        total, top_transactions and top_merchants of the 'Want' spending.
+        """
+        want_summary = want_summary or {}
         try:
             if not self.model:
                 logger.warning("Gemini API key not configured, using fallback recommendation")
-                return self._get_fallback_recommendation(needs_total, wants_total, goal, want_transactions_list)
+                return self._get_fallback_recommendation(needs_total, wants_total, goal, want_summary)
 
-            # Structured prompt: ask for JSON with top wants and a short actionable suggestion
+            top = want_summary.get('top_transactions', [])[:3]
+            # Structured prompt: top wants are already known, ask for categories and a short actionable suggestion
             prompt = f"""
 You are an expert, friendly financial coach. Given the user's spending context, return a single JSON object (and nothing else) with these fields:
 
 {{
-  "top_want_transactions": [
-    {{"description": "<text>", "amount": <number>}},
-    ... up to 3 items ...
-  ],
   "top_categories": ["coffee", "dining", "shopping"],
   "suggestion": "A short (1-2 sentence) actionable suggestion for the user",
   "reason": "One short sentence explaining why this will help"
@@ -93,14 +242,16 @@ User context:
 - monthly_savings_goal: ${goal}
 - needs_total: ${needs_total}
 - wants_total: ${wants_total}
-- want_transactions (detailed): {want_transactions_list}
+- want_transaction_count: {want_summary.get('count', 0)}
+- largest_want_transactions: {json.dumps(want_summary.get('top_transactions', []))}
+- top_want_merchants (total spend, transaction count): {json.dumps(want_summary.get('top_merchants', []))}
 
 Constraints:
 - Return ONLY the JSON object, nothing else (no prose, no backticks).
 - Keep suggestion to 1-2 sentences. Focus on small, actionable changes (e.g., "make coffee at home 3 days this week").
 """
 
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'get_recommendation')
             response_text = response.text.strip()
 
             # Strip markdown fences if present
@@ -119,12 +270,11 @@ Constraints:
                     # Attempt to extract a plain-text suggestion
                     return response_text.split('\n')[0][:500]
                 except:
-                    return self._get_fallback_recommendation(needs_total, wants_total, goal, want_transactions_list)
+                    return self._get_fallback_recommendation(needs_total, wants_total, goal, want_summary)
 
             # Build a concise human-readable recommendation string from structured data
             suggestion = data.get('suggestion') or ''
             reason = data.get('reason') or ''
-            top = data.get('top_want_transactions', [])
             cats = data.get('top_categories', [])
 
             # Format top wants summary
@@ -138,11 +288,11 @@ Constraints:
                 cat_summary = 'Major categories: ' + ', '.join(cats) + '. '
 
             final = ' '.join(p for p in [suggestion, reason, top_summary, cat_summary] if p).strip()
-            return final or self._get_fallback_recommendation(needs_total, wants_total, goal, want_transactions_list)
+            return final or self._get_fallback_recommendation(needs_total, wants_total, goal, want_summary)
 
         except Exception as e:
             logger.error(f"Error getting recommendation: {e}")
-            return self._get_fallback_recommendation(needs_total, wants_total, goal, want_transactions_list)
+            return self._get_fallback_recommendation(needs_total, wants_total, goal, want_summary)
     
     def get_investment_concept(self, goal):
         """Generate educational investment concept"""
@@ -168,7 +318,7 @@ Explain the concept of "investing a percentage of savings into a low-cost index
 
 Return your response as a JSON object with "title" and "explanation" fields."""
 
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'get_investment_concept')
             
             # Try to parse as JSON first
             try:
@@ -185,7 +335,7 @@ Return your response as a JSON object with "title" and "explanation" fields."""
             logger.error(f"Error getting investment concept: {e}")
             return self._get_fallback_investment_concept(goal)
     
-    def _get_fallback_recommendation(self, needs_total, wants_total, goal, want_transactions_list):
+    def _get_fallback_recommendation(self, needs_total, wants_total, goal, want_summary):
         """Fallback recommendation when AI is not available"""
         if wants_total > goal * 0.6:
             return f"Great job tracking your spending! I noticed you spent ${wants_total:.2f} on 'wants' this period. Consider reducing discretionary spending to better meet your ${goal} savings goal. Small changes like making coffee at home or cooking more meals can add up quickly!"
@@ -237,10 +387,12 @@ Return your response as a JSON object with "title" and "explanation" fields."""
 
             # Prefer a slightly higher temperature to encourage variety
             try:
-                response = self.model.generate_content(prompt, generation_config={"temperature": float(temperature)})
+                response = self._generate(prompt, 'get_trending_stocks', generation_config={"temperature": float(temperature)})
+            except GeminiRateLimitExceeded:
+                raise
             except Exception:
                 # Fallback: call without config if SDK doesn't accept generation_config dict
-                response = self.model.generate_content(prompt)
+                response = self._generate(prompt, 'get_trending_stocks')
             text = response.text.strip()
             if text.startswith('```'):
                 parts = text.split('```')
@@ -311,7 +463,7 @@ Return your response as a JSON object with "title" and "explanation" fields."""
                 f"Stocks: {json.dumps(stocks)}\n"
                 "Constraints:\n- Keep each reason to one sentence.\n- No guarantees or price targets.\n- If uncertain, default to 'hold'."
             )
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'rate_stocks')
             text = response.text.strip()
             if text.startswith('```'):
                 parts = text.split('```')
@@ -341,93 +493,41 @@ Return your response as a JSON object with "title" and "explanation" fields."""
             })
         return {'ratings': ratings}
 
-    def recommend_credit_cards(self, transactions_list, approx_categories=None):
-        """Return a ranked list of credit cards that best fit the user's spending.
-        Input:
-          - transactions_list: list of strings (transaction descriptions)
-          - approx_categories: optional list like ["grocery", "dining", ...]
-        Output JSON shape:
-        {
-          "cards": [
-            {"name": "Card Name", "issuer": "Issuer", "rewards": ["% back ..."], "why": "short reason", "suitability": 0-100, "categoriesMatched": ["grocery", ...]},
-            ...
-          ],
-          "disclaimer": "General information only..."
-        }
+    def phrase_card_reasons(self, cards, spend_profile):
+        """Reword the locally computed "why" text of ranked credit cards.
+
+        The ranking itself comes from card_scoring; this only asks the model for
+        one friendlier sentence per card. Returns a list of strings in card
+        order, or None when the model is unavailable or the answer is unusable.
         """
         try:
             if not self.model:
-                return self._fallback_credit_cards(approx_categories)
-
+                return None
+            facts = [
+                {"name": c.get('name'), "estimatedRewards": c.get('estimatedRewards'),
+                 "categoriesMatched": c.get('categoriesMatched', []), "why": c.get('why')}
+                for c in cards
+            ]
             prompt = (
-                "You are a neutral, factual summarizer. Analyze the user's recent spending descriptions "
-                "and return ONLY a strict JSON object ranking 3-5 US consumer credit cards with rewards that match the user's patterns.\n"
-                "Schema:\n"
-                "{\n  \"cards\": [ { \"name\": \"...\", \"issuer\": \"...\", \"rewards\": [\"...\"], \"why\": \"1 sentence\", \"suitability\": 0-100, \"categoriesMatched\": [\"grocery\",\"dining\"] } ],\n  \"disclaimer\": \"Short disclaimer (general information, not financial advice).\"\n}\n\n"
-                f"Spending descriptions (strings): {json.dumps(transactions_list[:50])}\n"
-                f"Approx categories (optional): {json.dumps(approx_categories or [])}\n"
-                "Constraints:\n"
-                "- Base recommendations on commonly available rewards categories (grocery, dining, gas, travel, streaming, online).\n"
-                "- No affiliate links. No guarantees. Keep 'why' to one sentence.\n"
-                "- Use only US consumer cards.\n"
+                "You are a neutral, factual copywriter. For each credit card below, rewrite its 'why' into one short, "
+                "friendly sentence for the user. Do not change any numbers, do not add claims, and do not give advice.\n"
+                "Return ONLY a strict JSON object: {\"reasons\": [\"...\", ...]} with one entry per card, same order.\n\n"
+                f"Spending by category (USD): {json.dumps(spend_profile)}\n"
+                f"Cards: {json.dumps(facts)}\n"
             )
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'phrase_card_reasons')
             text = (response.text or "").strip()
             if text.startswith('```'):
                 parts = text.split('```')
                 if len(parts) >= 2:
                     text = parts[1].strip()
-            try:
-                data = json.loads(text)
-                if not isinstance(data.get('cards', []), list):
-                    return self._fallback_credit_cards(approx_categories)
-                return data
-            except Exception:
-                return self._fallback_credit_cards(approx_categories)
+                    if text.startswith('json'):
+                        text = text[4:].strip()
+            reasons = json.loads(text).get('reasons')
+            if not isinstance(reasons, list) or len(reasons) != len(cards):
+                return None
+            return [str(r).strip()[:300] for r in reasons]
         except Exception as e:
-            logger.error(f"Error recommending credit cards: {e}")
-            return self._fallback_credit_cards(approx_categories)
-
-    def _fallback_credit_cards(self, approx_categories=None):
-        cats = [c.lower() for c in (approx_categories or [])]
-        def match(*keys):
-            return [k for k in keys if any(k in c for c in cats)] or list(keys)
-        cards = [
-            {
-                "name": "Blue Cash Everyday",
-                "issuer": "American Express",
-                "rewards": ["3% back at U.S. supermarkets", "3% back on U.S. gas", "1% back other"],
-                "why": "Strong everyday categories for groceries and gas.",
-                "suitability": 82,
-                "categoriesMatched": match("grocery", "gas")
-            },
-            {
-                "name": "SavorOne",
-                "issuer": "Capital One",
-                "rewards": ["3% back dining", "3% back entertainment", "3% back popular streaming", "3% at grocery stores"],
-                "why": "Well-rounded dining, entertainment, streaming, and grocery rewards.",
-                "suitability": 80,
-                "categoriesMatched": match("dining", "entertainment", "streaming", "grocery")
-            },
-            {
-                "name": "Citi Custom Cash",
-                "issuer": "Citi",
-                "rewards": ["5% back on top eligible category (up to cap)", "1% back other"],
-                "why": "Automatically adapts to your highest monthly category.",
-                "suitability": 79,
-                "categoriesMatched": match("dining", "gas", "grocery", "travel", "streaming")
-            },
-            {
-                "name": "Discover it Cash Back",
-                "issuer": "Discover",
-                "rewards": ["5% rotating categories (activation)", "1% back other"],
-                "why": "Quarterly rotating 5% categories can align with your spend.",
-                "suitability": 75,
-                "categoriesMatched": match("grocery", "gas", "online")
-            }
-        ]
-        return {
-            "cards": cards,
-            "disclaimer": "General information only. Rewards vary by issuer and terms; always verify current offers. Not financial advice."
-        }
+            logger.error(f"Error phrasing credit card reasons: {e}")
+            return None
 
@@ -0,0 +1,173 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+HEDGES_SENT = registry.counter(
+    'gemini_hedges_sent_total', 'Duplicate Gemini calls sent because the first was slower than the hedge threshold',
+    ('operation',))
+HEDGES_WON = registry.counter(
+    'gemini_hedges_won_total', 'Hedged Gemini calls where the duplicate answered first', ('operation',))
+HEDGE_EXTRA_SECONDS = registry.counter(
+    'gemini_hedge_extra_seconds_total', 'Upstream time spent on the losing call of hedged pairs', ('operation',))
+HEDGE_EXTRA_TOKENS = registry.counter(
+    'gemini_hedge_extra_tokens_total', 'Estimated tokens (4 chars each) billed for the losing call of hedged pairs',
+    ('operation',))
+HEDGE_THRESHOLD = registry.gauge(
+    'gemini_hedge_threshold_seconds', 'Current hedge threshold per operation', ('operation',))
+
+
+class LatencyWindow:
+    """Latencies of the last `size` calls, with a cached percentile recomputed every `refresh` samples."""
+
+    def __init__(self, size=200, refresh=10):
+        self._samples = deque(maxlen=size)
+        self._refresh = max(1, refresh)
+        self._since = 0
+        self._cached = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self._since += 1
+            if self._since >= self._refresh:
+                self._cached.clear()
+                self._since = 0
+
+    def percentile(self, pct):
+        with self._lock:
+            if not self._samples:
+                return None
+            value = self._cached.get(pct)
+            if value is None:
+                ordered = sorted(self._samples)
+                value = ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+                self._cached[pct] = value
+            return value
+
+
+class Hedger:
+    """
+    Tail-latency hedging for a blocking call.
+
+    The call runs on a small pool; if it has not answered after the
+    operation's adaptive threshold (the `percentile` of its recent
+    latencies, never below `min_delay`), one duplicate is sent and the first
+    successful answer wins. Hedges are capped at `max_rate` of all calls by a
+    credit budget: every call earns `max_rate` credits (up to `burst`), each
+    hedge spends one. The losing call is left to finish in the background
+    and its time and estimated tokens are counted as hedging cost.
+    """
+
+    def __init__(self, percentile=95.0, min_delay=0.5, max_rate=0.05, min_samples=20, burst=5.0,
+                 window=200, workers=16):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.burst = burst
+        self._window_size = window
+        self._windows = {}
+        self._credits = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gemini-hedge')
+
+    def _window(self, operation):
+        window = self._windows.get(operation)
+        if window is None:
+            with self._lock:
+                window = self._windows.setdefault(operation, LatencyWindow(self._window_size))
+        return window
+
+    def threshold(self, operation):
+        """Seconds to wait before hedging, or None until enough latencies are known."""
+        window = self._window(operation)
+        if len(window) < self.min_samples:
+            return None
+        return max(self.min_delay, window.percentile(self.percentile))
+
+    def _earn(self):
+        with self._lock:
+            self._credits = min(self.burst, self._credits + self.max_rate)
+
+    def _spend(self):
+        with self._lock:
+            if self._credits >= 1.0:
+                self._credits -= 1.0
+                return True
+            return False
+
+    def _submit(self, fn):
+        def timed():
+            start = time.perf_counter()
+            result = fn()
+            return result, time.perf_counter() - start
+        # Copy the context so upstream spans still count towards the calling request
+        return self._pool.submit(contextvars.copy_context().run, timed)
+
+    def call(self, operation, fn, may_hedge=None, cost=None):
+        """Run fn(), hedging it once if slow; may_hedge() is asked just before a duplicate is sent."""
+        self._earn()
+        delay = self.threshold(operation)
+        if delay is None:
+            start = time.perf_counter()
+            result = fn()
+            self._window(operation).add(time.perf_counter() - start)
+            return result
+
+        HEDGE_THRESHOLD.set(round(delay, 3), operation=operation)
+        primary = self._submit(fn)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._spend():
+            return self._finish(operation, primary)
+        if may_hedge is not None and not may_hedge():
+            # Give the credit back: nothing was sent
+            with self._lock:
+                self._credits += 1.0
+            return self._finish(operation, primary)
+
+        HEDGES_SENT.inc(operation=operation)
+        hedge = self._submit(fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                result, seconds = future.result()
+                self._window(operation).add(seconds)
+                if future is hedge:
+                    HEDGES_WON.inc(operation=operation)
+                for loser in pending:
+                    loser.add_done_callback(lambda f: self._count_cost(f, operation, cost))
+                return result
+        raise error
+
+    def _finish(self, operation, future):
+        result, seconds = future.result()
+        self._window(operation).add(seconds)
+        return result
+
+    def _count_cost(self, future, operation, cost):
+        if future.exception() is not None:
+            return
+        result, seconds = future.result()
+        self._window(operation).add(seconds)
+        HEDGE_EXTRA_SECONDS.inc(seconds, operation=operation)
+        if cost is not None:
+            try:
+                HEDGE_EXTRA_TOKENS.inc(cost(result), operation=operation)
+            except Exception as e:
+                logger.debug(f"Could not estimate hedge cost: {e}")
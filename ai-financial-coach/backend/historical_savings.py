@@ -0,0 +1,213 @@
+import bisect
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+from config import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.getenv('HISTORY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'history'))
+# Identical snapshots closer together than this are not stored again
+HISTORY_MIN_INTERVAL_SECONDS = float(os.getenv('HISTORY_MIN_INTERVAL_SECONDS', '60'))
+
+# One fixed-width index record per snapshot:
+#   timestamp (float64 epoch seconds), needs, wants, goal, budget (int64 cents),
+#   recommendation offset (uint64) and length (uint32) in the .rec text file
+_RECORD = struct.Struct('<dqqqqQI')
+_SAFE_ACCOUNT = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def _cents(value):
+    try:
+        return int(round(float(value or 0) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Timestamps:
+    """Read-only sequence over the timestamp column of an index buffer, for bisect."""
+
+    def __init__(self, buf, count):
+        self._buf = buf
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        return struct.unpack_from('<d', self._buf, i * _RECORD.size)[0]
+
+
+class HistoricalSavingsStore:
+    """
+    Append-only on-disk history of analysis snapshots, one pair of files per account.
+
+    - <account>.idx holds fixed-width binary records in time order, which doubles
+      as the time index: range queries binary-search it through an mmap.
+    - <account>.rec holds recommendation texts; a snapshot whose recommendation
+      repeats the previous one points at the existing bytes instead of
+      appending them again.
+
+    Nothing is ever rewritten in place, so a crash can at worst leave a partial
+    trailing record, which readers ignore.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, min_interval_seconds=HISTORY_MIN_INTERVAL_SECONDS):
+        self.directory = directory
+        self.min_interval_seconds = min_interval_seconds
+        self._lock = threading.Lock()
+        # account -> (last record tuple, last recommendation text)
+        self._last = {}
+
+    def _paths(self, account_id):
+        name = _SAFE_ACCOUNT.sub('_', str(account_id)) or 'default'
+        base = os.path.join(self.directory, name)
+        return base + '.idx', base + '.rec'
+
+    def _load_last(self, account_id):
+        if account_id in self._last:
+            return self._last[account_id]
+        idx_path, rec_path = self._paths(account_id)
+        last = (None, None)
+        try:
+            size = os.path.getsize(idx_path)
+            count = size // _RECORD.size
+            if count:
+                with open(idx_path, 'rb') as f:
+                    f.seek((count - 1) * _RECORD.size)
+                    record = _RECORD.unpack(f.read(_RECORD.size))
+                last = (record, self._read_text(rec_path, record[5], record[6]))
+        except FileNotFoundError:
+            pass
+        self._last[account_id] = last
+        return last
+
+    @staticmethod
+    def _read_text(rec_path, offset, length):
+        if not length:
+            return ''
+        with open(rec_path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length).decode('utf-8', 'replace')
+
+    def append(self, account_id, snapshot, timestamp=None):
+        """Persist one analysis snapshot; returns False if it duplicated the previous one."""
+        needs, wants = _cents(snapshot.get('needsTotal')), _cents(snapshot.get('wantsTotal'))
+        goal, budget = _cents(snapshot.get('savingsGoal')), _cents(snapshot.get('monthlyBudget'))
+        text = str(snapshot.get('recommendation') or '')
+        with self._lock:
+            last_record, last_text = self._load_last(account_id)
+            now = time.time() if timestamp is None else float(timestamp)
+            if last_record is not None:
+                # Keep the index sorted even if the clock steps backwards
+                now = max(now, last_record[0])
+                unchanged = last_record[1:5] == (needs, wants, goal, budget) and last_text == text
+                if unchanged and now - last_record[0] < self.min_interval_seconds:
+                    return False
+
+            os.makedirs(self.directory, exist_ok=True)
+            idx_path, rec_path = self._paths(account_id)
+            if last_record is not None and last_text == text:
+                offset, length = last_record[5], last_record[6]
+            else:
+                encoded = text.encode('utf-8')
+                with open(rec_path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(encoded)
+                length = len(encoded)
+
+            record = (now, needs, wants, goal, budget, offset, length)
+            with open(idx_path, 'ab') as f:
+                # Drop a partial record left by an interrupted write before appending
+                misaligned = f.tell() % _RECORD.size
+                if misaligned:
+                    f.truncate(f.tell() - misaligned)
+                    f.seek(0, os.SEEK_END)
+                f.write(_RECORD.pack(*record))
+            self._last[account_id] = (record, text)
+            return True
+
+    def _decode(self, record, rec_file):
+        ts, needs, wants, goal, budget, offset, length = record
+        recommendation = ''
+        if length:
+            rec_file.seek(offset)
+            recommendation = rec_file.read(length).decode('utf-8', 'replace')
+        return {
+            "timestamp": ts,
+            "needsTotal": needs / 100.0,
+            "wantsTotal": wants / 100.0,
+            "totalSpending": (needs + wants) / 100.0,
+            "savingsGoal": goal / 100.0,
+            "monthlyBudget": budget / 100.0,
+            "recommendation": recommendation,
+        }
+
+    def _scan(self, account_id, start, end):
+        """Yield raw records with start <= timestamp <= end using binary search on the index."""
+        idx_path, _rec_path = self._paths(account_id)
+        try:
+            f = open(idx_path, 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            count = os.fstat(f.fileno()).st_size // _RECORD.size
+            if not count:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                stamps = _Timestamps(mm, count)
+                lo = 0 if start is None else bisect.bisect_left(stamps, start)
+                hi = count if end is None else bisect.bisect_right(stamps, end)
+                return [_RECORD.unpack_from(mm, i * _RECORD.size) for i in range(lo, hi)]
+
+    def range(self, account_id, start=None, end=None, limit=None):
+        """Snapshots between two epoch timestamps (inclusive), oldest first."""
+        records = self._scan(account_id, start, end)
+        if limit is not None and len(records) > limit:
+            records = records[-limit:]
+        return self._decode_all(account_id, records)
+
+    def _decode_all(self, account_id, records):
+        if not records:
+            return []
+        _idx_path, rec_path = self._paths(account_id)
+        with open(rec_path, 'rb') as rec_file:
+            return [self._decode(r, rec_file) for r in records]
+
+    def downsample(self, account_id, start, end, points):
+        """
+        Reduce a range to at most `points` evenly spaced buckets for charting.
+
+        Each bucket averages needs/wants over its snapshots and reports the
+        goal, budget and recommendation of the last snapshot in it.
+        """
+        records = self._scan(account_id, start, end)
+        if points <= 0 or len(records) <= points:
+            return self._decode_all(account_id, records)
+        first, last = records[0][0], records[-1][0]
+        width = (last - first) / points or 1.0
+        buckets = {}
+        for record in records:
+            index = min(points - 1, int((record[0] - first) / width))
+            buckets.setdefault(index, []).append(record)
+
+        out = []
+        _idx_path, rec_path = self._paths(account_id)
+        with open(rec_path, 'rb') as rec_file:
+            for index in sorted(buckets):
+                group = buckets[index]
+                tail = self._decode(group[-1], rec_file)
+                tail['timestamp'] = first + (index + 0.5) * width
+                tail['needsTotal'] = sum(r[1] for r in group) / len(group) / 100.0
+                tail['wantsTotal'] = sum(r[2] for r in group) / len(group) / 100.0
+                tail['totalSpending'] = tail['needsTotal'] + tail['wantsTotal']
+                tail['samples'] = len(group)
+                out.append(tail)
+        return out
@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import os
+import threading
+from functools import wraps
+
+from flask import request, make_response
+
+from config import load_env
+
+load_env()
+
+# Responses smaller than this are sent uncompressed; gzip overhead is not worth it
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'application/x-ndjson')
+
+# Suffix appended to the ETag of gzip-encoded representations so each encoding
+# keeps its own strong validator
+GZIP_ETAG_SUFFIX = '-gz'
+
+
+class StateVersion:
+    """
+    Monotonic counter describing the in-memory user state.
+
+    Every route that mutates user_session_state bumps it; read endpoints derive
+    their ETags from it, so a client holding the current ETag can be answered
+    with 304 Not Modified without recomputing anything.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    @property
+    def current(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+def make_etag(scope, version):
+    """Build a strong ETag value for a route scope at a given state version."""
+    return hashlib.sha1(f"{scope}:{version}".encode('utf-8')).hexdigest()[:20]
+
+
+def _client_has_etag(etag):
+    """True if the request's If-None-Match matches either encoding of the ETag."""
+    inm = request.if_none_match
+    if not inm:
+        return False
+    return inm.contains(etag) or inm.contains(etag + GZIP_ETAG_SUFFIX) or inm.star_tag
+
+
+def conditional_get(state_version, scope=None, version=None):
+    """
+    Decorator for read endpoints: answer If-None-Match with 304 when the state
+    version has not changed, otherwise run the view and attach a strong ETag.
+
+    `version` is an optional callable for state the route also depends on but
+    that changes outside the routes bumping state_version (e.g. data derived
+    by a background analysis); its value is folded into the ETag.
+
+    The ETag is computed before the view runs, so a 304 costs no analysis,
+    Gemini or Nessie calls.
+    """
+    def decorator(view):
+        route_scope = scope or view.__name__
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Query parameters select different representations of the same state
+            query = request.query_string.decode('utf-8', 'ignore')
+            current = state_version.current if version is None else f"{state_version.current}.{version()}"
+            etag = make_etag(f"{route_scope}?{query}", current)
+            if _client_has_etag(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            # A response cut short by its deadline (X-Degraded) must not be revalidated as current
+            if response.status_code == 200 and 'X-Degraded' not in response.headers:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return wrapper
+    return decorator
+
+
+def compress_response(response):
+    """
+    after_request hook: gzip large textual responses when the client accepts it.
+
+    Streamed responses, already-encoded bodies and small payloads are passed
+    through untouched.
+    """
+    try:
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+            return response
+        if 'Content-Encoding' in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        if 'gzip' not in (request.headers.get('Accept-Encoding') or '').lower():
+            return response
+
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_BYTES:
+            return response
+
+        response.set_data(gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+
+        etag, weak = response.get_etag()
+        if etag and not etag.endswith(GZIP_ETAG_SUFFIX):
+            response.set_etag(etag + GZIP_ETAG_SUFFIX, weak=weak)
+        return response
+    except Exception:
+        # Never fail a request because compression failed
+        return response
@@ -0,0 +1,157 @@
+import codecs
+import csv
+import json
+import math
+import os
+from datetime import date
+
+from config import load_env
+
+load_env()
+
+IMPORT_CHUNK_ROWS = int(os.getenv('IMPORT_CHUNK_ROWS', '500'))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '100000'))
+# Per-row error lines streamed back before errors are only counted
+IMPORT_MAX_ERROR_LINES = int(os.getenv('IMPORT_MAX_ERROR_LINES', '100'))
+
+FORMATS = ('csv', 'ndjson')
+
+# Accepted column names, first match wins
+_DESCRIPTION_KEYS = ('description', 'merchant', 'name', 'payee', 'memo')
+_AMOUNT_KEYS = ('amount', 'value', 'debit')
+_DATE_KEYS = ('date', 'purchase_date', 'transaction_date', 'posted_date')
+
+MAX_DESCRIPTION_LENGTH = 200
+MAX_AMOUNT = 10_000_000
+
+
+class RowError(ValueError):
+    """A problem with one imported row."""
+
+
+def detect_format(requested=None, filename=None, mimetype=None):
+    if requested:
+        requested = requested.lower()
+        if requested in ('json', 'jsonl', 'ndjson'):
+            return 'ndjson'
+        if requested == 'csv':
+            return 'csv'
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl', '.json')) or 'ndjson' in (mimetype or '') or 'json' in (mimetype or ''):
+        return 'ndjson'
+    return 'csv'
+
+
+def _iter_lines(stream, encoding='utf-8'):
+    """Decode a binary stream lazily, one line at a time (bounded by the read size, not the file)."""
+    decoder = codecs.getincrementaldecoder(encoding)('replace')
+    buffer = ''
+    first = True
+    while True:
+        block = stream.read(64 * 1024)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if first:
+            text = text.lstrip('\ufeff')
+            first = False
+        buffer += text
+        lines = buffer.splitlines(keepends=True)
+        # Keep a trailing partial line for the next block
+        buffer = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer
+
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, dict) or (row_number, RowError) for each data row of the upload."""
+    lines = _iter_lines(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for number, row in enumerate(reader, start=1):
+            if None in row:
+                yield number, RowError("too many columns")
+                continue
+            yield number, {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+        return
+    number = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, RowError("invalid JSON")
+            continue
+        if not isinstance(row, dict):
+            yield number, RowError("each line must be a JSON object")
+            continue
+        yield number, {str(k).strip().lower(): v for k, v in row.items()}
+
+
+def _first(row, keys):
+    for key in keys:
+        value = row.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def validate_row(row, default_date):
+    """Turn a parsed row into {description, amount, date}, or raise RowError."""
+    description = _first(row, _DESCRIPTION_KEYS)
+    if description is None or not str(description).strip():
+        raise RowError("description is required")
+    description = ' '.join(str(description).split())[:MAX_DESCRIPTION_LENGTH]
+
+    amount = _first(row, _AMOUNT_KEYS)
+    if amount is None:
+        raise RowError("amount is required")
+    try:
+        amount = float(str(amount).replace('$', '').replace(',', '')) if isinstance(amount, str) else float(amount)
+    except (TypeError, ValueError):
+        raise RowError("amount must be a number")
+    if not math.isfinite(amount) or abs(amount) > MAX_AMOUNT:
+        raise RowError("amount is out of range")
+
+    tx_date = _first(row, _DATE_KEYS)
+    if tx_date is None:
+        tx_date = default_date
+    else:
+        try:
+            tx_date = date.fromisoformat(str(tx_date)[:10]).isoformat()
+        except ValueError:
+            raise RowError("date must be YYYY-MM-DD")
+    return {'description': description, 'amount': round(amount, 2), 'date': tx_date}
+
+
+def iter_chunks(stream, fmt, default_date, chunk_rows=IMPORT_CHUNK_ROWS, max_rows=IMPORT_MAX_ROWS):
+    """
+    Yield (valid_rows, errors) per chunk of at most chunk_rows input rows.
+
+    errors is a list of (row_number, message). Reading stops after max_rows
+    rows with a final error entry, so memory stays bounded by the chunk size.
+    """
+    valid, errors, seen = [], [], 0
+    for number, row in iter_rows(stream, fmt):
+        if seen >= max_rows:
+            errors.append((number, f"import is limited to {max_rows} rows; the rest was skipped"))
+            break
+        seen += 1
+        if isinstance(row, RowError):
+            errors.append((number, str(row)))
+        else:
+            try:
+                valid.append(validate_row(row, default_date))
+            except RowError as e:
+                errors.append((number, str(e)))
+        if len(valid) + len(errors) >= chunk_rows:
+            yield valid, errors
+            valid, errors = [], []
+    if valid or errors:
+        yield valid, errors
@@ -0,0 +1,37 @@
+import threading
+
+
+class LazyObject:
+    """
+    Proxy that builds the wrapped object on first attribute access.
+
+    Used for the API clients so importing app.py does not construct them (or
+    import their SDKs) until a request actually needs one.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _resolve(self):
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            with object.__getattribute__(self, '_lock'):
+                instance = object.__getattribute__(self, '_instance')
+                if instance is None:
+                    instance = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            return f"<LazyObject (unresolved) {object.__getattribute__(self, '_factory')!r}>"
+        return repr(instance)
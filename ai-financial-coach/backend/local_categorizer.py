@@ -0,0 +1,189 @@
+import atexit
+import logging
+import os
+import re
+import threading
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from config import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# Width of the hashed character n-gram vectors and the n-gram lengths hashed into them
+NGRAM_DIM = int(os.getenv('LOCAL_CATEGORIZER_DIM', '1024'))
+NGRAM_SIZES = (2, 3, 4)
+# Neighbours voting on a label, and the confidence a prediction needs to skip the LLM
+LOCAL_CATEGORIZER_K = int(os.getenv('LOCAL_CATEGORIZER_K', '5'))
+LOCAL_CATEGORIZER_MIN_CONFIDENCE = float(os.getenv('LOCAL_CATEGORIZER_MIN_CONFIDENCE', '0.6'))
+# Below this many labelled merchants nothing is predicted
+LOCAL_CATEGORIZER_MIN_EXAMPLES = int(os.getenv('LOCAL_CATEGORIZER_MIN_EXAMPLES', '20'))
+LOCAL_CATEGORIZER_PATH = os.getenv(
+    'LOCAL_CATEGORIZER_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'local_categorizer.npz'),
+)
+# Labels learned between two saves of the corpus
+LOCAL_CATEGORIZER_SAVE_EVERY = int(os.getenv('LOCAL_CATEGORIZER_SAVE_EVERY', '50'))
+
+LABELS = ('Need', 'Want')
+_LABEL_INDEX = {label: i for i, label in enumerate(LABELS)}
+
+_WORD = re.compile(r"[a-z&]+|[0-9]+")
+
+
+def normalize(description):
+    """Lower-cased words with digit runs collapsed, so store numbers do not split merchants."""
+    words = _WORD.findall((description or '').lower())
+    return ' '.join('#' if w[0].isdigit() else w for w in words)
+
+
+@lru_cache(maxsize=8192)
+def _features(text, dim):
+    padded = f" {text} "
+    grams = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+    if not grams:
+        return np.zeros(0, dtype=np.int64)
+    # crc32 rather than hash(): feature indices must be stable across processes for the saved corpus
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) % dim for g in grams), dtype=np.int64, count=len(grams))
+
+
+def vectorize(descriptions, dim=NGRAM_DIM):
+    """(len(descriptions), dim) float32 matrix of L2-normalized, sublinear n-gram counts."""
+    out = np.zeros((len(descriptions), dim), dtype=np.float32)
+    for row, description in enumerate(descriptions):
+        idx = _features(normalize(description), dim)
+        if len(idx):
+            out[row] = np.bincount(idx, minlength=dim)
+    np.sqrt(out, out=out)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+class LocalCategorizer:
+    """
+    k-nearest-neighbour Need/Want classifier over labels Gemini already returned.
+
+    Every labelled merchant is one row of a (merchants x NGRAM_DIM) matrix of
+    hashed character n-grams; a query's cosine similarities to all rows are
+    one matrix product. The k most similar rows vote with their similarity,
+    and confidence is the winning share of the vote scaled by the best
+    similarity, so both disagreement and an unfamiliar description lower it.
+    Re-labelling a merchant overwrites its row.
+    """
+
+    def __init__(self, dim=NGRAM_DIM, k=LOCAL_CATEGORIZER_K, min_examples=LOCAL_CATEGORIZER_MIN_EXAMPLES,
+                 path=None, save_every=LOCAL_CATEGORIZER_SAVE_EVERY):
+        self.dim = dim
+        self.k = max(1, k)
+        self.min_examples = min_examples
+        self.path = path
+        self.save_every = max(1, save_every)
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((64, dim), dtype=np.float32)
+        self._labels = np.zeros(64, dtype=np.int8)
+        self._keys = []
+        self._rows = {}
+        self._unsaved = 0
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                matrix, labels, keys = data['matrix'], data['labels'], data['keys']
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable categorizer corpus {self.path}: {e}")
+            return
+        if matrix.ndim != 2 or matrix.shape[1] != self.dim:
+            logger.warning(f"Categorizer corpus {self.path} has a different dimension; starting empty")
+            return
+        n = len(keys)
+        self._matrix = np.zeros((max(64, n * 2), self.dim), dtype=np.float32)
+        self._matrix[:n] = matrix[:n]
+        self._labels = np.zeros(len(self._matrix), dtype=np.int8)
+        self._labels[:n] = labels[:n]
+        self._keys = [str(k) for k in keys.tolist()]
+        self._rows = {key: i for i, key in enumerate(self._keys)}
+        logger.info(f"Loaded {n} labelled merchants from {self.path}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            n = len(self._keys)
+            matrix, labels = self._matrix[:n].copy(), self._labels[:n].copy()
+            keys = np.array(self._keys, dtype=str)
+            self._unsaved = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # np.savez appends .npz to names without it, so write through an open file
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, matrix=matrix, labels=labels, keys=keys)
+        os.replace(tmp, self.path)
+
+    def learn(self, descriptions, labels):
+        """Add (or relabel) merchants from model-labelled descriptions; returns how many were stored."""
+        pairs = [(d, l) for d, l in zip(descriptions, labels) if l in _LABEL_INDEX and normalize(d)]
+        if not pairs:
+            return 0
+        vectors = vectorize([d for d, _ in pairs], self.dim)
+        with self._lock:
+            for (description, label), vector in zip(pairs, vectors):
+                key = normalize(description)
+                row = self._rows.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    if row == len(self._matrix):
+                        self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+                        self._labels = np.concatenate([self._labels, np.zeros_like(self._labels)])
+                    self._rows[key] = row
+                    self._keys.append(key)
+                self._matrix[row] = vector
+                self._labels[row] = _LABEL_INDEX[label]
+            self._unsaved += len(pairs)
+            due = self._unsaved >= self.save_every
+        if due:
+            try:
+                self.save()
+            except OSError as e:
+                logger.error(f"Error saving categorizer corpus: {e}")
+        return len(pairs)
+
+    def predict(self, descriptions):
+        """[(label or None, confidence)] per description; None until min_examples merchants are known."""
+        if not descriptions:
+            return []
+        if len(self._keys) < max(1, self.min_examples):
+            return [(None, 0.0)] * len(descriptions)
+        queries = vectorize(descriptions, self.dim)
+        with self._lock:
+            n = len(self._keys)
+            matrix, labels = self._matrix[:n], self._labels[:n]
+            sims = queries @ matrix.T
+        k = min(self.k, n)
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.clip(np.take_along_axis(sims, top, axis=1), 0.0, None)
+        votes = np.zeros((len(descriptions), len(LABELS)), dtype=np.float32)
+        for label in range(len(LABELS)):
+            votes[:, label] = np.where(labels[top] == label, top_sims, 0.0).sum(axis=1)
+        totals = votes.sum(axis=1)
+        winners = votes.argmax(axis=1)
+        share = np.divide(votes.max(axis=1), totals, out=np.zeros_like(totals), where=totals > 0)
+        confidence = share * top_sims.max(axis=1)
+        return [(LABELS[w] if t > 0 else None, round(float(c), 4))
+                for w, t, c in zip(winners.tolist(), totals.tolist(), confidence.tolist())]
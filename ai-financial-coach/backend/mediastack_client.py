@@ -1,8 +1,10 @@
 import os
 import requests
-from dotenv import load_dotenv
+from config import load_env
+from metrics import upstream_span
+from deadline import timeout_for
 
-load_dotenv()
+load_env()
 
 
 class MediastackClient:
@@ -33,7 +35,8 @@ class MediastackClient:
                 "categories": "business",
                 "keywords": query,
             }
-            resp = requests.get(self.base_url, params=params, timeout=6)
+            with upstream_span("mediastack", "news"):
+                resp = requests.get(self.base_url, params=params, timeout=timeout_for(6, 'mediastack.news'))
             if resp.status_code != 200:
                 return None
             data = resp.json() if resp.content else {}
@@ -0,0 +1,282 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from config import load_env
+
+load_env()
+
+# Generic words that describe the shop or company form rather than the merchant, so
+# "Starbucks" and "Starbucks Store" share one key. Words that can be most of a merchant's
+# name ("T-Mobile", "Car Payment", "Electric Bill") do not belong here.
+NOISE_TOKENS = frozenset({
+    'store', 'subscription', 'premium',
+    'inc', 'llc', 'co', 'corp',
+})
+# Words naming the kind of business. Dropped from the key like noise words ("Starbucks
+# Coffee" is "Starbucks"), but kept when they are all that tells two merchants apart
+# ("Downtown Gas" and "Downtown Coffee"); see MerchantDirectory
+CATEGORY_TOKENS = frozenset({
+    'coffee', 'gas', 'station', 'grocery', 'market', 'supermarket', 'supercenter', 'wholesale',
+})
+
+_TOKEN = re.compile(r"[a-z0-9&]+")
+_APOSTROPHES = re.compile(r"['’]")
+
+NORMALIZER_CACHE_SIZE = 8192
+# Canonical merchants the directory remembers; the least recently seen are forgotten beyond this
+MERCHANT_DIRECTORY_SIZE = int(os.getenv('MERCHANT_DIRECTORY_SIZE', '50000'))
+
+
+def _tokens(text):
+    return _TOKEN.findall(_APOSTROPHES.sub('', text.lower()))
+
+
+def _is_noise(token):
+    # Store numbers such as "#1234" carry no merchant identity either
+    return token in NOISE_TOKENS or (token.isdigit() and len(token) >= 3)
+
+
+@lru_cache(maxsize=NORMALIZER_CACHE_SIZE)
+def _parse(description):
+    tokens = _tokens(description)
+    kept = [t for t in tokens if not _is_noise(t)] or tokens
+    identity = [t for t in kept if t not in CATEGORY_TOKENS]
+    if not identity:
+        # e.g. "Gas Station": the category words are the merchant
+        return sys.intern(' '.join(kept)), frozenset()
+    return sys.intern(' '.join(identity)), frozenset(t for t in kept if t in CATEGORY_TOKENS)
+
+
+def canonical_key(description):
+    """
+    Canonical, interned merchant key for a raw description.
+
+    Lower-cases, drops punctuation, noise and category words and store
+    numbers; if nothing is left (e.g. "Gas Station"), the words that are not
+    noise (or, failing that, all of them) are used instead.
+    """
+    return _parse(description or '')[0]
+
+
+def category_words(description):
+    """The category words (CATEGORY_TOKENS) dropped from the description's canonical key."""
+    return _parse(description or '')[1]
+
+
+def _display_name(description, keep_categories=False):
+    """The raw description with noise words removed, keeping its original casing."""
+    def dropped(token):
+        return _is_noise(token) or (not keep_categories and token in CATEGORY_TOKENS)
+
+    words = (description or '').split()
+    kept = [w for w in words if not all(dropped(t) for t in _tokens(w))]
+    return ' '.join(kept or words).strip(' ,.-') or 'Unknown'
+
+
+class _Merchant:
+    __slots__ = ('key', 'name', 'categories', 'aliases')
+
+    def __init__(self, key, name, categories):
+        self.key = key
+        self.name = name
+        self.categories = set(categories)
+        # (key, category words) pairs that resolved to this merchant
+        self.aliases = []
+
+
+class MerchantDirectory:
+    """
+    Process-wide mapping of canonical merchant keys to small integer IDs.
+
+    IDs are assigned on first sight and never reused, so they can be used as
+    dict keys anywhere raw descriptions were used before. Descriptions with
+    the same canonical key share an ID unless their category words disagree:
+    "Starbucks" and "Starbucks Coffee" are one merchant, "Downtown Gas" and
+    "Downtown Coffee" two.
+
+    At most `max_size` merchants are remembered, least recently seen first
+    out; a forgotten merchant gets a new ID when it shows up again, and
+    name() of the old one is "Unknown".
+    """
+
+    def __init__(self, max_size=MERCHANT_DIRECTORY_SIZE):
+        self.max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        # merchant_id -> _Merchant, least recently used first
+        self._merchants = OrderedDict()
+        # canonical key -> merchant IDs sharing it, oldest first
+        self._by_key = {}
+        # (key, category words) -> merchant ID of every pair seen, for the common repeat lookup
+        self._aliases = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._merchants)
+
+    def _match(self, key, categories):
+        for merchant_id in self._by_key.get(key, ()):
+            known = self._merchants[merchant_id].categories
+            if not categories or not known or known & categories:
+                return merchant_id
+        return None
+
+    def id_for(self, description):
+        with self._lock:
+            return self._id_for(description)
+
+    def _id_for(self, description):
+        parsed = _parse(description or '')
+        merchant_id = self._aliases.get(parsed)
+        if merchant_id is not None:
+            self._merchants.move_to_end(merchant_id)
+            return merchant_id
+        key, categories = parsed
+        merchant_id = self._match(key, categories)
+        if merchant_id is None:
+            merchant_id = self._next_id
+            self._next_id += 1
+            # A second merchant under the same key keeps its category words in its name
+            name = _display_name(description, keep_categories=key in self._by_key)
+            self._merchants[merchant_id] = _Merchant(key, sys.intern(name), categories)
+            self._by_key.setdefault(key, []).append(merchant_id)
+        merchant = self._merchants[merchant_id]
+        merchant.categories |= categories
+        merchant.aliases.append(parsed)
+        self._aliases[parsed] = merchant_id
+        self._merchants.move_to_end(merchant_id)
+        while len(self._merchants) > self.max_size:
+            self._forget()
+        return merchant_id
+
+    def _forget(self):
+        merchant_id, merchant = self._merchants.popitem(last=False)
+        for alias in merchant.aliases:
+            if self._aliases.get(alias) == merchant_id:
+                del self._aliases[alias]
+        ids = self._by_key[merchant.key]
+        ids.remove(merchant_id)
+        if not ids:
+            del self._by_key[merchant.key]
+
+    def ids_for(self, descriptions):
+        # One lock acquisition for the whole batch
+        with self._lock:
+            return [self._id_for(d) for d in descriptions]
+
+    def key(self, merchant_id):
+        merchant = self._merchants.get(merchant_id)
+        return merchant.key if merchant is not None else None
+
+    def name(self, merchant_id):
+        merchant = self._merchants.get(merchant_id)
+        return merchant.name if merchant is not None else 'Unknown'
+
+
+# Shared by every account so IDs agree across indexes, frames and caches
+directory = MerchantDirectory()
+
+
+class MerchantIndex:
+    """
+    Per-account merchant -> transactions index with running spend totals.
+
+    Like SpendingRollups it is maintained incrementally: upsert() and remove()
+    touch only the one merchant a transaction belongs to.
+    """
+
+    def __init__(self, merchants=None):
+        self._directory = merchants or directory
+        self._lock = threading.Lock()
+        # tx_id -> (merchant_id, amount_cents, category)
+        self._transactions = {}
+        # merchant_id -> set of tx_ids
+        self._by_merchant = {}
+        # merchant_id -> {category: cents}
+        self._totals = {}
+
+    def __len__(self):
+        return len(self._transactions)
+
+    def _apply(self, tx_id, entry, sign):
+        merchant_id, cents, category = entry
+        if sign > 0:
+            self._by_merchant.setdefault(merchant_id, set()).add(tx_id)
+        else:
+            members = self._by_merchant.get(merchant_id)
+            if members is not None:
+                members.discard(tx_id)
+                if not members:
+                    del self._by_merchant[merchant_id]
+        totals = self._totals.setdefault(merchant_id, {})
+        value = totals.get(category, 0) + sign * cents
+        if value:
+            totals[category] = value
+        else:
+            totals.pop(category, None)
+        if merchant_id not in self._by_merchant:
+            self._totals.pop(merchant_id, None)
+
+    def upsert(self, tx_id, description, amount_cents, category):
+        """Add or re-file a transaction; True if the index changed."""
+        entry = (self._directory.id_for(description), int(amount_cents), category or 'Uncategorized')
+        tx_id = str(tx_id)
+        with self._lock:
+            previous = self._transactions.get(tx_id)
+            if previous == entry:
+                return False
+            if previous is not None:
+                self._apply(tx_id, previous, -1)
+            self._transactions[tx_id] = entry
+            self._apply(tx_id, entry, 1)
+            return True
+
+    def remove(self, tx_id):
+        tx_id = str(tx_id)
+        with self._lock:
+            previous = self._transactions.pop(tx_id, None)
+            if previous is not None:
+                self._apply(tx_id, previous, -1)
+            return previous is not None
+
+    def sync(self, records):
+        """Reconcile with the account's current categorized transactions; True if anything changed."""
+        seen = set()
+        changed = False
+        for tx in records:
+            tx_id = tx.get('id')
+            if tx_id is None:
+                continue
+            seen.add(str(tx_id))
+            changed |= self.upsert(tx_id, tx.get('description'), round(float(tx.get('amount') or 0) * 100),
+                                   tx.get('category'))
+        with self._lock:
+            stale = [tx_id for tx_id in self._transactions if tx_id not in seen]
+        for tx_id in stale:
+            changed |= self.remove(tx_id)
+        return changed
+
+    def transactions(self, merchant_id):
+        with self._lock:
+            return sorted(self._by_merchant.get(merchant_id, ()))
+
+    def spend(self, category=None, limit=None):
+        """Merchants ordered by total spend (optionally for one category), largest first."""
+        rows = []
+        with self._lock:
+            for merchant_id, totals in self._totals.items():
+                if category and category not in totals:
+                    continue
+                cents = totals[category] if category else sum(totals.values())
+                rows.append({
+                    "merchantId": merchant_id,
+                    "merchant": self._directory.name(merchant_id),
+                    "total": cents / 100.0,
+                    "byCategory": {c: v / 100.0 for c, v in totals.items()},
+                    "transactionCount": len(self._by_merchant.get(merchant_id, ())),
+                })
+        rows.sort(key=lambda r: (-r['total'], r['merchant']))
+        return rows[:limit] if limit else rows
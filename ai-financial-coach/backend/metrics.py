@@ -0,0 +1,256 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+
+# Latency buckets in seconds, tuned for a mix of local work and slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upstream spans recorded while serving the current request: [(upstream, seconds), ...]
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.extend(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., +Inf count], sum
+                state = [[0] * (len(self.buckets) + 1), 0.0]
+                self._values[key] = state
+            state[0][index] += 1
+            state[1] += value
+
+    def _render_sample(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = ('le', _format_value(bound))
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [le])} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Time spent serving HTTP requests.', ('method', 'route'))
+REQUEST_COUNT = registry.counter(
+    'http_requests_total', 'HTTP requests served, by status code.', ('method', 'route', 'status'))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'HTTP requests currently being served.', ('route',))
+REQUEST_UPSTREAM_TIME = registry.histogram(
+    'http_request_upstream_seconds', 'Per-request time spent waiting on each upstream.', ('route', 'upstream'))
+REQUEST_SELF_TIME = registry.histogram(
+    'http_request_self_seconds', 'Per-request time not attributed to any upstream call.', ('route',))
+UPSTREAM_LATENCY = registry.histogram(
+    'upstream_request_duration_seconds', 'Latency of individual upstream calls.', ('upstream', 'operation', 'outcome'))
+
+
+@contextmanager
+def upstream_span(upstream, operation):
+    """
+    Time one call to an upstream service (nessie, gemini, mediastack).
+
+    The duration is recorded in the upstream latency histogram and, when called
+    while serving a request, attributed to that request's route.
+    """
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_LATENCY.observe(elapsed, upstream=upstream, operation=operation, outcome=outcome)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((upstream, elapsed))
+
+
+def _route_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_route = _route_label()
+    g._metrics_spans_token = _request_spans.set([])
+    REQUESTS_IN_FLIGHT.inc(route=g._metrics_route)
+
+
+def _after_request(response):
+    start = getattr(g, '_metrics_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    route = g._metrics_route
+    REQUEST_LATENCY.observe(elapsed, method=request.method, route=route)
+    REQUEST_COUNT.inc(method=request.method, route=route, status=response.status_code)
+
+    per_upstream = {}
+    for upstream, seconds in _request_spans.get() or []:
+        per_upstream[upstream] = per_upstream.get(upstream, 0.0) + seconds
+    for upstream, seconds in per_upstream.items():
+        REQUEST_UPSTREAM_TIME.observe(seconds, route=route, upstream=upstream)
+    self_time = max(0.0, elapsed - sum(per_upstream.values()))
+    REQUEST_SELF_TIME.observe(self_time, route=route)
+
+    timings = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sorted(per_upstream.items())]
+    timings.append(f"app;dur={self_time * 1000:.1f}")
+    response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+
+def _teardown_request(exc):
+    route = getattr(g, '_metrics_route', None)
+    if route is not None:
+        REQUESTS_IN_FLIGHT.dec(route=route)
+    token = getattr(g, '_metrics_spans_token', None)
+    if token is not None:
+        try:
+            _request_spans.reset(token)
+        except ValueError:
+            # Token created in a different context (e.g. streamed response); nothing to reset
+            pass
+
+
+def metrics_view():
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(app):
+    """Register request instrumentation hooks and the /metrics endpoint on a Flask app."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
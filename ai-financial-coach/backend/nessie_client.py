@@ -3,24 +3,43 @@ import json
 import os
 import uuid
 import logging
-from dotenv import load_dotenv
+from datetime import date, datetime
+from config import load_env
+from metrics import upstream_span
+from deadline import current as current_deadline, timeout_for
 
-load_dotenv()
+load_env()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Timeout for Nessie calls that do not set their own
+NESSIE_TIMEOUT_SECONDS = float(os.getenv('NESSIE_TIMEOUT_SECONDS', '10'))
+
 
 class NessieClient:
     def __init__(self):
         self.api_key = os.getenv('NESSIE_API_KEY')
         self.base_url = 'http://api.nessieisreal.com'
+
+    def _request(self, method, path, operation, **kwargs):
+        """Issue an HTTP request against the Nessie API, recorded as an upstream span"""
+        # Every call gets a timeout, shortened to whatever is left of the request's deadline
+        kwargs['timeout'] = timeout_for(kwargs.get('timeout') or NESSIE_TIMEOUT_SECONDS, f"nessie.{operation}")
+        try:
+            with upstream_span('nessie', operation):
+                return requests.request(method, f"{self.base_url}{path}", **kwargs)
+        except requests.exceptions.Timeout as e:
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired:
+                raise deadline.exceeded(f"nessie.{operation}") from e
+            raise
         
     def _test_api_connection(self):
         """Test if the Nessie API is accessible"""
         try:
-            response = requests.get(f"{self.base_url}/customers?key={self.api_key}", timeout=5)
+            response = self._request('GET', f"/customers?key={self.api_key}", 'probe', timeout=5)
             return response.status_code == 200
         except:
             return False
@@ -45,8 +64,10 @@ class NessieClient:
                 }
             }
             
-            customer_response = requests.post(
-                f"{self.base_url}/customers?key={self.api_key}",
+            customer_response = self._request(
+                'POST',
+                f"/customers?key={self.api_key}",
+                'create_customer',
                 json=customer_data,
                 headers={'Content-Type': 'application/json'}
             )
@@ -64,8 +85,10 @@ class NessieClient:
                 "balance": 1000
             }
             
-            account_response = requests.post(
-                f"{self.base_url}/customers/{customer_id}/accounts?key={self.api_key}",
+            account_response = self._request(
+                'POST',
+                f"/customers/{customer_id}/accounts?key={self.api_key}",
+                'create_account',
                 json=account_data,
                 headers={'Content-Type': 'application/json'}
             )
@@ -96,7 +119,7 @@ class NessieClient:
                 raise RuntimeError("Nessie API not accessible for seeding")
             
             # Get valid merchant IDs first
-            merchants_response = requests.get(f"{self.base_url}/merchants?key={self.api_key}")
+            merchants_response = self._request('GET', f"/merchants?key={self.api_key}", 'list_merchants')
             valid_merchants = []
             if merchants_response.status_code == 200:
                 merchants = merchants_response.json()
@@ -168,8 +191,10 @@ class NessieClient:
             
             # Create transactions
             for transaction in sample_transactions:
-                response = requests.post(
-                    f"{self.base_url}/accounts/{account_id}/purchases?key={self.api_key}",
+                response = self._request(
+                    'POST',
+                    f"/accounts/{account_id}/purchases?key={self.api_key}",
+                    'create_purchase',
                     json=transaction,
                     headers={'Content-Type': 'application/json'}
                 )
@@ -187,7 +212,7 @@ class NessieClient:
             if not self._test_api_connection():
                 raise RuntimeError("Nessie API not accessible for fetching transactions")
             
-            response = requests.get(f"{self.base_url}/accounts/{account_id}/purchases?key={self.api_key}")
+            response = self._request('GET', f"/accounts/{account_id}/purchases?key={self.api_key}", 'list_purchases')
             
             if response.status_code != 200:
                 raise RuntimeError(f"Failed to get transactions: {response.status_code}")
@@ -203,12 +228,26 @@ class NessieClient:
             logger.error(f"Error getting transactions: {e}")
             raise
 
-    def delete_transaction(self, account_id, purchase_id):
-        """Delete a purchase by its ID if supported by Nessie"""
+    def list_accounts(self):
+        """Return the ids of every account visible to this API key"""
         try:
-            if not self._test_api_connection():
+            response = self._request('GET', f"/accounts?key={self.api_key}", 'list_accounts', timeout=30)
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to list accounts: {response.status_code}")
+            return [a.get('_id') for a in response.json() if isinstance(a, dict) and a.get('_id')]
+        except Exception as e:
+            logger.error(f"Error listing accounts: {e}")
+            return []
+
+    def delete_transaction(self, account_id, purchase_id, check_connection=True):
+        """Delete a purchase by its ID if supported by Nessie
+
+        Batch callers probe the API once themselves and pass check_connection=False.
+        """
+        try:
+            if check_connection and not self._test_api_connection():
                 raise RuntimeError("Nessie API not accessible for deletion")
-            response = requests.delete(f"{self.base_url}/accounts/{account_id}/purchases/{purchase_id}?key={self.api_key}")
+            response = self._request('DELETE', f"/accounts/{account_id}/purchases/{purchase_id}?key={self.api_key}", 'delete_purchase')
             if response.status_code in (200, 204):
                 return True
             else:
@@ -257,7 +296,7 @@ class NessieClient:
             # include a short descriptor (mimics merchant + optional note)
             descriptor = merchant + (" Store" if random.random() < 0.3 else "")
 
-            # random past date for realism (not used by analyzer now, but helpful)
+            # random past date; kept through normalization for time-bucketed rollups
             days_ago = random.randint(1, 60)
             date = (datetime.utcnow() - timedelta(days=days_ago)).isoformat()
 
@@ -265,14 +304,28 @@ class NessieClient:
 
         return transactions
 
+    @staticmethod
+    def _normalize_date(value):
+        """Return an ISO 'YYYY-MM-DD' string for a date/datetime/ISO string, or None"""
+        if isinstance(value, (date, datetime)):
+            return value.strftime('%Y-%m-%d')
+        if isinstance(value, str) and len(value) >= 10:
+            try:
+                return date.fromisoformat(value[:10]).isoformat()
+            except ValueError:
+                return None
+        return None
+
     def _normalize_tx(self, tx, source='mock'):
-        """Return transaction in standard shape: {id, description, amount, source}"""
-        # Nessie returns objects with '_id', 'description', 'amount' or similar
+        """Return transaction in standard shape: {id, description, amount, date, source}"""
+        # Nessie returns objects with '_id', 'description', 'amount', 'purchase_date' or similar
         tx_id = None
+        tx_date = None
         if isinstance(tx, dict):
             tx_id = tx.get('_id') or tx.get('id')
             description = tx.get('description') or tx.get('merchant') or ''
             amount = tx.get('amount') or tx.get('purchase_amount') or 0
+            tx_date = self._normalize_date(tx.get('date') or tx.get('purchase_date') or tx.get('transaction_date'))
         else:
             description = ''
             amount = 0
@@ -289,6 +342,7 @@ class NessieClient:
             'id': tx_id,
             'description': description,
             'amount': amount,
+            'date': tx_date,
             'source': source
         }
 
@@ -305,13 +359,21 @@ class NessieClient:
                 'amount': tx.get('amount', 0),
                 'description': tx.get('description', '')
             }
-            response = requests.post(
-                f"{self.base_url}/accounts/{account_id}/purchases?key={self.api_key}",
+            tx_date = self._normalize_date(tx.get('date'))
+            if tx_date:
+                payload['purchase_date'] = tx_date
+            response = self._request(
+                'POST',
+                f"/accounts/{account_id}/purchases?key={self.api_key}",
+                'create_purchase',
                 json=payload,
                 headers={'Content-Type': 'application/json'}
             )
             if response.status_code in (200, 201):
                 created = response.json()
+                # Nessie wraps the new purchase in 'objectCreated'
+                if isinstance(created, dict) and isinstance(created.get('objectCreated'), dict):
+                    created = created['objectCreated']
                 return self._normalize_tx(created, source='nessie')
             else:
                 logger.warning(f"Failed to create transaction: {response.status_code}")
@@ -0,0 +1,188 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import time
+import uuid
+
+from flask import g, jsonify, request, send_file
+
+from config import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# Profiling is only available when a token is configured; without it no hooks are installed
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+PROFILE_MAX_AGE_SECONDS = int(os.getenv('PROFILE_MAX_AGE_SECONDS', str(7 * 24 * 3600)))
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_HEADER = 'X-Profile-Token'
+# cProfile only sees the thread it is enabled in. Work done elsewhere for the request (Deadline.call
+# and hedging pools, dashboard sections, a SingleFlight call led by another request) shows up only
+# as the time the request thread spent waiting for it.
+PROFILE_SCOPE = 'request-thread'
+
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _authorized():
+    supplied = request.headers.get(TOKEN_HEADER) or ''
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(supplied.encode('utf-8'), PROFILE_TOKEN.encode('utf-8'))
+
+
+def _profiling_requested():
+    flag = request.headers.get(PROFILE_HEADER) or request.args.get('profile')
+    return str(flag or '').lower() in ('1', 'true', 'yes')
+
+
+def _route_slug():
+    rule = request.url_rule.rule if request.url_rule is not None else request.path
+    return re.sub(r'[^A-Za-z0-9]+', '_', rule).strip('_') or 'root'
+
+
+class ProfileStore:
+    """
+    Directory of per-request profiles with count and age based retention.
+
+    Each profile is saved twice: a binary pstats dump (load with
+    pstats.Stats or snakeviz) and a plain-text call tree for quick reading.
+    """
+
+    def __init__(self, directory, max_files=PROFILE_MAX_FILES, max_age_seconds=PROFILE_MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_age_seconds = max_age_seconds
+
+    def save(self, profiler, route_slug, duration):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(time.time() * 1000)}-{route_slug}-{uuid.uuid4().hex[:8]}"
+        profiler.dump_stats(os.path.join(self.directory, name + '.prof'))
+
+        buf = io.StringIO()
+        buf.write(f"route: {route_slug}\nduration_ms: {duration * 1000:.1f}\nscope: {PROFILE_SCOPE} "
+                  f"(work run on worker pools is not broken down, only waited on)\n\n")
+        stats = pstats.Stats(profiler, stream=buf).strip_dirs().sort_stats('cumulative')
+        stats.print_stats(40)
+        stats.print_callees(25)
+        with open(os.path.join(self.directory, name + '.txt'), 'w', encoding='utf-8') as f:
+            f.write(buf.getvalue())
+
+        self.prune()
+        return name
+
+    def _entries(self):
+        try:
+            files = [f for f in os.listdir(self.directory) if f.endswith('.prof')]
+        except FileNotFoundError:
+            return []
+        entries = []
+        for f in files:
+            path = os.path.join(self.directory, f)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, f[:-len('.prof')], st.st_size))
+        entries.sort(reverse=True)
+        return entries
+
+    def prune(self):
+        cutoff = time.time() - self.max_age_seconds
+        for index, (mtime, name, _size) in enumerate(self._entries()):
+            if index >= self.max_files or mtime < cutoff:
+                for ext in ('.prof', '.txt'):
+                    try:
+                        os.remove(os.path.join(self.directory, name + ext))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self, limit=50):
+        out = []
+        for mtime, name, size in self._entries()[:limit]:
+            route = name.split('-', 2)[1] if name.count('-') >= 2 else ''
+            out.append({'id': name, 'route': route, 'createdAt': mtime, 'bytes': size})
+        return out
+
+    def path_for(self, profile_id, ext):
+        if not _SAFE_NAME.match(profile_id or ''):
+            return None
+        path = os.path.join(self.directory, profile_id + ext)
+        return path if os.path.isfile(path) else None
+
+
+store = ProfileStore(PROFILE_DIR)
+
+
+def _before_request():
+    """Profile this request on its own thread; see PROFILE_SCOPE for what is left out."""
+    if not _profiling_requested() or not _authorized():
+        return
+    profiler = cProfile.Profile()
+    g._profiler = profiler
+    g._profile_start = time.perf_counter()
+    profiler.enable()
+
+
+def _after_request(response):
+    profiler = getattr(g, '_profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    g._profiler = None
+    try:
+        duration = time.perf_counter() - g._profile_start
+        response.headers['X-Profile-Id'] = store.save(profiler, _route_slug(), duration)
+        response.headers['X-Profile-Scope'] = PROFILE_SCOPE
+    except Exception as e:
+        logger.error(f"Failed to save request profile: {e}")
+    return response
+
+
+def _teardown_request(exc):
+    # The request failed before after_request ran; make sure the profiler is detached
+    profiler = getattr(g, '_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+
+def list_profiles():
+    """List recent request profiles (admin only)."""
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 403
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        limit = 50
+    return jsonify({"profiles": store.list(limit=max(1, limit)), "directory": store.directory})
+
+
+def get_profile(profile_id):
+    """Download one profile: text call tree by default, ?format=prof for the pstats dump."""
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 403
+    binary = request.args.get('format') == 'prof'
+    path = store.path_for(profile_id, '.prof' if binary else '.txt')
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    if binary:
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True)
+    return send_file(path, mimetype='text/plain')
+
+
+def init_app(app):
+    """Install the opt-in profiling hooks; a no-op unless PROFILE_TOKEN is set."""
+    if not PROFILE_TOKEN:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/api/admin/profiles', 'list_profiles', list_profiles, methods=['GET'])
+    app.add_url_rule('/api/admin/profiles/<profile_id>', 'get_profile', get_profile, methods=['GET'])
+    logger.info(f"Request profiling enabled; profiles are written to {store.directory}")
@@ -0,0 +1,231 @@
+import bisect
+import math
+import threading
+from datetime import date, timedelta
+
+from merchants import directory as merchant_directory
+
+
+# Charge cadences recognised as recurring: name -> (min, max) mean interval in days
+CADENCES = (
+    ('weekly', 6, 8),
+    ('biweekly', 13, 15),
+    ('monthly', 27, 33),
+    ('quarterly', 85, 95),
+    ('yearly', 355, 375),
+)
+
+MIN_OCCURRENCES = 3
+# Maximum coefficient of variation of the gaps between charges, and of the charged amounts
+MAX_INTERVAL_CV = 0.2
+MAX_AMOUNT_CV = 0.25
+
+
+def _day(value):
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return None
+    return None
+
+
+class _Welford:
+    """Running mean/variance that also supports removing a sample."""
+
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean = (self.n * self.mean - x) / (self.n - 1)
+        self.n -= 1
+        self.m2 = max(0.0, self.m2 - delta * (x - self.mean))
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.n) if self.n else 0.0
+
+    @property
+    def cv(self):
+        return self.std / self.mean if self.mean else float('inf')
+
+
+class _MerchantSeries:
+    """Charge days of one merchant plus running statistics of the gaps and amounts."""
+
+    __slots__ = ('days', 'intervals', 'amounts')
+
+    def __init__(self):
+        self.days = []
+        self.intervals = _Welford()
+        self.amounts = _Welford()
+
+    def add(self, day, cents):
+        days = self.days
+        i = bisect.bisect_right(days, day)
+        prev = days[i - 1] if i > 0 else None
+        nxt = days[i] if i < len(days) else None
+        # An out-of-order charge splits one existing gap into two
+        if prev is not None and nxt is not None:
+            self.intervals.remove(nxt - prev)
+        if prev is not None:
+            self.intervals.add(day - prev)
+        if nxt is not None:
+            self.intervals.add(nxt - day)
+        days.insert(i, day)
+        self.amounts.add(cents)
+
+    def remove(self, day, cents):
+        days = self.days
+        i = bisect.bisect_left(days, day)
+        if i >= len(days) or days[i] != day:
+            return
+        prev = days[i - 1] if i > 0 else None
+        nxt = days[i + 1] if i + 1 < len(days) else None
+        if prev is not None:
+            self.intervals.remove(day - prev)
+        if nxt is not None:
+            self.intervals.remove(nxt - day)
+        if prev is not None and nxt is not None:
+            self.intervals.add(nxt - prev)
+        del days[i]
+        self.amounts.remove(cents)
+
+    def cadence(self):
+        if len(self.days) < MIN_OCCURRENCES:
+            return None
+        if self.intervals.cv > MAX_INTERVAL_CV or self.amounts.cv > MAX_AMOUNT_CV:
+            return None
+        mean = self.intervals.mean
+        for name, low, high in CADENCES:
+            if low <= mean <= high:
+                return name
+        return None
+
+
+class RecurringDetector:
+    """
+    Streaming recurring-charge / subscription detector for one account.
+
+    Every ingested transaction updates only its merchant's series: appending
+    in date order is amortized O(1), an out-of-order charge costs a binary
+    search. A merchant's recurring status is re-evaluated on each update, so
+    recurring() never rescans the transaction history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # tx_id -> (merchant_id, day ordinal, amount_cents); also dedups re-ingested transactions
+        self._seen = {}
+        self._series = {}
+        # merchant_id -> cadence name, for merchants currently detected as recurring
+        self._recurring = {}
+        self.undated = 0
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _refresh(self, merchant_id):
+        series = self._series.get(merchant_id)
+        cadence = series.cadence() if series else None
+        if cadence:
+            self._recurring[merchant_id] = cadence
+        else:
+            self._recurring.pop(merchant_id, None)
+        if series is not None and not series.days:
+            del self._series[merchant_id]
+
+    def ingest(self, tx):
+        """Add one transaction dict ({id, description, amount, date}); returns False if already seen."""
+        tx_id = tx.get('id')
+        if tx_id is None:
+            return False
+        tx_id = str(tx_id)
+        day = _day(tx.get('date'))
+        with self._lock:
+            if tx_id in self._seen:
+                return False
+            if day is None:
+                self.undated += 1
+                self._seen[tx_id] = None
+                return True
+            merchant_id = merchant_directory.id_for(tx.get('description') or '')
+            cents = int(round(float(tx.get('amount') or 0) * 100))
+            self._seen[tx_id] = (merchant_id, day, cents)
+            self._series.setdefault(merchant_id, _MerchantSeries()).add(day, cents)
+            self._refresh(merchant_id)
+            return True
+
+    def remove(self, tx_id):
+        with self._lock:
+            tx_id = str(tx_id)
+            if tx_id not in self._seen:
+                return False
+            entry = self._seen.pop(tx_id)
+            if entry is None:
+                self.undated -= 1
+                return True
+            merchant_id, day, cents = entry
+            series = self._series.get(merchant_id)
+            if series is not None:
+                series.remove(day, cents)
+                self._refresh(merchant_id)
+            return True
+
+    def sync(self, records):
+        """Ingest unseen transactions and drop ones that are gone; unchanged ones cost a set lookup.
+
+        Returns True if any transaction was added or dropped.
+        """
+        current = set()
+        changed = False
+        for tx in records:
+            if tx.get('id') is None:
+                continue
+            current.add(str(tx.get('id')))
+            changed |= self.ingest(tx)
+        with self._lock:
+            stale = [tx_id for tx_id in self._seen if tx_id not in current]
+        for tx_id in stale:
+            changed |= self.remove(tx_id)
+        return changed
+
+    def recurring(self):
+        """Merchants currently detected as recurring, most expensive per year first."""
+        rows = []
+        with self._lock:
+            for merchant_id, cadence in self._recurring.items():
+                series = self._series[merchant_id]
+                interval = series.intervals.mean
+                last = date.fromordinal(series.days[-1])
+                average = series.amounts.mean / 100.0
+                rows.append({
+                    "merchantId": merchant_id,
+                    "merchant": merchant_directory.name(merchant_id),
+                    "cadence": cadence,
+                    "occurrences": len(series.days),
+                    "intervalDays": round(interval, 1),
+                    "intervalStdDays": round(series.intervals.std, 1),
+                    "averageAmount": round(average, 2),
+                    "lastDate": last.isoformat(),
+                    "nextExpectedDate": (last + timedelta(days=round(interval))).isoformat(),
+                    "estimatedAnnualCost": round(average * 365.0 / interval, 2) if interval else None,
+                })
+        rows.sort(key=lambda r: -(r['estimatedAnnualCost'] or 0))
+        return rows
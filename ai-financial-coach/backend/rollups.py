@@ -0,0 +1,157 @@
+import threading
+from datetime import date, timedelta
+
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Guard against accidentally asking for decades of daily buckets
+MAX_BUCKETS_PER_QUERY = 3660
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def bucket_start(day, granularity):
+    """First day of the bucket containing `day` (weeks start on Monday)."""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def next_bucket(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+class SpendingRollups:
+    """
+    Per-day, per-week and per-month spend totals by category for one account.
+
+    Totals are maintained incrementally: upsert() and remove() adjust only the
+    three buckets a transaction falls into, and a range query reads one dict
+    entry per bucket instead of rescanning the transaction history.
+    Amounts are kept in integer cents.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # tx_id -> (date, amount_cents, category)
+        self._transactions = {}
+        # granularity -> {bucket_start: {category: cents}}
+        self._buckets = {g: {} for g in GRANULARITIES}
+        self.undated = 0
+
+    def __len__(self):
+        return len(self._transactions)
+
+    def _apply(self, entry, sign):
+        day, cents, category = entry
+        if day is None:
+            self.undated += sign
+            return
+        for granularity in GRANULARITIES:
+            key = bucket_start(day, granularity)
+            totals = self._buckets[granularity].setdefault(key, {})
+            value = totals.get(category, 0) + sign * cents
+            if value:
+                totals[category] = value
+            else:
+                totals.pop(category, None)
+                if not totals:
+                    del self._buckets[granularity][key]
+
+    def upsert(self, tx_id, tx_date, amount_cents, category):
+        """Add a transaction, or move it if its date, amount or category changed; True if it did either."""
+        entry = (_parse_date(tx_date), int(amount_cents), category or 'Uncategorized')
+        tx_id = str(tx_id)
+        with self._lock:
+            previous = self._transactions.get(tx_id)
+            if previous == entry:
+                return False
+            if previous is not None:
+                self._apply(previous, -1)
+            self._transactions[tx_id] = entry
+            self._apply(entry, 1)
+            return True
+
+    def remove(self, tx_id):
+        with self._lock:
+            previous = self._transactions.pop(str(tx_id), None)
+            if previous is not None:
+                self._apply(previous, -1)
+            return previous is not None
+
+    def sync(self, records):
+        """Reconcile with the account's current categorized transactions; True if any bucket changed.
+
+        Unchanged transactions are no-ops; only new, changed and vanished ones
+        touch the buckets.
+        """
+        seen = set()
+        changed = False
+        for tx in records:
+            tx_id = tx.get('id')
+            if tx_id is None:
+                continue
+            seen.add(str(tx_id))
+            changed |= self.upsert(tx_id, tx.get('date'), round(float(tx.get('amount') or 0) * 100), tx.get('category'))
+        with self._lock:
+            stale = [tx_id for tx_id in self._transactions if tx_id not in seen]
+        for tx_id in stale:
+            changed |= self.remove(tx_id)
+        return changed
+
+    def query(self, granularity, start, end, category=None):
+        """
+        Return one row per bucket between start and end (inclusive), including
+        empty buckets so charts get a continuous axis.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        start, end = _parse_date(start), _parse_date(end)
+        if start is None or end is None:
+            raise ValueError("start and end must be YYYY-MM-DD dates")
+        if end < start:
+            raise ValueError("end must not be before start")
+
+        rows = []
+        key = bucket_start(start, granularity)
+        buckets = self._buckets[granularity]
+        with self._lock:
+            while key <= end:
+                if len(rows) >= MAX_BUCKETS_PER_QUERY:
+                    raise ValueError(f"range spans more than {MAX_BUCKETS_PER_QUERY} buckets")
+                totals = buckets.get(key, {})
+                if category:
+                    totals = {category: totals.get(category, 0)}
+                rows.append({
+                    "bucket": key.isoformat(),
+                    "totals": {c: cents / 100.0 for c, cents in totals.items()},
+                    "total": sum(totals.values()) / 100.0,
+                })
+                key = next_bucket(key, granularity)
+        return rows
+
+    def date_range(self):
+        """(first, last) transaction dates tracked, or (None, None)."""
+        days = self._buckets['day']
+        if not days:
+            return None, None
+        return min(days), max(days)
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SeenWindow:
+    """
+    Bounded, decaying set of recently seen keys.
+
+    Keys are kept in last-seen order; adding one past `capacity` evicts the
+    least recently seen, and a key not seen again for `ttl_seconds` expires.
+    Membership is an O(1) dict lookup and expired keys are dropped lazily
+    from the old end, so the window never grows past `capacity`.
+    """
+
+    def __init__(self, capacity=60, ttl_seconds=86400, clock=time.time):
+        self.capacity = max(1, capacity)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()
+
+    def _expire(self, now):
+        cutoff = now - self.ttl_seconds
+        seen = self._seen
+        while seen:
+            key, stamp = next(iter(seen.items()))
+            if stamp > cutoff:
+                break
+            seen.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._seen)
+
+    def __contains__(self, key):
+        stamp = self._seen.get(key)
+        return stamp is not None and stamp > self._clock() - self.ttl_seconds
+
+    def add(self, keys):
+        now = self._clock()
+        with self._lock:
+            for key in keys:
+                if not key:
+                    continue
+                self._seen[key] = now
+                self._seen.move_to_end(key)
+            while len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+            self._expire(now)
+
+    def recent(self, limit=None):
+        """Unexpired keys, most recently seen first."""
+        with self._lock:
+            self._expire(self._clock())
+            keys = list(reversed(self._seen))
+        return keys if limit is None else keys[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
@@ -0,0 +1,142 @@
+import logging
+import os
+from functools import wraps
+
+from flask import g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from config import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# auto (orjson when installed), orjson, or json (the standard library, Flask's default)
+JSON_SERIALIZER = os.getenv('JSON_SERIALIZER', 'auto').lower()
+# Query parameter selecting the fields of a response, e.g. ?fields=needsTotal,categorizedTransactions.amount
+FIELDS_PARAM = 'fields'
+# Kept by every projection so clients still see why a request failed
+ALWAYS_KEPT = ('error',)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def parse_fields(spec):
+    """
+    Projection tree from "a,b.c,b.d": {'a': None, 'b': {'c': None, 'd': None}}.
+
+    None means the whole value; a parent also listed on its own wins over its children.
+    """
+    tree = {}
+    for path in (spec or '').split(','):
+        parts = [p.strip() for p in path.split('.') if p.strip()]
+        node = tree
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None
+                break
+            child = node.get(part, {})
+            if child is None:
+                break
+            node = node.setdefault(part, child)
+    return tree
+
+
+def _project(value, tree):
+    if isinstance(value, list):
+        if all(sub is None for sub in tree.values()):
+            # Leaf fields only (the common case for long lists): one dict comprehension per item
+            keys = tuple(tree)
+            return [{k: item[k] for k in keys if k in item} if isinstance(item, dict) else item for item in value]
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: value[key] if sub is None else _project(value[key], sub)
+                for key, sub in tree.items() if key in value}
+    return value
+
+
+def project(value, tree):
+    """Keep only the fields in `tree`; lists are projected element by element."""
+    if not tree:
+        return value
+    out = _project(value, tree)
+    if isinstance(value, dict):
+        for key in ALWAYS_KEPT:
+            if key in value and key not in out:
+                out[key] = value[key]
+    return out
+
+
+def projectable(view):
+    """
+    Route decorator: honour ?fields= on the JSON the view returns.
+
+    The projection is applied while serializing, so views build their
+    payloads as usual.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        spec = request.args.get(FIELDS_PARAM)
+        g.json_fields = parse_fields(spec) if spec else None
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _use_orjson():
+    if JSON_SERIALIZER == 'json':
+        return False
+    if orjson is None:
+        if JSON_SERIALIZER == 'orjson':
+            logger.warning("JSON_SERIALIZER=orjson but orjson is not installed; using the standard library")
+        return False
+    return True
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is available.
+
+    Output matches the default provider's (sorted keys, dates as HTTP dates
+    through `default`), except that non-ASCII text is written as UTF-8
+    rather than \\u escapes. Unlike the default provider, responses stay
+    compact in debug mode, which is how the app is normally run; set
+    `compact = False` for indented output. Indented output and dumps() calls
+    with extra json.dumps arguments go through the standard library.
+    """
+
+    compact = True
+
+    def __init__(self, app, use_orjson=None):
+        super().__init__(app)
+        self.use_orjson = _use_orjson() if use_orjson is None else use_orjson
+        if self.use_orjson:
+            self._options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                             | orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def dumps_bytes(self, obj):
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options)
+            except TypeError:
+                # e.g. integers beyond 64 bits; the standard library handles anything Flask does
+                pass
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or not self.use_orjson:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        fields = g.get('json_fields') if has_app_context() else None
+        if fields:
+            obj = project(obj, fields)
+        if self.compact is False:
+            body = f"{super().dumps(obj, indent=2)}\n".encode('utf-8')
+        else:
+            body = self.dumps_bytes(obj) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,50 @@
+import copy
+import os
+import sys
+
+import pytest
+
+# Run from backend/ or the repository root alike
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+import gemini_client  # noqa: E402
+from benchmarks.stubs import StubGeminiClient, StubMediastackClient, StubNessieClient  # noqa: E402
+from historical_savings import HistoricalSavingsStore  # noqa: E402
+from local_categorizer import LocalCategorizer  # noqa: E402
+
+# Module-level per-account state in app.py, replaced by empty containers for every test
+PER_ACCOUNT_STATE = ('analysis_versions', 'spending_rollups', 'merchant_indexes',
+                     'transaction_indexes', 'recurring_detectors')
+
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    """app.py with stubbed Nessie/Gemini/Mediastack, nothing written under backend/data and no rate limits."""
+    monkeypatch.setattr(app_module, 'nessie_client', StubNessieClient(transactions_per_account=40))
+    monkeypatch.setattr(app_module, 'gemini_client', StubGeminiClient())
+    monkeypatch.setattr(app_module, 'mediastack_client', StubMediastackClient())
+    monkeypatch.setattr(app_module, 'local_categorizer', LocalCategorizer())
+    monkeypatch.setattr(app_module, 'savings_history', HistoricalSavingsStore(str(tmp_path / 'history')))
+    monkeypatch.setattr(gemini_client, 'limiters', gemini_client.ModelLimiters(default_per_minute=0))
+    for name in PER_ACCOUNT_STATE:
+        monkeypatch.setattr(app_module, name, {})
+    monkeypatch.setattr(app_module, 'analyzed_accounts', set())
+
+    session = copy.deepcopy(app_module.user_session_state)
+    app_module.analysis_cache.invalidate()
+    yield app_module
+    app_module.analysis_cache.invalidate()
+    app_module.user_session_state.clear()
+    app_module.user_session_state.update(session)
+
+
+@pytest.fixture
+def client(backend):
+    """Test client for an onboarded session account whose first analysis has run."""
+    client = backend.app.test_client()
+    response = client.post('/api/onboard')
+    assert response.status_code == 200, response.get_json()
+    # The first analysis fills the per-account indexes and history, moving their version
+    assert client.get('/api/analysis').status_code == 200
+    return client
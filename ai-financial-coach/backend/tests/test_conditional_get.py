@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+# Routes whose body is derived from the account's last analysis; their ETags follow its version
+ANALYSIS_DERIVED_ROUTES = (
+    # The default window ends today; the stub's purchases are from 2025
+    '/api/spending/rollups?start=2025-01-01&end=2026-12-31',
+    '/api/spending/merchants',
+    '/api/transactions',
+    '/api/transactions/summary',
+    '/api/recurring',
+    '/api/savings-history',
+)
+CACHED_ROUTES = ('/api/analysis', '/api/stocks/saved', '/api/credit-cards') + ANALYSIS_DERIVED_ROUTES
+
+# Filed under the keyword fallback when added, relabelled Need by the (stub) model on the next analysis
+RELABELLED = 'Walmart Neighborhood Market'
+# Three monthly charges the recurring detector picks up
+SUBSCRIPTION = [{'_id': f'streaming_{month}', 'description': 'Streamflix Premium', 'amount': 15.49,
+                 'purchase_date': f'2025-{month:02d}-05'} for month in (7, 8, 9)]
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+
+@pytest.mark.parametrize('url', CACHED_ROUTES)
+def test_unchanged_state_answers_304(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag'].strip('"')
+
+    again = revalidate(client, url, etag)
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'].strip('"') == etag
+
+
+@pytest.mark.parametrize('url', CACHED_ROUTES)
+def test_adding_a_transaction_revalidates(client, url):
+    etag = client.get(url).headers['ETag']
+    assert client.post('/api/add-transaction', json={'description': 'Corner Cafe', 'amount': 4.5}).status_code == 200
+
+    assert revalidate(client, url, etag).status_code == 200
+
+
+def test_saving_a_stock_revalidates_saved_stocks(client):
+    etag = client.get('/api/stocks/saved').headers['ETag']
+    assert client.post('/api/stocks/save', json={'stocks': [{'symbol': 'AAPL', 'name': 'Apple Inc.'}]}).status_code == 200
+
+    response = revalidate(client, '/api/stocks/saved', etag)
+    assert response.status_code == 200
+    assert [s['symbol'] for s in response.get_json()['saved']] == ['AAPL']
+
+
+@pytest.mark.parametrize('url', ANALYSIS_DERIVED_ROUTES)
+def test_analysis_of_new_upstream_transactions_revalidates(backend, client, url):
+    before = client.get(url)
+    etag = before.headers['ETag']
+
+    # New purchases at the bank reach the app only through the next analysis, not a mutating route
+    backend.nessie_client._account_purchases(backend.user_session_state['account_id']).extend(SUBSCRIPTION)
+    backend.analysis_cache.invalidate()
+    client.get('/api/analysis')
+
+    after = revalidate(client, url, etag)
+    assert after.status_code == 200
+    assert after.get_json() != before.get_json()
+
+
+# Recurring charges do not depend on the Need/Want label
+@pytest.mark.parametrize('url', [url for url in ANALYSIS_DERIVED_ROUTES if not url.startswith('/api/recurring')])
+def test_analysis_that_relabels_a_transaction_revalidates(backend, client, url):
+    assert backend._fallback_category(RELABELLED) == 'Want'
+    client.post('/api/add-transaction', json={'description': RELABELLED, 'amount': 77.77})
+    before = client.get(url)
+    etag = before.headers['ETag']
+    assert revalidate(client, url, etag).status_code == 304
+
+    # Nothing bumps the state version here: only the analysis re-labels the new transaction
+    client.get('/api/analysis')
+
+    after = revalidate(client, url, etag)
+    assert after.status_code == 200
+    assert after.get_json() != before.get_json()
+
+
+def test_background_refresh_revalidates_only_analysis_routes(backend, client, monkeypatch):
+    etags = {url: client.get(url).headers['ETag']
+             for url in ('/api/analysis', '/api/stocks/saved', '/api/credit-cards')}
+    version = backend._analysis_version(backend.user_session_state['account_id'])
+    before = version.current
+
+    # Served from the cache, which now counts as stale and refreshes in the background
+    monkeypatch.setattr(backend.analysis_cache, 'fresh_seconds', 0)
+    assert client.get('/api/analysis?transactions=0').status_code == 200
+    deadline = time.monotonic() + 10
+    while version.current == before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert version.current > before
+
+    assert revalidate(client, '/api/analysis', etags['/api/analysis']).status_code == 200
+    assert revalidate(client, '/api/stocks/saved', etags['/api/stocks/saved']).status_code == 304
+    assert revalidate(client, '/api/credit-cards', etags['/api/credit-cards']).status_code == 304
+
+
+def test_degraded_responses_carry_no_etag(backend, client, monkeypatch):
+    monkeypatch.setattr(backend.mediastack_client, 'get_reason_for_stock', lambda symbol, name: time.sleep(0.2) or 'late')
+    client.post('/api/stocks/save', json={'stocks': [{'symbol': 'AAPL', 'name': 'Apple Inc.'},
+                                                      {'symbol': 'MSFT', 'name': 'Microsoft Corporation'}]})
+
+    response = client.get('/api/stocks/saved', headers={'X-Request-Timeout-Ms': '50'})
+    assert response.status_code == 200
+    assert 'X-Degraded' in response.headers
+    assert 'ETag' not in response.headers
+
+
+def test_gzip_keeps_a_distinct_validator(client):
+    plain = client.get('/api/transactions?limit=200')
+    gzipped = client.get('/api/transactions?limit=200', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] == plain.headers['ETag'][:-1] + '-gz"'
+
+    # Either representation's ETag revalidates the other
+    assert revalidate(client, '/api/transactions?limit=200', gzipped.headers['ETag']).status_code == 304
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from historical_savings import _RECORD, HistoricalSavingsStore
+
+ACCOUNT = 'account_1'
+
+
+def snapshot(needs=100.0, wants=50.0, recommendation='Keep going.'):
+    return {'needsTotal': needs, 'wantsTotal': wants, 'savingsGoal': 500, 'monthlyBudget': 2000,
+            'recommendation': recommendation}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoricalSavingsStore(str(tmp_path), min_interval_seconds=60)
+
+
+def test_append_and_range_round_trip(store):
+    assert store.append(ACCOUNT, snapshot(needs=12.34, wants=5.5), timestamp=1000)
+
+    [row] = store.range(ACCOUNT)
+    assert row == {'timestamp': 1000.0, 'needsTotal': 12.34, 'wantsTotal': 5.5, 'totalSpending': 17.84,
+                   'savingsGoal': 500.0, 'monthlyBudget': 2000.0, 'recommendation': 'Keep going.'}
+
+
+def test_identical_snapshot_within_interval_is_skipped(store):
+    assert store.append(ACCOUNT, snapshot(), timestamp=1000)
+    assert not store.append(ACCOUNT, snapshot(), timestamp=1030)
+    # A changed total, or the same one once the interval has passed, is stored
+    assert store.append(ACCOUNT, snapshot(wants=51), timestamp=1031)
+    assert store.append(ACCOUNT, snapshot(wants=51), timestamp=1100)
+
+    assert [r['timestamp'] for r in store.range(ACCOUNT)] == [1000, 1031, 1100]
+
+
+def test_repeated_recommendation_is_stored_once(store, tmp_path):
+    store.append(ACCOUNT, snapshot(needs=1, recommendation='Cook at home.'), timestamp=1)
+    store.append(ACCOUNT, snapshot(needs=2, recommendation='Cook at home.'), timestamp=2)
+    store.append(ACCOUNT, snapshot(needs=3, recommendation='Cancel a subscription.'), timestamp=3)
+
+    assert os.path.getsize(tmp_path / f'{ACCOUNT}.rec') == len('Cook at home.Cancel a subscription.')
+    assert [r['recommendation'] for r in store.range(ACCOUNT)] == ['Cook at home.', 'Cook at home.',
+                                                                   'Cancel a subscription.']
+
+
+def test_range_bounds_are_inclusive_and_limit_keeps_latest(store):
+    for ts in range(10):
+        store.append(ACCOUNT, snapshot(needs=ts), timestamp=ts)
+
+    assert [r['timestamp'] for r in store.range(ACCOUNT, start=3, end=6)] == [3, 4, 5, 6]
+    assert [r['timestamp'] for r in store.range(ACCOUNT, start=3, end=6, limit=2)] == [5, 6]
+    assert store.range(ACCOUNT, start=20) == []
+    assert store.range('unknown_account') == []
+
+
+def test_timestamps_stay_sorted_when_the_clock_steps_back(store):
+    store.append(ACCOUNT, snapshot(needs=1), timestamp=500)
+    store.append(ACCOUNT, snapshot(needs=2), timestamp=400)
+
+    assert [r['timestamp'] for r in store.range(ACCOUNT)] == [500, 500]
+
+
+def test_downsample_averages_each_bucket(store):
+    for ts in range(100):
+        store.append(ACCOUNT, snapshot(needs=ts, recommendation=f'Tip {ts}'), timestamp=ts)
+
+    points = store.downsample(ACCOUNT, None, None, 4)
+    assert len(points) == 4
+    assert sum(p['samples'] for p in points) == 100
+    assert points[0]['needsTotal'] == pytest.approx(sum(range(25)) / 25)
+    # Each bucket keeps the recommendation of its last snapshot
+    assert points[-1]['recommendation'] == 'Tip 99'
+    assert [p['timestamp'] for p in points] == sorted(p['timestamp'] for p in points)
+
+    # Fewer snapshots than points come back as they are
+    assert len(store.downsample(ACCOUNT, 0, 2, 10)) == 3
+
+
+def test_partial_trailing_record_is_ignored_and_replaced(store, tmp_path):
+    store.append(ACCOUNT, snapshot(needs=1), timestamp=1)
+    with open(tmp_path / f'{ACCOUNT}.idx', 'ab') as f:
+        f.write(b'\x00' * (_RECORD.size // 2))
+
+    # A fresh store, as after a restart following the interrupted write
+    reopened = HistoricalSavingsStore(str(tmp_path), min_interval_seconds=60)
+    assert [r['needsTotal'] for r in reopened.range(ACCOUNT)] == [1.0]
+    assert not reopened.append(ACCOUNT, snapshot(needs=1), timestamp=2)
+    assert reopened.append(ACCOUNT, snapshot(needs=2), timestamp=3)
+
+    assert os.path.getsize(tmp_path / f'{ACCOUNT}.idx') == 2 * _RECORD.size
+    assert [r['needsTotal'] for r in reopened.range(ACCOUNT)] == [1.0, 2.0]
+
+
+def test_account_ids_cannot_escape_the_directory(store, tmp_path):
+    store.append('../outside', snapshot(), timestamp=1)
+
+    assert sorted(os.listdir(tmp_path)) == ['.._outside.idx', '.._outside.rec']
+
+
+def test_route_serves_range_and_downsampled_history(client):
+    # The fixture's first analysis stored one snapshot; a changed total stores another
+    client.post('/api/add-transaction', json={'description': 'Corner Cafe', 'amount': 4.5})
+    latest = client.get('/api/analysis').get_json()
+
+    body = client.get('/api/savings-history').get_json()
+    assert body['downsampled'] is False
+    assert len(body['snapshots']) == 2
+
+    [last] = client.get('/api/savings-history?limit=1').get_json()['snapshots']
+    assert last['wantsTotal'] == pytest.approx(latest['wantsTotal'])
+
+    [point] = client.get('/api/savings-history?points=1').get_json()['snapshots']
+    assert point['samples'] == 2
+
+    assert client.get('/api/savings-history?start=2999-01-01').get_json()['snapshots'] == []
+    assert client.get('/api/savings-history?points=many').status_code == 400
@@ -0,0 +1,169 @@
+import random
+
+import pytest
+
+from transaction_index import TRANSACTIONS_PAGE_MAX, TransactionIndex
+
+
+def records(count=60, seed=7):
+    """Transactions with many shared dates and amounts, plus a few undated ones."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        out.append({
+            'id': f'tx_{i}',
+            'description': f'Merchant {i % 7}',
+            'amount': rng.choice((5.0, 12.5, 40.0, 99.99)),
+            'date': None if i % 15 == 0 else f'2025-09-{rng.randint(1, 5):02d}',
+            'category': 'Need' if i % 3 == 0 else 'Want',
+        })
+    return out
+
+
+@pytest.fixture
+def index():
+    index = TransactionIndex()
+    index.sync(records())
+    return index
+
+
+def walk(index, **kwargs):
+    """Every page of a query, following nextCursor."""
+    pages, cursor = [], None
+    while True:
+        items, cursor = index.page(cursor=cursor, **kwargs)
+        pages.append(items)
+        if cursor is None:
+            return pages
+
+
+def walk_from(index, cursor, **kwargs):
+    """The pages after `cursor`."""
+    pages = []
+    while cursor is not None:
+        items, cursor = index.page(cursor=cursor, **kwargs)
+        pages.append(items)
+    return pages
+
+
+def ids(pages):
+    return [tx['id'] for page in pages for tx in page]
+
+
+def expected(rows, sort, order):
+    key = (lambda r: (r['date'] or '', r['id'])) if sort == 'date' else (lambda r: (round(r['amount'] * 100), r['id']))
+    return [r['id'] for r in sorted(rows, key=key, reverse=order == 'desc')]
+
+
+@pytest.mark.parametrize('sort', ['date', 'amount'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_pages_visit_every_transaction_once_in_order(index, sort, order):
+    pages = walk(index, sort=sort, order=order, limit=7)
+
+    assert all(len(page) == 7 for page in pages[:-1])
+    assert ids(pages) == expected(records(), sort, order)
+
+
+def test_category_and_range_filters(index):
+    rows = records()
+    wants = ids(walk(index, sort='amount', order='desc', category='Want', limit=5))
+    assert wants == expected([r for r in rows if r['category'] == 'Want'], 'amount', 'desc')
+
+    in_range = ids(walk(index, sort='date', order='asc', start='2025-09-02', end='2025-09-03', limit=4))
+    assert in_range == expected([r for r in rows if r['date'] and '2025-09-02' <= r['date'] <= '2025-09-03'],
+                                'date', 'asc')
+
+    # An end date alone still leaves out undated transactions
+    up_to = ids(walk(index, end='2025-09-05', limit=50))
+    assert len(up_to) == len([r for r in rows if r['date']])
+
+    # A range on the other field is checked while walking
+    mid = ids(walk(index, sort='date', order='desc', min_amount_cents=1000, max_amount_cents=4000, limit=6))
+    assert mid == expected([r for r in rows if 10 <= r['amount'] <= 40], 'date', 'desc')
+
+
+def test_cursor_is_stable_across_changes_between_pages(index):
+    first, cursor = index.page(sort='date', order='desc', limit=10)
+    seen = {tx['id'] for tx in first}
+    unseen = expected(records(), 'date', 'desc')[10:]
+
+    # A transaction sorting before the cursor, and the removal of one not yet served
+    index.upsert('tx_new', 'Late Arrival', '2025-12-31', 100, 'Want')
+    index.remove(unseen[0])
+
+    rest = ids(walk_from(index, cursor, sort='date', order='desc', limit=10))
+    assert rest == unseen[1:]
+    assert not seen & set(rest)
+
+
+def test_invalid_queries_raise_value_error(index):
+    _, cursor = index.page(sort='date', order='desc', limit=5)
+
+    with pytest.raises(ValueError):
+        index.page(sort='amount', order='desc', cursor=cursor)
+    with pytest.raises(ValueError):
+        index.page(cursor='not-a-cursor')
+    with pytest.raises(ValueError):
+        index.page(sort='description')
+    with pytest.raises(ValueError):
+        index.page(start='September')
+
+
+def test_page_size_is_capped():
+    index = TransactionIndex()
+    index.sync(records(TRANSACTIONS_PAGE_MAX + 10))
+
+    items, cursor = index.page(limit=TRANSACTIONS_PAGE_MAX * 10)
+    assert len(items) == TRANSACTIONS_PAGE_MAX
+    assert cursor is not None
+
+
+def test_sync_reports_changes_and_matches_incremental_updates(index):
+    rows = records()
+    assert not index.sync(rows)
+
+    rows[4] = dict(rows[4], category='Need')
+    del rows[9]
+    assert index.sync(rows)
+
+    fresh = TransactionIndex()
+    fresh.sync(rows)
+    for sort in ('date', 'amount'):
+        assert ids(walk(index, sort=sort, limit=9)) == ids(walk(fresh, sort=sort, limit=9))
+    assert index.summary() == fresh.summary()
+
+
+def test_summary_totals_and_date_range(index):
+    rows = records()
+    summary = index.summary()
+    assert summary['count'] == len(rows)
+    assert summary['totalSpending'] == pytest.approx(sum(r['amount'] for r in rows))
+    assert summary['categories']['Need']['count'] == len([r for r in rows if r['category'] == 'Need'])
+    assert (summary['firstDate'], summary['lastDate']) == ('2025-09-01', '2025-09-05')
+
+    day = [r for r in rows if r['date'] == '2025-09-02']
+    ranged = index.summary(start='2025-09-02', end='2025-09-02')
+    assert ranged['count'] == len(day)
+    assert ranged['totalSpending'] == pytest.approx(sum(r['amount'] for r in day))
+    assert (ranged['firstDate'], ranged['lastDate']) == ('2025-09-02', '2025-09-02')
+
+    assert index.summary(start='2026-01-01')['count'] == 0
+    with pytest.raises(ValueError):
+        index.summary(end='soon')
+
+
+def test_route_pages_through_every_transaction(client):
+    summary = client.get('/api/transactions/summary').get_json()
+    listed, cursor = [], None
+    while True:
+        url = '/api/transactions?sort=amount&order=asc&limit=15' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        listed.extend(body['transactions'])
+        cursor = body['nextCursor']
+        if cursor is None:
+            break
+
+    assert len(listed) == len({tx['id'] for tx in listed}) == summary['count']
+    assert [tx['amount'] for tx in listed] == sorted(tx['amount'] for tx in listed)
+    assert client.get('/api/transactions?cursor=bogus').status_code == 400
+    assert client.get('/api/transactions?sort=name').status_code == 400
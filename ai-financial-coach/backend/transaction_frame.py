@@ -0,0 +1,207 @@
+import heapq
+
+import numpy as np
+
+from merchants import directory as merchant_directory
+
+
+# Codes 0 and 1 are fixed; any other label the model returns is appended to the vocabulary
+NEED = 0
+WANT = 1
+DEFAULT_CATEGORIES = ('Need', 'Want')
+
+
+def _parse_dates(values):
+    """Convert 'YYYY-MM-DD...' strings to datetime64[D]; unparseable values become NaT."""
+    try:
+        return np.array(values, dtype='datetime64[D]')
+    except ValueError:
+        out = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[D]')
+        for i, value in enumerate(values):
+            try:
+                out[i] = np.datetime64(value, 'D')
+            except ValueError:
+                pass
+        return out
+
+
+def _to_cents(amount):
+    try:
+        return int(round(float(amount or 0) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+class TransactionFrame:
+    """
+    Columnar, NumPy-backed view of an account's transactions.
+
+    Columns:
+      - ids: object array of transaction ids
+      - amount_cents: int64 amounts in cents
+      - category: int16 codes into self.categories (-1 = not categorized yet)
+      - dates: datetime64[D], NaT when the transaction has no date
+      - merchant_codes: int32 codes into self.merchants (dictionary-encoded descriptions)
+      - merchant_ids: int32 canonical merchant ID of each self.merchants entry, so
+        "Starbucks" and "Starbucks Store" group together (see merchants.py)
+
+    Totals and groupings are computed with vectorized NumPy operations; plain
+    dicts are only built by to_records() at the response boundary.
+    """
+
+    def __init__(self, ids, amount_cents, merchant_codes, merchants, dates=None, category=None, categories=None,
+                 merchant_ids=None):
+        n = len(amount_cents)
+        self.ids = np.asarray(ids, dtype=object)
+        self.amount_cents = np.asarray(amount_cents, dtype=np.int64)
+        self.merchant_codes = np.asarray(merchant_codes, dtype=np.int32)
+        self.merchants = list(merchants)
+        if merchant_ids is None:
+            merchant_ids = merchant_directory.ids_for(self.merchants)
+        self.merchant_ids = np.asarray(merchant_ids, dtype=np.int32)
+        self.dates = np.asarray(dates, dtype='datetime64[D]') if dates is not None else np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        self.category = np.asarray(category, dtype=np.int16) if category is not None else np.full(n, -1, dtype=np.int16)
+        self.categories = list(categories or DEFAULT_CATEGORIES)
+
+    def __len__(self):
+        return len(self.amount_cents)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a frame from normalized transaction dicts ({id, description, amount, date?})."""
+        vocab = {}
+        ids, cents, codes, dates = [], [], [], []
+        for tx in records:
+            description = tx.get('description', '') or ''
+            code = vocab.get(description)
+            if code is None:
+                code = vocab[description] = len(vocab)
+            ids.append(tx.get('id'))
+            cents.append(_to_cents(tx.get('amount', 0)))
+            codes.append(code)
+            date = tx.get('date')
+            dates.append(str(date)[:10] if date else 'NaT')
+        return cls(ids, cents, codes, list(vocab), dates=_parse_dates(dates))
+
+    def _label_code(self, label):
+        try:
+            return self.categories.index(label)
+        except ValueError:
+            self.categories.append(label)
+            return len(self.categories) - 1
+
+    def set_categories(self, labels, default='Want'):
+        """Assign categories by position; rows beyond the end of labels get the default."""
+        labels = list(labels)[:len(self)]
+        self.category[:] = self._label_code(default)
+        if labels:
+            labels = [label if isinstance(label, str) else str(label) for label in labels]
+            lookup = {label: self._label_code(label) for label in set(labels)}
+            self.category[:len(labels)] = np.fromiter(map(lookup.__getitem__, labels), dtype=np.int16, count=len(labels))
+
+    def categorize_by_keywords(self, need_keywords):
+        """Fallback categorization: Need if the description contains any keyword, else Want.
+
+        Evaluated once per distinct description and broadcast through the codes.
+        """
+        is_need = np.array([any(word in m.lower() for word in need_keywords) for m in self.merchants], dtype=bool)
+        if len(self.merchants):
+            self.category[:] = np.where(is_need[self.merchant_codes], NEED, WANT)
+
+    def totals_cents(self):
+        """Total spend per category code, in cents."""
+        valid = self.category >= 0
+        sums = np.bincount(self.category[valid], weights=self.amount_cents[valid], minlength=len(self.categories))
+        return np.rint(sums).astype(np.int64)
+
+    def total(self, label):
+        """Total spend for a category label, in dollars."""
+        try:
+            code = self.categories.index(label)
+        except ValueError:
+            return 0.0
+        return int(self.totals_cents()[code]) / 100.0
+
+    def indices(self, label):
+        """Row positions belonging to a category label."""
+        try:
+            code = self.categories.index(label)
+        except ValueError:
+            return np.array([], dtype=np.int64)
+        return np.flatnonzero(self.category == code)
+
+    def spend_by_merchant_cents(self, rows=None):
+        """Total cents per merchant code, optionally restricted to some rows."""
+        codes = self.merchant_codes if rows is None else self.merchant_codes[rows]
+        cents = self.amount_cents if rows is None else self.amount_cents[rows]
+        return np.rint(np.bincount(codes, weights=cents, minlength=len(self.merchants))).astype(np.int64)
+
+    def canonical_merchants(self):
+        """Distinct canonical merchant IDs in first-seen order, with one raw description each."""
+        if not len(self.merchants):
+            return [], []
+        ids, first = np.unique(self.merchant_ids, return_index=True)
+        order = np.argsort(first)
+        return ids[order].tolist(), [self.merchants[i] for i in first[order].tolist()]
+
+    def set_categories_by_merchant(self, merchant_ids, labels, default='Want'):
+        """Assign one category per canonical merchant and broadcast it to every row."""
+        by_merchant = dict(zip(merchant_ids, labels))
+        per_entry = [by_merchant.get(m, default) for m in self.merchant_ids.tolist()]
+        per_entry = [label if isinstance(label, str) else str(label) for label in per_entry]
+        codes = np.array([self._label_code(label) for label in per_entry], dtype=np.int16)
+        if len(codes):
+            self.category[:] = codes[self.merchant_codes]
+        else:
+            self.category[:] = self._label_code(default)
+
+    def row_merchant_ids(self, rows=None):
+        codes = self.merchant_codes if rows is None else self.merchant_codes[rows]
+        return self.merchant_ids[codes]
+
+    def top_rows(self, rows, k):
+        """The k largest-amount rows among `rows`, largest first.
+
+        Uses argpartition, so only the selected k rows are ever sorted.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if k <= 0 or not len(rows):
+            return rows[:0]
+        if len(rows) > k:
+            rows = rows[np.argpartition(-self.amount_cents[rows], k - 1)[:k]]
+        return rows[np.argsort(-self.amount_cents[rows], kind='stable')]
+
+    def top_merchants(self, rows, k):
+        """The k canonical merchants with the most spend among `rows`: [(merchant_id, cents, count)]."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if k <= 0 or not len(rows):
+            return []
+        # Merchant IDs keep growing as the directory forgets and re-learns merchants, so
+        # count over the distinct IDs present rather than up to the largest one
+        ids, inverse = np.unique(self.row_merchant_ids(rows), return_inverse=True)
+        cents = np.bincount(inverse, weights=self.amount_cents[rows])
+        counts = np.bincount(inverse)
+        best = heapq.nlargest(k, range(len(ids)), key=cents.__getitem__)
+        return [(int(ids[i]), int(round(cents[i])), int(counts[i])) for i in best]
+
+    def descriptions(self, rows=None):
+        codes = self.merchant_codes if rows is None else self.merchant_codes[rows]
+        merchants = self.merchants
+        return [merchants[c] for c in codes.tolist()]
+
+    def to_records(self, rows=None):
+        """Materialize {id, description, amount, category} dicts for the JSON response."""
+        if rows is None:
+            rows = np.arange(len(self))
+        ids = self.ids[rows].tolist()
+        amounts = (self.amount_cents[rows] / 100.0).tolist()
+        categories = self.categories
+        cats = [categories[c] if c >= 0 else None for c in self.category[rows].tolist()]
+        dates = [None if d == 'NaT' else d for d in np.datetime_as_string(self.dates[rows]).tolist()]
+        out = []
+        for tx_id, description, amount, category, date in zip(ids, self.descriptions(rows), amounts, cats, dates):
+            record = {'id': tx_id, 'description': description, 'amount': amount, 'category': category}
+            if date is not None:
+                record['date'] = date
+            out.append(record)
+        return out
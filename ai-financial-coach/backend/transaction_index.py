@@ -0,0 +1,275 @@
+import base64
+import bisect
+import json
+import os
+import threading
+from datetime import date
+
+from config import load_env
+
+load_env()
+
+SORT_FIELDS = ('date', 'amount')
+ORDERS = ('asc', 'desc')
+# A page never holds more than this many transactions
+TRANSACTIONS_PAGE_MAX = int(os.getenv('TRANSACTIONS_PAGE_MAX', '200'))
+
+
+def _ordinal(value):
+    """Day number of a YYYY-MM-DD(...) string, 0 for undated (sorts before every real date)."""
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return 0
+    return 0
+
+
+def encode_cursor(sort, order, key, tx_id):
+    raw = json.dumps([sort, order, key, tx_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort, order):
+    """(key, tx_id) of the last transaction of the previous page."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        c_sort, c_order, key, tx_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if (c_sort, c_order) != (sort, order) or not isinstance(key, int) or not isinstance(tx_id, str):
+        raise ValueError("cursor does not match sort and order")
+    return key, tx_id
+
+
+class _Entry:
+    __slots__ = ('description', 'amount_cents', 'date', 'day', 'category')
+
+    def __init__(self, description, amount_cents, tx_date, category):
+        self.description = description or ''
+        self.amount_cents = int(amount_cents)
+        self.date = str(tx_date)[:10] if tx_date else None
+        self.day = _ordinal(self.date)
+        self.category = category or 'Uncategorized'
+
+    def key(self, sort):
+        return self.day if sort == 'date' else self.amount_cents
+
+    def __eq__(self, other):
+        return (isinstance(other, _Entry) and self.description == other.description
+                and self.amount_cents == other.amount_cents and self.date == other.date
+                and self.category == other.category)
+
+
+class TransactionIndex:
+    """
+    Categorized transactions of one account, kept sorted for paging.
+
+    For each sort field (date, amount) there is one sorted list of
+    (key, tx_id) over all transactions and one per category, so a page is a
+    binary search to the range or cursor position followed by a walk of
+    roughly `limit` items: its cost grows with the page, not the history.
+    A range filter on the sorted field narrows the walk by bisection; one on
+    the other field is checked while walking. Per-category totals are kept
+    up to date on every change for the summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        # (sort field, category or None) -> sorted [(key, tx_id)]
+        self._sorted = {}
+        # category -> [cents, count]
+        self._totals = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lists(self, category):
+        for sort in SORT_FIELDS:
+            for scope in (None, category):
+                yield sort, self._sorted.setdefault((sort, scope), [])
+
+    def _add(self, tx_id, entry):
+        self._entries[tx_id] = entry
+        for sort, keys in self._lists(entry.category):
+            bisect.insort(keys, (entry.key(sort), tx_id))
+        totals = self._totals.setdefault(entry.category, [0, 0])
+        totals[0] += entry.amount_cents
+        totals[1] += 1
+
+    def _discard(self, tx_id):
+        entry = self._entries.pop(tx_id)
+        for sort, keys in self._lists(entry.category):
+            item = (entry.key(sort), tx_id)
+            i = bisect.bisect_left(keys, item)
+            if i < len(keys) and keys[i] == item:
+                del keys[i]
+        totals = self._totals[entry.category]
+        totals[0] -= entry.amount_cents
+        totals[1] -= 1
+        if not totals[1]:
+            del self._totals[entry.category]
+
+    def upsert(self, tx_id, description, tx_date, amount_cents, category):
+        """Add a transaction, or re-file it if any of its fields changed."""
+        tx_id = str(tx_id)
+        entry = _Entry(description, amount_cents, tx_date, category)
+        with self._lock:
+            previous = self._entries.get(tx_id)
+            if previous == entry:
+                return
+            if previous is not None:
+                self._discard(tx_id)
+            self._add(tx_id, entry)
+
+    def remove(self, tx_id):
+        with self._lock:
+            if str(tx_id) not in self._entries:
+                return False
+            self._discard(str(tx_id))
+            return True
+
+    def sync(self, records):
+        """Reconcile with the account's current categorized transactions; True if anything changed.
+
+        The first sync (or one that replaces most of the index) sorts once
+        instead of inserting row by row.
+        """
+        fresh = {}
+        for tx in records:
+            tx_id = tx.get('id')
+            if tx_id is None:
+                continue
+            fresh[str(tx_id)] = _Entry(tx.get('description'), round(float(tx.get('amount') or 0) * 100),
+                                       tx.get('date'), tx.get('category'))
+        with self._lock:
+            changed = [tx_id for tx_id, entry in fresh.items() if self._entries.get(tx_id) != entry]
+            stale = [tx_id for tx_id in self._entries if tx_id not in fresh]
+            if not changed and not stale:
+                return False
+            if len(changed) + len(stale) > len(fresh) // 2:
+                self._rebuild(fresh)
+                return True
+            for tx_id in stale:
+                self._discard(tx_id)
+            for tx_id in changed:
+                if tx_id in self._entries:
+                    self._discard(tx_id)
+                self._add(tx_id, fresh[tx_id])
+        return True
+
+    def _rebuild(self, entries):
+        self._entries = dict(entries)
+        self._sorted = {}
+        self._totals = {}
+        for tx_id, entry in self._entries.items():
+            for sort, keys in self._lists(entry.category):
+                keys.append((entry.key(sort), tx_id))
+            totals = self._totals.setdefault(entry.category, [0, 0])
+            totals[0] += entry.amount_cents
+            totals[1] += 1
+        for keys in self._sorted.values():
+            keys.sort()
+
+    def page(self, sort='date', order='desc', category=None, start=None, end=None,
+             min_amount_cents=None, max_amount_cents=None, limit=50, cursor=None):
+        """
+        One page of transactions and the cursor of the next (None on the last page).
+
+        start/end are inclusive YYYY-MM-DD dates; undated transactions only
+        match when no date range is given.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        if order not in ORDERS:
+            raise ValueError("order must be asc or desc")
+        limit = max(1, min(int(limit), TRANSACTIONS_PAGE_MAX))
+        ranges = {'date': [None, None], 'amount': [min_amount_cents, max_amount_cents]}
+        for i, value in enumerate((start, end)):
+            if value:
+                day = _ordinal(value)
+                if not day:
+                    raise ValueError("start and end must be YYYY-MM-DD dates")
+                ranges['date'][i] = day
+        if ranges['date'][1] is not None and ranges['date'][0] is None:
+            # An end date alone still excludes undated transactions (day 0)
+            ranges['date'][0] = 1
+        after = decode_cursor(cursor, sort, order) if cursor else None
+
+        other = 'amount' if sort == 'date' else 'date'
+        lo_key, hi_key = ranges[sort]
+        other_lo, other_hi = ranges[other]
+
+        items = []
+        with self._lock:
+            keys = self._sorted.get((sort, category), [])
+            lo = bisect.bisect_left(keys, (lo_key,)) if lo_key is not None else 0
+            hi = bisect.bisect_left(keys, (hi_key + 1,)) if hi_key is not None else len(keys)
+            if order == 'asc':
+                if after is not None:
+                    lo = max(lo, bisect.bisect_right(keys, after))
+                positions = range(lo, hi)
+            else:
+                if after is not None:
+                    hi = min(hi, bisect.bisect_left(keys, after))
+                positions = range(hi - 1, lo - 1, -1)
+            last, more = None, False
+            for i in positions:
+                key, tx_id = keys[i]
+                entry = self._entries[tx_id]
+                value = entry.key(other)
+                if (other_lo is not None and value < other_lo) or (other_hi is not None and value > other_hi):
+                    continue
+                if len(items) == limit:
+                    more = True
+                    break
+                items.append({
+                    "id": tx_id,
+                    "description": entry.description,
+                    "amount": entry.amount_cents / 100.0,
+                    "date": entry.date,
+                    "category": entry.category,
+                })
+                last = (key, tx_id)
+        return items, (encode_cursor(sort, order, *last) if more else None)
+
+    def summary(self, start=None, end=None):
+        """
+        Totals and counts per category, without touching the transactions.
+
+        start/end are inclusive YYYY-MM-DD dates; with either one only dated
+        transactions in the range are counted, walking just that slice of the
+        date order.
+        """
+        bounds = [None, None]
+        for i, value in enumerate((start, end)):
+            if value:
+                bounds[i] = _ordinal(value)
+                if not bounds[i]:
+                    raise ValueError("start and end must be YYYY-MM-DD dates")
+        ranged = bounds != [None, None]
+        with self._lock:
+            by_date = self._sorted.get(('date', None), [])
+            # Undated transactions sort first with day 0
+            lo = bisect.bisect_left(by_date, (bounds[0] or 1,))
+            hi = bisect.bisect_left(by_date, (bounds[1] + 1,)) if bounds[1] is not None else len(by_date)
+            if ranged:
+                totals = {}
+                for _, tx_id in by_date[lo:hi]:
+                    entry = self._entries[tx_id]
+                    cents, count = totals.get(entry.category, (0, 0))
+                    totals[entry.category] = (cents + entry.amount_cents, count + 1)
+            else:
+                totals = {category: (cents, count) for category, (cents, count) in self._totals.items()}
+            first_day = by_date[lo][0] if lo < hi else None
+            last_day = by_date[hi - 1][0] if lo < hi else None
+        return {
+            "count": sum(count for _, count in totals.values()),
+            "totalSpending": sum(cents for cents, _ in totals.values()) / 100.0,
+            "categories": {c: {"total": cents / 100.0, "count": count} for c, (cents, count) in totals.items()},
+            "firstDate": date.fromordinal(first_day).isoformat() if first_day else None,
+            "lastDate": date.fromordinal(last_day).isoformat() if last_day else None,
+        }
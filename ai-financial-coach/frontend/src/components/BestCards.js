@@ -11,7 +11,7 @@ const fallbackCards = {
   disclaimer: 'Offline fallback: general information only. Offers and terms vary; verify current details. Not financial advice.'
 };
 
-const BestCards = () => {
+const BestCards = ({ initial }) => {
   const [cards, setCards] = useState([]);
   const [disclaimer, setDisclaimer] = useState('');
   const [error, setError] = useState('');
@@ -43,6 +43,13 @@ const BestCards = () => {
   useEffect(() => {
     let mounted = true;
     (async () => {
+      if (initial) {
+        // Already loaded by the dashboard request
+        setCards(initial.cards || []);
+        setDisclaimer(initial.disclaimer || '');
+        setLoading(false);
+        return;
+      }
       await fetchCards();
     })();
     return () => { mounted = false; };
@@ -19,6 +19,21 @@ function randomDateJulyToOctober() {
   return date;
 }
 
+// Transactions fetched per page of the Recent Transactions list
+const TX_PAGE_SIZE = 25;
+// Analysis fields the dashboard renders. The transactions themselves are paged from
+// /api/transactions and totalled by /api/transactions/summary, so the list is left out.
+const ANALYSIS_FIELDS = 'needsTotal,wantsTotal,totalSpending,monthlyBudget,savingsGoal,recommendation';
+const DASHBOARD_FIELDS = ['error', ...ANALYSIS_FIELDS.split(',')]
+  .map(field => `analysis.${field}`)
+  .concat(['cards', 'trending', 'saved'])
+  .join(',');
+// Completed months of spending fetched for Savings History (its quarterly view goes back four quarters)
+const HISTORY_MONTHS = 15;
+
+// YYYY-MM-DD in local time, as the date filters of the API expect
+const isoDate = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+
 /**
  * Main Dashboard component that displays financial analysis and interactive tools
  * @param {Object} props - Component props
@@ -35,17 +50,48 @@ const Dashboard = ({ onBack }) => {
   const [removeMode, setRemoveMode] = useState(false);
   // store ids as strings to avoid number/string mismatches from API
   const [selectedTxIds, setSelectedTxIds] = useState([]);
+  // Card, trending and saved-stock data from /api/dashboard, handed to the cards on first render
+  const [panels, setPanels] = useState(null);
+  // Paged Recent Transactions list from /api/transactions
+  const [txPage, setTxPage] = useState({ items: [], nextCursor: null, loaded: false });
+  // Overall and current-month totals, monthly spend and the month's largest wants, computed server-side
+  const [totals, setTotals] = useState(null);
 
   useEffect(() => {
-    fetchAnalysis();
+    fetchDashboard();
   }, []);
 
+  // First load: the analysis and every card in one request. A section that is null
+  // (timed out or failed) is left for its card to fetch on its own.
+  const fetchDashboard = async () => {
+    try {
+      setIsLoading(true);
+      const response = await axios.get(`/api/dashboard?fields=${DASHBOARD_FIELDS}`);
+      const { analysis, cards, trending, saved } = response.data || {};
+      if (!analysis || analysis.error) {
+        await fetchAnalysis();
+        return;
+      }
+      setPanels({ cards, trending, saved });
+      setAnalysisData(analysis);
+      setError('');
+      await Promise.all([fetchTransactions(), fetchTotals()]);
+    } catch (err) {
+      await fetchAnalysis();
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   const fetchAnalysis = async () => {
     try {
       setIsLoading(true);
-      const response = await axios.get('/api/analysis');
+      // Transactions changed: the cards remount and fetch their own fresh data
+      setPanels(null);
+      const response = await axios.get(`/api/analysis?fields=${ANALYSIS_FIELDS}`);
       setAnalysisData(response.data);
       setError('');
+      await Promise.all([fetchTransactions(), fetchTotals()]);
     } catch (err) {
       if (process.env.NODE_ENV === 'development') {
         console.error('Analysis error:', err);
@@ -55,14 +101,71 @@ const Dashboard = ({ onBack }) => {
       setAnalysisData({
         needsTotal: 0,
         wantsTotal: 0,
-        recommendation: "Unable to load analysis data.",
-        categorizedTransactions: []
+        recommendation: "Unable to load analysis data."
       });
     } finally {
       setIsLoading(false);
     }
   };
 
+  // First page (no cursor) replaces the list; later pages are appended
+  const fetchTransactions = async (cursor) => {
+    try {
+      const params = new URLSearchParams({ limit: String(TX_PAGE_SIZE), sort: 'date', order: 'desc' });
+      if (cursor) params.set('cursor', cursor);
+      const response = await axios.get(`/api/transactions?${params.toString()}`);
+      const items = response.data?.transactions || [];
+      setTxPage(prev => ({
+        items: cursor ? [...prev.items, ...items] : items,
+        nextCursor: response.data?.nextCursor || null,
+        loaded: true
+      }));
+    } catch (err) {
+      if (process.env.NODE_ENV === 'development') {
+        console.error('Transactions error:', err);
+      }
+      if (!cursor) setTxPage({ items: [], nextCursor: null, loaded: false });
+    }
+  };
+
+  // Everything the header, breakdown, history and recommendation total up, without the transactions
+  const fetchTotals = async () => {
+    const today = new Date();
+    const month = {
+      start: isoDate(new Date(today.getFullYear(), today.getMonth(), 1)),
+      end: isoDate(new Date(today.getFullYear(), today.getMonth() + 1, 0))
+    };
+    const history = {
+      granularity: 'month',
+      start: isoDate(new Date(today.getFullYear(), today.getMonth() - HISTORY_MONTHS, 1)),
+      end: month.end
+    };
+    const topWants = { ...month, category: 'Want', sort: 'amount', order: 'desc', limit: '2' };
+    try {
+      const [overall, current, rollups, wants] = await Promise.all([
+        axios.get('/api/transactions/summary'),
+        axios.get(`/api/transactions/summary?${new URLSearchParams(month).toString()}`),
+        axios.get(`/api/spending/rollups?${new URLSearchParams(history).toString()}`),
+        axios.get(`/api/transactions?${new URLSearchParams(topWants).toString()}`)
+      ]);
+      const spendingByMonth = {};
+      for (const bucket of rollups.data?.buckets || []) {
+        spendingByMonth[bucket.bucket.slice(0, 7)] = Number(bucket.total) || 0;
+      }
+      setTotals({
+        overall: overall.data,
+        month: current.data,
+        spendingByMonth,
+        topWants: wants.data?.transactions || []
+      });
+    } catch (err) {
+      if (process.env.NODE_ENV === 'development') {
+        console.error('Totals error:', err);
+      }
+      setTotals(null);
+    }
+  };
+
   const handleSeedTransactions = async () => {
     // Deprecated: use add single transaction form
     setShowAddForm(true);
@@ -111,7 +214,6 @@ const Dashboard = ({ onBack }) => {
   const wantsTotal = analysisData?.wantsTotal || 0;
   const monthlyBudget = analysisData?.monthlyBudget || 0;
   const savingsGoal = analysisData?.savingsGoal || 500;
-  let categorizedTransactions = analysisData?.categorizedTransactions || [];
   // Assign a stable random date in the past 4 months (July to October 2025) to each transaction if not present, and persist in localStorage
   // Also, always categorize groceries as 'Need'
   const txDateKey = 'txDateMap2025';
@@ -137,7 +239,7 @@ const Dashboard = ({ onBack }) => {
     return new Date(year, months[monthIdx], day, 12, 0, 0, 0);
   }
 
-  categorizedTransactions = categorizedTransactions.map((tx, i) => {
+  const normalizeTransaction = (tx) => {
     // Always categorize groceries as 'Need'
     let category = tx.category;
     if (tx.description && tx.description.toLowerCase().includes('grocer')) {
@@ -158,13 +260,12 @@ const Dashboard = ({ onBack }) => {
       date = new Date(date);
     }
     return { ...tx, date, category };
-  });
-
+  };
+  const listedTransactions = txPage.items.map(normalizeTransaction);
 
-  // Sort transactions in reverse chronological order by date
-  const displayedTransactions = categorizedTransactions.slice().sort((a, b) => b.date - a.date);
-  const displayedNeedsTotal = displayedTransactions.reduce((acc, t) => acc + (t.category === 'Need' ? Number(t.amount || 0) : 0), 0);
-  const displayedWantsTotal = displayedTransactions.reduce((acc, t) => acc + (t.category === 'Want' ? Number(t.amount || 0) : 0), 0);
+  // Totals from /api/transactions/summary (the analysis totals if it could not be fetched)
+  const displayedNeedsTotal = totals ? Number(totals.overall?.needsTotal) || 0 : needsTotal;
+  const displayedWantsTotal = totals ? Number(totals.overall?.wantsTotal) || 0 : wantsTotal;
   const displayedTotalSpending = displayedNeedsTotal + displayedWantsTotal;
   // For compatibility, keep these as aliases
   const fullNeedsTotal = displayedNeedsTotal;
@@ -173,33 +274,22 @@ const Dashboard = ({ onBack }) => {
   const progressPercentage = savingsGoal > 0 ? Math.min((savingsGoal - displayedWantsTotal) / savingsGoal * 100, 100) : 0;
   const actualSavingsDisplayed = Math.max(0, savingsGoal - displayedWantsTotal);
   const actualSavingsFull = actualSavingsDisplayed;
+  // Current-month totals shared by the stat chips, the breakdown, the recommendation and Rewards
+  const monthNeedsTotal = Number(totals?.month?.needsTotal) || 0;
+  const monthWantsTotal = Number(totals?.month?.wantsTotal) || 0;
+  const monthTotalSpending = monthNeedsTotal + monthWantsTotal;
 
   // Generate personalized AI recommendation based on budget status
   const generatePersonalizedRecommendation = () => {
     // IMPORTANT: Use current-month totals to match the header chips and spending breakdown
-    const today = new Date();
-    const currentMonthTx = displayedTransactions.filter(tx => {
-      const txDate = tx.date instanceof Date ? tx.date : new Date(tx.date);
-      return txDate.getMonth() === today.getMonth() && txDate.getFullYear() === today.getFullYear();
-    });
-
-    const needsTotal = currentMonthTx
-      .filter(t => t.category === 'Need')
-      .reduce((acc, t) => acc + Number(t.amount || 0), 0);
-    const wantsTotal = currentMonthTx
-      .filter(t => t.category === 'Want')
-      .reduce((acc, t) => acc + Number(t.amount || 0), 0);
-    const totalSpent = needsTotal + wantsTotal;
+    const totalSpent = monthTotalSpending;
 
     const isOverBudget = monthlyBudget > 0 && totalSpent > monthlyBudget;
     const budgetRemaining = monthlyBudget - totalSpent;
     
     if (isOverBudget) {
-      // Find recent "Want" transactions for overspending recommendations (current month only)
-      const recentWants = currentMonthTx
-        .filter(t => t.category === 'Want')
-        .sort((a, b) => b.amount - a.amount) // Sort by amount descending
-        .slice(0, 2); // Take top 2 expensive wants
+      // Top 2 expensive "Want" transactions of the current month, for overspending recommendations
+      const recentWants = totals?.topWants || [];
 
       const overAmount = Math.abs(budgetRemaining);
       let recommendation = `🚨 You're $${overAmount.toFixed(2)} over your monthly budget! `;
@@ -284,15 +374,7 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
   const remainingBudget = monthlyBudget - displayedTotalSpending;
 
   // Compute current-month savings to align Rewards points with the visible savings progress
-  const today = new Date();
-  const currentMonthTx = (categorizedTransactions || []).filter(tx => {
-    const txDate = tx.date instanceof Date ? tx.date : new Date(tx.date);
-    return txDate.getMonth() === today.getMonth() && txDate.getFullYear() === today.getFullYear();
-  });
-  const cmNeeds = currentMonthTx.filter(t => t.category === 'Need').reduce((acc, t) => acc + Number(t.amount || 0), 0);
-  const cmWants = currentMonthTx.filter(t => t.category === 'Want').reduce((acc, t) => acc + Number(t.amount || 0), 0);
-  const cmTotal = cmNeeds + cmWants;
-  const currentMonthSavings = Math.max(0, (Number(monthlyBudget) || 0) - cmTotal);
+  const currentMonthSavings = Math.max(0, (Number(monthlyBudget) || 0) - monthTotalSpending);
 
   return (
     <div className="dashboard-container">
@@ -319,14 +401,7 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
               <span style={{ marginLeft: 8 }}>${monthlyBudget.toFixed(2)}</span>
             </div>
             {(() => {
-              const today = new Date();
-              const currentMonthTx = displayedTransactions.filter(tx => {
-                const txDate = tx.date instanceof Date ? tx.date : new Date(tx.date);
-                return txDate.getMonth() === today.getMonth() && txDate.getFullYear() === today.getFullYear();
-              });
-              const needsTotal = currentMonthTx.filter(t => t.category === 'Need').reduce((acc, t) => acc + Number(t.amount || 0), 0);
-              const wantsTotal = currentMonthTx.filter(t => t.category === 'Want').reduce((acc, t) => acc + Number(t.amount || 0), 0);
-              const totalSpending = needsTotal + wantsTotal;
+              const totalSpending = monthTotalSpending;
               const remainingBudget = monthlyBudget - totalSpending;
               return (
                 <>
@@ -375,24 +450,12 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
             <div className="card-base">
               <div className="card-scroll">
                 {/* Only use transactions from the current month for breakdown */}
-                {(() => {
-                  const today = new Date();
-                  const currentMonthTx = displayedTransactions.filter(tx => {
-                    const txDate = tx.date instanceof Date ? tx.date : new Date(tx.date);
-                    return txDate.getMonth() === today.getMonth() && txDate.getFullYear() === today.getFullYear();
-                  });
-                  const needsTotal = currentMonthTx.filter(t => t.category === 'Need').reduce((acc, t) => acc + Number(t.amount || 0), 0);
-                  const wantsTotal = currentMonthTx.filter(t => t.category === 'Want').reduce((acc, t) => acc + Number(t.amount || 0), 0);
-                  const totalSpending = needsTotal + wantsTotal;
-                  return (
-                    <SpendingBreakdown
-                      needsTotal={needsTotal}
-                      wantsTotal={wantsTotal}
-                      totalSpending={totalSpending}
-                      monthlyBudget={monthlyBudget}
-                    />
-                  );
-                })()}
+                <SpendingBreakdown
+                  needsTotal={monthNeedsTotal}
+                  wantsTotal={monthWantsTotal}
+                  totalSpending={monthTotalSpending}
+                  monthlyBudget={monthlyBudget}
+                />
               </div>
             </div>
           </div>
@@ -406,7 +469,7 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
                   actualSavings={actualSavingsFull}
                   monthlyBudget={monthlyBudget}
                   displayedSpent={displayedTotalSpending}
-                  transactions={displayedTransactions}
+                  spendingByMonth={totals?.spendingByMonth}
                   excludeCurrentMonth={true}
                 />
               </div>
@@ -425,7 +488,7 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
           </div>
 
           <div style={{ display: 'flex', flexDirection: 'column', height: '100%' }}>
-            <BestCards />
+            <BestCards initial={panels?.cards} />
           </div>
 
           <div style={{ display: 'flex', flexDirection: 'column', height: '100%' }}>
@@ -434,7 +497,7 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
               <div className="transactions-list card-scroll" style={{ marginTop: 12 }}>
                 {(() => {
                   // Sort all transactions in reverse chronological order by date
-                  const allTransactions = categorizedTransactions.slice().sort((a, b) => b.date - a.date);
+                  const allTransactions = listedTransactions.slice().sort((a, b) => b.date - a.date);
                   const needs = allTransactions.filter(t => t.category === 'Need');
                   const wants = allTransactions.filter(t => t.category === 'Want');
                   
@@ -523,6 +586,12 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
                           No recent transactions to display
                         </div>
                       )}
+
+                      {txPage.loaded && txPage.nextCursor && (
+                        <div style={{ textAlign: 'center', marginTop: 12 }}>
+                          <button className="btn-ghost" onClick={() => fetchTransactions(txPage.nextCursor)}>Load more</button>
+                        </div>
+                      )}
                     </>
                   );
                 })()}
@@ -531,11 +600,11 @@ Pro tip: go on a weekday for shorter lines and better deals, or use student/loca
           </div>
 
           <div style={{ display: 'flex', flexDirection: 'column', height: '100%' }}>
-            <StocksCard />
+            <StocksCard initial={panels?.trending} />
           </div>
 
           <div style={{ display: 'flex', flexDirection: 'column', height: '100%' }}>
-            <SavedStocksCard />
+            <SavedStocksCard initial={panels?.saved} />
           </div>
 
           <div style={{ display: 'flex', flexDirection: 'column', height: '100%' }}>
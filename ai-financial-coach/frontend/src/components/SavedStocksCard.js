@@ -9,7 +9,7 @@ const verdictColor = (v) => {
   }
 };
 
-const SavedStocksCard = () => {
+const SavedStocksCard = ({ initial }) => {
   const [rows, setRows] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -18,21 +18,25 @@ const SavedStocksCard = () => {
   const [adding, setAdding] = useState(false);
   const [addError, setAddError] = useState('');
 
+  const applySaved = (payload) => {
+    const saved = payload?.saved || [];
+    const ratings = payload?.ratings || [];
+    const bySym = Object.fromEntries(ratings.map(r => [String(r.symbol).toUpperCase(), r]));
+    const merged = saved.map(s => ({
+      symbol: String(s.symbol).toUpperCase(),
+      name: s.name || s.symbol,
+      verdict: bySym[String(s.symbol).toUpperCase()]?.verdict || 'hold',
+      reason: bySym[String(s.symbol).toUpperCase()]?.reason || ''
+    }));
+    setRows(merged);
+    setError('');
+  };
+
   const load = async () => {
     try {
       setLoading(true);
       const res = await axios.get('/api/stocks/saved');
-      const saved = res.data?.saved || [];
-      const ratings = res.data?.ratings || [];
-      const bySym = Object.fromEntries(ratings.map(r => [String(r.symbol).toUpperCase(), r]));
-      const merged = saved.map(s => ({
-        symbol: String(s.symbol).toUpperCase(),
-        name: s.name || s.symbol,
-        verdict: bySym[String(s.symbol).toUpperCase()]?.verdict || 'hold',
-        reason: bySym[String(s.symbol).toUpperCase()]?.reason || ''
-      }));
-      setRows(merged);
-      setError('');
+      applySaved(res.data);
     } catch (e) {
       setError('Unable to load saved stocks.');
     } finally {
@@ -40,7 +44,15 @@ const SavedStocksCard = () => {
     }
   };
 
-  useEffect(() => { load(); }, []);
+  useEffect(() => {
+    if (initial) {
+      // Already loaded by the dashboard request
+      applySaved(initial);
+      setLoading(false);
+      return;
+    }
+    load();
+  }, []);
 
   const onAdd = async () => {
     try {
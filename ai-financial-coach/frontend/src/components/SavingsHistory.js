@@ -6,13 +6,16 @@ import React, { useState } from 'react';
 // - actualSavings: number (current month savings — not used directly in history)
 // - monthlyBudget: number
 // - displayedSpent: number (current month spend — not used directly in history)
-// - transactions: array of { date: Date|string, amount: number, category: 'Need'|'Want' }
+// - spendingByMonth: { 'YYYY-MM': number } spend per month, e.g. from /api/spending/rollups
+// - transactions: array of { date: Date|string, amount: number, category: 'Need'|'Want' }, totalled
+//   per month when spendingByMonth is not given
 // - excludeCurrentMonth: boolean
 const SavingsHistory = ({
 	savingsGoal = 500,
 	actualSavings = 0,
 	monthlyBudget = 0,
 	displayedSpent = 0,
+	spendingByMonth: monthlySpending = null,
 	transactions = [],
 	excludeCurrentMonth = true,
 }) => {
@@ -49,10 +52,10 @@ const SavingsHistory = ({
 		count += 1;
 	}
 
-	// Aggregate spending per month
+	// Aggregate spending per month, unless the totals were computed already
 	const monthKey = (year, month) => `${year}-${String(month + 1).padStart(2, '0')}`;
-	const spendingByMonth = Object.create(null);
-	for (const t of tx) {
+	const spendingByMonth = Object.assign(Object.create(null), monthlySpending || {});
+	for (const t of monthlySpending ? [] : tx) {
 		if (!(t.date instanceof Date) || isNaN(t.date)) continue;
 		const key = monthKey(t.date.getFullYear(), t.date.getMonth());
 		spendingByMonth[key] = (spendingByMonth[key] || 0) + (Number(t.amount) || 0);
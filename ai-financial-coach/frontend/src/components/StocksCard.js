@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 
-const StocksCard = () => {
+const StocksCard = ({ initial }) => {
   const [data, setData] = useState({ buys: [], sells: [], disclaimer: '' });
   const [loading, setLoading] = useState(true);
   const [loadError, setLoadError] = useState('');
@@ -33,6 +33,12 @@ const StocksCard = () => {
   useEffect(() => {
     let mounted = true;
     (async () => {
+      if (initial) {
+        // Already loaded by the dashboard request
+        setData(initial);
+        setLoading(false);
+        return;
+      }
       await fetchTrending();
     })();
     return () => { mounted = false; };